@@ -0,0 +1,124 @@
+"""
+บีบอัด response (brotli / gzip) ตาม Accept-Encoding ของ client
+
+- บีบเฉพาะ body ที่ส่งครั้งเดียวจบ (Response ปกติ) และยาวตั้งแต่ COMPRESSION_MIN_BYTES
+  stream (SSE/NDJSON) ส่งผ่านตามเดิม - บีบทีละ chunk จะทำให้ event ค้างอยู่ใน buffer ของ compressor
+- ผลวิเคราะห์เป็นข้อความไทยใน UTF-8 (3 byte ต่อตัวอักษร) ที่ซ้ำกันมาก บีบแล้วเล็กลงหลายเท่า
+- brotli ใช้ได้เมื่อติดตั้ง package brotli (ไม่มี = gzip อย่างเดียว)
+- ETag ของ body ที่บีบแล้วต่อท้ายด้วย encoding ("abc" -> "abc-gzip") เพราะ strong ETag ต้องต่างกันตาม
+  content-coding; 304 ที่ตอบ If-None-Match แบบต่อท้ายได้ ETag รูปเดียวกับที่ client ถืออยู่
+- เวลาที่ใช้บีบและจำนวน byte ที่ประหยัดได้บันทึกลง /metrics
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.http_cache import encoded_etag
+from app.services import metrics
+from typing import Dict, Optional
+import gzip
+import time
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """encoding ที่จะใช้ตาม header Accept-Encoding ("br" > "gzip" เมื่อ q เท่ากัน) หรือ None ถ้าไม่รับทั้งคู่"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = ("br", "gzip") if brotli_available else ("gzip",)
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int, gzip_level: int, brotli_quality: int, record_metrics: bool):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.record_metrics = record_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = request_headers.get("if-none-match", "")
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # รอดู body ก่อนตัดสินใจว่าจะบีบไหม
+                return
+            if start is None:
+                await send(message)
+                return
+            initial, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(initial, body):
+                if initial["status"] == 304:
+                    self._not_modified_etag(initial, if_none_match, encoding)
+                await send(initial)
+                await send(message)
+                return
+            compressed = self.compress(body, encoding)
+            headers = MutableHeaders(scope=initial)
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(initial)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _not_modified_etag(start: Message, if_none_match: str, encoding: str) -> None:
+        """304 ต้องมี ETag เดียวกับ 200 ที่ client ถืออยู่ - ถ้า client ส่งรูปที่บีบแล้วมา ตอบรูปนั้น"""
+        headers = MutableHeaders(scope=start)
+        etag = headers.get("etag")
+        if etag and encoded_etag(etag, encoding) in (candidate.strip() for candidate in if_none_match.split(",")):
+            headers["ETag"] = encoded_etag(etag, encoding)
+
+    def _compressible(self, start: Message, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start["status"] in (204, 304):
+            return False
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        started = time.perf_counter()
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            # mtime=0: ผลบีบของ body เดียวกันเหมือนกันทุกครั้ง
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if self.record_metrics:
+            metrics.record_compression(encoding, len(body), len(compressed), time.perf_counter() - started)
+        return compressed
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import hmac
+import json
+import logging
+import math
+import random
+from app.config import Settings, get_settings
 from app.api.schemas import (
-    ProductData, 
-    AnalysisResponse, 
+    ProductData,
+    AnalysisResponse,
     SuggestionRequest,
+    IncrementalAnalysisRequest,
     TopicAnalysis,
-    TopicDetails
+    TopicDetails,
+    BatchItemResult
 )
-# ❌ Comment ไว้ก่อน - จะใช้ทีหลังเมื่อมี Database
-# from app.services.analyzer import analyze_product
-# from app.services.suggestions import generate_suggestion
-
+from app.services.analyzer import analyze_incremental, analyze_with_id, stream_analysis
+from app.services.cache import analysis_cache, analysis_flights
+from app.services.storage import get_store
+from app.services.batch import analyze_batch, iter_batch
+from app.services.pipeline import analyze_ndjson, iter_lines, PipelineStats, summary_record
+from app.services.suggestions import generate_suggestion, get_batcher
+from app.services.llm import get_llm_client
+from app.services.admission import AdmissionController, AdmissionRejected, ItemQuota, client_keys, get_admission, get_rate_limiter
+from app.services.ingest import ingest_listings
+
+from app.api.http_cache import PrebuiltJSON, etag_matches, keyed_etag, not_modified
+from app.api.responses import ModelResponse, model_json
 from app.api.mock_data import (
-    get_dummy_product,
-    get_dummy_analysis,
     get_all_dummy_products,
     get_all_dummy_analyses,
     DUMMY_BASIC_INFO_SUGGESTIONS,
@@ -22,35 +39,246 @@ from app.api.mock_data import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse ที่ไม่แย่ง receive() ไปรอ disconnect
+    ใช้เมื่อ generator ยังอ่าน request body อยู่ระหว่างส่ง response
+    (request.stream() จะ raise ClientDisconnect เองถ้า client ตัดการเชื่อมต่อ)
+    """
 
-# ==================== MAIN ENDPOINTS (ใช้ Mock ก่อน) ====================
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
 
-@router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_product_endpoint(product: ProductData):
+class AdmittedStreamingResponse(StreamingResponse):
     """
-    วิเคราะห์ข้อมูลสินค้าและให้คะแนน + คำแนะนำ
-    
-    ⚠️ ตอนนี้ใช้ Mock Data ก่อน
-    TODO: เปลี่ยนเป็น analyzer.py เมื่อมี Database
+    StreamingResponse ที่ถือที่ใน admission (ได้มาก่อนส่ง header) ไว้จนส่งครบหรือ client ตัดการเชื่อมต่อ แล้วคืนเสมอ
+    (คืนใน generator ไม่ได้ - generator อาจไม่เริ่มเลยถ้า client ตัดการเชื่อมต่อก่อน byte แรก)
     """
+
+    def __init__(self, content, admission: Optional[AdmissionController], **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.admission is not None:
+                self.admission.leave()
+
+# ==================== ADMISSION ====================
+
+async def rate_limit(request: Request) -> None:
+    """dependency ของ endpoint วิเคราะห์: client ที่ยิงถี่เกิน RATE_LIMIT_* ได้ 429 + Retry-After"""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return
+    settings = get_settings()
+    key, ip_key = client_keys(request.headers.get(settings.client_id_header), request.client.host if request.client else None)
+    wait = await limiter.acquire(key, ip_key)
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many analysis requests from this client",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+def item_quota(request: Request) -> Optional[ItemQuota]:
+    """
+    dependency ของ batch/NDJSON: ทุกรายการจ่าย 1 token จาก bucket ของ client
+    (รายการแรกจ่ายไปแล้วที่ rate_limit, bucket หมดกลาง upload = error ของรายการที่เหลือ)
+    """
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return None
+    settings = get_settings()
+    key, ip_key = client_keys(request.headers.get(settings.client_id_header), request.client.host if request.client else None)
+    return ItemQuota(limiter, key, ip_key)
+
+async def enter_admission() -> Optional[AdmissionController]:
+    """เข้าคิวงานวิเคราะห์ 1 งาน (รอในคิวได้) - คิวเต็ม/รอนานเกินได้ 503 + Retry-After; ได้ที่แล้วต้อง leave() เสมอ"""
+    admission = get_admission()
+    if admission is None:
+        return None
     try:
-        # ใช้ Mock data แทน Logic จริงก่อน
-        import random
-        result = get_dummy_analysis(random.randint(0, 1))
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        await admission.enter()
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": str(e.retry_after)})
+    return admission
+
+@asynccontextmanager
+async def analysis_slot() -> AsyncIterator[None]:
+    """ที่รันงานวิเคราะห์ 1 งานตลอด block (ดู enter_admission)"""
+    admission = await enter_admission()
+    if admission is None:
+        yield
+        return
+    try:
+        yield
+    finally:
+        admission.leave()
+
+ADMISSION_RESPONSES = {
+    429: {"description": "client นี้ยิงถี่เกิน RATE_LIMIT_* (ดู Retry-After)"},
+    503: {"description": "งานวิเคราะห์เต็มคิว (ดู Retry-After)"}
+}
+
+# ==================== MAIN ENDPOINTS ====================
+
+ANALYSIS_ID_HEADER = "X-Analysis-Id"
+RECOMPUTED_TOPICS_HEADER = "X-Recomputed-Topics"
+
+@router.post(
+    "/analyze",
+    response_model=AnalysisResponse,
+    dependencies=[Depends(rate_limit)],
+    responses={304: {"description": "ผลเหมือน ETag ที่ส่งมาใน If-None-Match"}, **ADMISSION_RESPONSES}
+)
+async def analyze_product_endpoint(product: ProductData, request: Request):
+    """
+    วิเคราะห์ข้อมูลสินค้าและให้คะแนน + คำแนะนำ
+    ผลลัพธ์ที่เคยวิเคราะห์แล้วจะถูกส่งกลับจาก cache
+    header X-Analysis-Id ใช้อ้างถึงผลนี้ใน /analyze/incremental
+    ส่ง ETag ของผลก่อนหน้าใน If-None-Match ถ้าผลไม่เปลี่ยนจะได้ 304 ไม่มี body
+    """
+    async with analysis_slot():
+        try:
+            analysis_id, result = await analyze_with_id(product)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    headers = {ANALYSIS_ID_HEADER: analysis_id}
+    response = ModelResponse(result, headers=headers)
+    etag = keyed_etag(analysis_id, response.body)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, headers=headers)
+    response.headers["ETag"] = etag
+    return response
+
+@router.post("/analyze/incremental", response_model=AnalysisResponse, dependencies=[Depends(rate_limit)], responses=ADMISSION_RESPONSES)
+async def analyze_incremental_endpoint(request: IncrementalAnalysisRequest):
+    """
+    วิเคราะห์ใหม่เฉพาะหัวข้อที่ได้รับผลจาก field ที่เปลี่ยน (เช่นแก้ price -> คำนวณแค่หัวข้อราคา)
+    - previous_id: X-Analysis-Id ของผลก่อนหน้า, changes: field ที่เปลี่ยนพร้อมค่าใหม่
+    - 404 ถ้า previous_id หมดอายุ/ไม่รู้จัก -> ส่ง listing เต็มไปที่ /analyze แทน
+    - header X-Recomputed-Topics บอกหัวข้อที่คำนวณใหม่
+    """
+    async with analysis_slot():
+        try:
+            outcome = await analyze_incremental(request.previous_id, request.changes)
+        except ValueError as e:  # รวม ValidationError ของค่าที่ไม่ถูกต้อง
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    if outcome is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired previous_id; resend the full listing to /api/analyze")
+    analysis_id, result, recomputed = outcome
+    return ModelResponse(result, headers={ANALYSIS_ID_HEADER: analysis_id, RECOMPUTED_TOPICS_HEADER: ",".join(recomputed)})
+
+@router.post("/analyze/batch", response_model=List[BatchItemResult], dependencies=[Depends(rate_limit)], responses={429: ADMISSION_RESPONSES[429]})
+async def analyze_batch_endpoint(
+    items: List[Dict[str, Any]] = Body(...),
+    concurrency: Optional[int] = Query(None, ge=1),
+    stream: bool = False,
+    quota: Optional[ItemQuota] = Depends(item_quota),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    วิเคราะห์สินค้าหลายรายการในครั้งเดียว (body เป็น list ของ ProductData)
+    - error ของแต่ละรายการถูกรายงานแยกใน field error
+    - stream=true จะส่งผลลัพธ์เป็น NDJSON ทีละบรรทัดตามลำดับที่วิเคราะห์เสร็จ
+    - concurrency ไม่ระบุ = BATCH_DEFAULT_CONCURRENCY
+    - แต่ละรายการเข้าคิว admission เหมือน /analyze (คิวเต็ม = error ของรายการนั้น)
+    - แต่ละรายการนับ rate limit 1 ครั้ง (bucket ของ client หมด = error ของรายการนั้น)
+    """
+    if len(items) > settings.batch_max_size:
+        raise HTTPException(status_code=413, detail=f"Batch too large: max {settings.batch_max_size} items")
+    if concurrency is not None and concurrency > settings.batch_max_concurrency:
+        raise HTTPException(status_code=422, detail=f"concurrency must be <= {settings.batch_max_concurrency}")
+
+    if stream:
+        async def ndjson_lines():
+            async for item in iter_batch(items, concurrency, get_admission(), quota):
+                yield model_json(item) + b"\n"
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    return ModelResponse(await analyze_batch(items, concurrency, get_admission(), quota))
+
+@router.post("/analyze/ndjson", dependencies=[Depends(rate_limit)], responses={429: ADMISSION_RESPONSES[429]})
+async def analyze_ndjson_endpoint(
+    request: Request,
+    window: Optional[int] = Query(None, ge=1),
+    quota: Optional[ItemQuota] = Depends(item_quota),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    วิเคราะห์ catalog ขนาดใหญ่แบบ streaming
+    body เป็น NDJSON (1 บรรทัด = 1 ProductData) และตอบกลับเป็น NDJSON ของ AnalysisResponse
+    ตามลำดับบรรทัดเดิม โดยไม่โหลดทั้งไฟล์เข้า memory ปิดท้ายด้วย {"summary": ...} (จำนวน, error, เวลา, รายการ/วินาที)
+    แต่ละบรรทัดเข้าคิว admission เหมือน /analyze และนับ rate limit 1 ครั้ง (คิวเต็ม/bucket หมด = error ของบรรทัดนั้น)
+    """
+    if window is not None and window > settings.batch_max_concurrency:
+        raise HTTPException(status_code=422, detail=f"window must be <= {settings.batch_max_concurrency}")
+    stats = PipelineStats()
+
+    async def ndjson_lines():
+        async for line in analyze_ndjson(iter_lines(request.stream(), settings.pipeline_max_line_bytes), stats, window, get_admission(), quota):
+            yield line
+        logger.info("NDJSON analysis finished: %s", stats.summary())
+        yield summary_record(stats)
+
+    return RequestBodyStreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+def sse_event(event: str, data: str) -> str:
+    """server-sent event 1 รายการ (data เป็น JSON บรรทัดเดียว)"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+@router.post("/analyze/stream", dependencies=[Depends(rate_limit)], responses=ADMISSION_RESPONSES)
+async def analyze_stream_endpoint(product: ProductData):
+    """
+    วิเคราะห์แบบ server-sent events ให้ sidebar แสดงแต่ละหัวข้อได้ทันทีที่วิเคราะห์เสร็จ
+    (เข้าคิว admission ก่อนส่ง header - คิวเต็มได้ 503 และถือที่ไว้จนส่ง event สุดท้าย)
+    - event "topic": TopicAnalysis 1 หัวข้อ (ตามลำดับที่เสร็จ; ชื่อซ้ำ = แทนที่หัวข้อเดิม)
+    - event "done": analysis_id, overall_score และ recommendations หลังครบทุกหัวข้อ
+    - event "error": detail ถ้าวิเคราะห์ไม่สำเร็จ
+    """
+    async def events():
+        try:
+            async for kind, payload in stream_analysis(product):
+                if kind == "topic":
+                    yield sse_event("topic", model_json(payload).decode("utf-8"))
+                else:
+                    analysis_id, result = payload
+                    done = {
+                        "analysis_id": analysis_id,
+                        "overall_score": result.overall_score,
+                        "recommendations": result.recommendations
+                    }
+                    yield sse_event("done", json.dumps(done, ensure_ascii=False))
+        except Exception as e:
+            logger.exception("Streaming analysis failed")
+            yield sse_event("error", json.dumps({"detail": str(e)}, ensure_ascii=False))
+
+    admission = await enter_admission()
+    return AdmittedStreamingResponse(
+        events(),
+        admission,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/suggest")
 async def get_suggestion(request: SuggestionRequest):
     """
     ขอคำแนะนำสำหรับหัวข้อเฉพาะ
     
-    ⚠️ ตอนนี้ Return Mock แทน
-    TODO: เชื่อม AI ทีหลัง
+    กลุ่มคำแนะนำของ extension (basic_info, visibility, package, album) ยังเป็น Mock
+    หัวข้ออื่น (เช่น "ชื่องาน") ใช้ generate_suggestion (rule + LLM ถ้าตั้ง LLM_BACKEND)
     """
     try:
-        # Return mock suggestion based on topic
         mock_suggestions = {
             "basic_info": DUMMY_BASIC_INFO_SUGGESTIONS,
             "visibility": DUMMY_VISIBILITY_SUGGESTIONS,
@@ -59,8 +287,14 @@ async def get_suggestion(request: SuggestionRequest):
         }
         
         topic_key = request.topic.lower().replace(" ", "_")
-        suggestion = mock_suggestions.get(topic_key, "ไม่พบคำแนะนำสำหรับหัวข้อนี้")
-        
+        if topic_key in mock_suggestions:
+            return {"suggestion": mock_suggestions[topic_key]}
+
+        suggestion = await generate_suggestion(
+            topic=request.topic,
+            current_value=request.current_value,
+            context=request.context
+        )
         return {"suggestion": suggestion}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -81,60 +315,132 @@ async def get_all_topics():
     ]
     return {"topics": topics}
 
-@router.post("/regenerate")
+@router.post("/regenerate", response_model=AnalysisResponse, dependencies=[Depends(rate_limit)], responses=ADMISSION_RESPONSES)
 async def regenerate_analysis(product: ProductData):
     """
-    วิเคราะห์ใหม่ (เหมือน /analyze แต่อาจมี cache clearing)
-    
-    ⚠️ ตอนนี้ใช้ Mock Data
+    วิเคราะห์ใหม่ (เหมือน /analyze แต่ลบผลลัพธ์เดิมใน cache แล้วคำนวณใหม่)
     """
-    try:
-        # Return random mock analysis
-        import random
-        result = get_dummy_analysis(random.randint(0, 1))
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    async with analysis_slot():
+        try:
+            analysis_id, result = await analyze_with_id(product, force_refresh=True)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    return ModelResponse(result, headers={ANALYSIS_ID_HEADER: analysis_id})
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    สถิติของ analysis cache (hit/miss/eviction) สำหรับปรับขนาด cache
+    singleflight: request ที่ได้ผลร่วมกับการวิเคราะห์ที่กำลังทำอยู่ (dedup_ratio = shared / ทั้งหมดที่ไม่อยู่ใน cache)
+    """
+    return {**analysis_cache.stats(), "singleflight": analysis_flights.stats()}
+
+@router.get("/storage/stats")
+async def get_storage_stats():
+    """
+    สถานะคิวเขียนผลการวิเคราะห์ลง MongoDB (enabled=false ถ้าไม่ได้ตั้ง MONGODB_URL)
+    """
+    store = get_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
+
+@router.get("/admission/stats")
+async def get_admission_stats():
+    """
+    สถานะ rate limit ต่อ client และคิวงานวิเคราะห์ (enabled=false ถ้าปิดไว้)
+    """
+    limiter = get_rate_limiter()
+    admission = get_admission()
+    return {
+        "rate_limit": {"enabled": True, **limiter.stats()} if limiter is not None else {"enabled": False},
+        "admission": {"enabled": True, **admission.stats()} if admission is not None else {"enabled": False}
+    }
+
+@router.get("/llm/stats")
+async def get_llm_stats():
+    """
+    สถานะ LLM client: จำนวนการเรียกจริง, request ที่ถูกรวม, cache (enabled=false ถ้า LLM_BACKEND=none)
+    """
+    client = get_llm_client()
+    if client is None:
+        return {"enabled": False}
+    return {"enabled": True, **client.stats(), "batching": get_batcher().stats()}
+
+# ==================== ADMIN ====================
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+async def require_admin(request: Request) -> None:
+    """dependency ของ /admin/*: ต้องส่งค่า ADMIN_TOKEN ใน X-Admin-Token (ไม่ตั้ง ADMIN_TOKEN = 404 ทั้งกลุ่ม)"""
+    token = get_settings().admin_token
+    if not token:
+        raise HTTPException(status_code=404, detail="Admin API is disabled")
+    if not hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, "").encode("utf-8"), token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/admin/listings", dependencies=[Depends(require_admin)], tags=["admin"])
+async def ingest_listings_endpoint(items: List[Any] = Body(...), settings: Settings = Depends(get_settings)):
+    """
+    เพิ่ม listing ที่ตรวจแล้ว (category, subcategory, price, title, description, tags) เข้า corpus
+    และ index ราคาทันที - ทางเดียวที่ index เปลี่ยนระหว่างรัน (ไม่เรียนจาก request วิเคราะห์)
+    รายการที่ไม่ผ่านการตรวจถูกรายงานแยกใน errors
+    """
+    if len(items) > settings.batch_max_size:
+        raise HTTPException(status_code=413, detail=f"Too many listings: max {settings.batch_max_size} items")
+    return ingest_listings(items)
 
 
 # ==================== MOCK/DUMMY ENDPOINTS ====================
+# payload ของ mock ไม่เปลี่ยนตลอดอายุ process - serialize เป็น bytes ครั้งเดียวตอน import
+# แล้วตอบด้วย Response ดิบ + ETag (If-None-Match ตรง = 304) ไม่ validate/serialize ซ้ำทุก request
+
+_MOCK_PRODUCTS = PrebuiltJSON({"products": get_all_dummy_products()})
+_MOCK_ANALYSES = PrebuiltJSON({"analyses": get_all_dummy_analyses()})
+_MOCK_PRODUCT_ITEMS = tuple(PrebuiltJSON(product) for product in get_all_dummy_products())
+_MOCK_ANALYSIS_ITEMS = tuple(PrebuiltJSON(analysis) for analysis in get_all_dummy_analyses())
+
+def _mock_item(items: tuple, index: int) -> PrebuiltJSON:
+    """index นอกช่วงได้ตัวแรก (เหมือน get_dummy_product / get_dummy_analysis)"""
+    return items[index] if 0 <= index < len(items) else items[0]
+
+_MOCK_SUGGESTIONS = {
+    "basic-info": PrebuiltJSON({"section": "Basic Info", "emoji": "📋", "suggestions": DUMMY_BASIC_INFO_SUGGESTIONS}),
+    "visibility": PrebuiltJSON({"section": "Visibility", "emoji": "👁️", "suggestions": DUMMY_VISIBILITY_SUGGESTIONS}),
+    "package": PrebuiltJSON({"section": "Package", "emoji": "📦", "suggestions": DUMMY_PACKAGE_SUGGESTIONS}),
+    "album": PrebuiltJSON({"section": "Album / Portfolio", "emoji": "📚", "suggestions": DUMMY_ALBUM_SUGGESTIONS})
+}
 
 @router.get("/mock/products", tags=["mock"])
-async def get_mock_products():
+async def get_mock_products(request: Request):
     """
     ดึงรายการ dummy products ทั้งหมดสำหรับการทดสอบ
     """
-    return {"products": get_all_dummy_products()}
+    return _MOCK_PRODUCTS.response(request)
 
 
 @router.get("/mock/products/{index}", response_model=ProductData, tags=["mock"])
-async def get_mock_product(index: int = 0):
+async def get_mock_product(request: Request, index: int = 0):
     """
     ดึง dummy product ตามลำดับ (index: 0, 1, 2, ...)
     """
-    try:
-        return get_dummy_product(index)
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Product not found: {str(e)}")
+    return _mock_item(_MOCK_PRODUCT_ITEMS, index).response(request)
 
 
 @router.get("/mock/analyses", tags=["mock"])
-async def get_mock_analyses():
+async def get_mock_analyses(request: Request):
     """
     ดึงรายการ dummy analyses ทั้งหมดสำหรับการทดสอบ
     """
-    return {"analyses": get_all_dummy_analyses()}
+    return _MOCK_ANALYSES.response(request)
 
 
 @router.get("/mock/analyses/{index}", response_model=AnalysisResponse, tags=["mock"])
-async def get_mock_analysis(index: int = 0):
+async def get_mock_analysis(request: Request, index: int = 0):
     """
     ดึง dummy analysis result ตามลำดับ (index: 0, 1, ...)
     """
-    try:
-        return get_dummy_analysis(index)
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Analysis not found: {str(e)}")
+    return _mock_item(_MOCK_ANALYSIS_ITEMS, index).response(request)
 
 
 @router.post("/mock/analyze", response_model=AnalysisResponse, tags=["mock"])
@@ -143,34 +449,30 @@ async def mock_analyze_product_endpoint(product: ProductData):
     POST dummy product และดึง mock analysis result แบบสุ่ม
     ใช้สำหรับทดสอบ API integration
     """
-    import random
-    try:
-        # ส่งกลับ analysis result สุ่ม (0 หรือ 1)
-        return get_dummy_analysis(random.randint(0, 1))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # ส่งกลับ analysis result สุ่ม (0 หรือ 1)
+    return _mock_item(_MOCK_ANALYSIS_ITEMS, random.randint(0, 1)).response()
 
 
 @router.get("/mock/sample-product", response_model=ProductData, tags=["mock"])
-async def get_sample_product():
+async def get_sample_product(request: Request):
     """
     ดึง sample product ตัวอย่างสำหรับการทดสอบ (โปรดักชันแรก)
     """
-    return get_dummy_product(0)
+    return _MOCK_PRODUCT_ITEMS[0].response(request)
 
 
 @router.get("/mock/sample-analysis", response_model=AnalysisResponse, tags=["mock"])
-async def get_sample_analysis():
+async def get_sample_analysis(request: Request):
     """
     ดึง sample analysis ตัวอย่างสำหรับการทดสอบ (ผลลัพธ์แรก)
     """
-    return get_dummy_analysis(0)
+    return _MOCK_ANALYSIS_ITEMS[0].response(request)
 
 
 # ==================== 4 SUGGESTION ENDPOINTS (Based on Architecture) ====================
 
 @router.get("/mock/suggest-basic-info", tags=["mock"])
-async def get_basic_info_suggestions():
+async def get_basic_info_suggestions(request: Request):
     """
     1. Suggest Basic Info
     - ชื่องาน (Title)
@@ -178,15 +480,11 @@ async def get_basic_info_suggestions():
     - ราคาเริ่มต้น (Price)
     - ภาพปกงาน (Cover Image)
     """
-    return {
-        "section": "Basic Info",
-        "emoji": "📋",
-        "suggestions": DUMMY_BASIC_INFO_SUGGESTIONS
-    }
+    return _MOCK_SUGGESTIONS["basic-info"].response(request)
 
 
 @router.get("/mock/suggest-visibility", tags=["mock"])
-async def get_visibility_suggestions():
+async def get_visibility_suggestions(request: Request):
     """
     2. Suggest Visibility
     - การมองเห็นของการ์ดงาน
@@ -194,15 +492,11 @@ async def get_visibility_suggestions():
     - การใช้คีย์เวิร์ดในชื่องานและคำอธิบาย
     - การใช้แท็กที่เหมาะสม
     """
-    return {
-        "section": "Visibility",
-        "emoji": "👁️",
-        "suggestions": DUMMY_VISIBILITY_SUGGESTIONS
-    }
+    return _MOCK_SUGGESTIONS["visibility"].response(request)
 
 
 @router.get("/mock/suggest-package", tags=["mock"])
-async def get_package_suggestions():
+async def get_package_suggestions(request: Request):
     """
     3. Suggest Package
     - ข้อมูลแพ็กเกจ (Packages)
@@ -210,15 +504,11 @@ async def get_package_suggestions():
     - สิ่งที่รวมอยู่ในแต่ละแพ็กเกจ
     - คำอธิบาย expectation
     """
-    return {
-        "section": "Package",
-        "emoji": "📦",
-        "suggestions": DUMMY_PACKAGE_SUGGESTIONS
-    }
+    return _MOCK_SUGGESTIONS["package"].response(request)
 
 
 @router.get("/mock/suggest-album", tags=["mock"])
-async def get_album_suggestions():
+async def get_album_suggestions(request: Request):
     """
     4. Suggest Album
     - อัลบั้มผลงาน (Portfolio)
@@ -226,34 +516,4 @@ async def get_album_suggestions():
     - การแสดงความหลากหลาย
     - เรียงลำดับผลงาน
     """
-    return {
-        "section": "Album / Portfolio",
-        "emoji": "📚",
-        "suggestions": DUMMY_ALBUM_SUGGESTIONS
-    }
-
-
-# ==================== FUTURE: REAL ENDPOINTS (Comment ไว้ก่อน) ====================
-"""
-เมื่อพร้อม Database + AI แล้ว ให้ Uncomment โค้ดด้านล่างนี้:
-
-@router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_product_endpoint(product: ProductData):
-    try:
-        result = await analyze_product(product)  # ← ใช้ Logic จริง
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/suggest")
-async def get_suggestion(request: SuggestionRequest):
-    try:
-        suggestion = await generate_suggestion(
-            topic=request.topic,
-            current_value=request.current_value,
-            context=request.context
-        )
-        return {"suggestion": suggestion}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-"""
\ No newline at end of file
+    return _MOCK_SUGGESTIONS["album"].response(request)
@@ -0,0 +1,84 @@
+"""
+ตอบ JSON ที่ไม่เปลี่ยนตลอดอายุ process แบบ serialize ครั้งเดียว + ETag/If-None-Match
+
+PrebuiltJSON เก็บ body (bytes) และ ETag ที่คำนวณไว้ล่วงหน้า แต่ละ request แค่เทียบ header
+แล้วส่ง bytes เดิม (หรือ 304 ถ้า client มีสำเนาล่าสุดแล้ว) - ไม่ผ่าน pydantic/jsonable_encoder อีก
+keyed_etag / etag_matches / not_modified ใช้กับผลที่คำนวณต่อ request ได้ด้วย (เช่น /api/analyze)
+body ที่ CompressionMiddleware บีบแล้วได้ ETag ต่อท้ายด้วย encoding (encoded_etag) - etag_matches รับทั้งสองแบบ
+"""
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, Optional
+import hashlib
+
+def etag_for(body: bytes) -> str:
+    """strong ETag จากเนื้อหา (body เดียวกัน = ETag เดียวกันเสมอ แม้ restart)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def keyed_etag(key: str, body: bytes) -> str:
+    """
+    strong ETag ของผลที่อ้างด้วย key (เช่น hash ของ input) + digest สั้นของ body
+    input เดียวกันอาจได้ผลต่างกันเมื่อ rule/index เปลี่ยน จึงต้องผูกกับ body ด้วย
+    """
+    return f'"{key[:16]}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+CONTENT_CODINGS = ("gzip", "br")
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag ของ body เดียวกันหลังบีบด้วย encoding (strong ETag ต้องต่างกันตาม content-coding)
+    '"abc"' -> '"abc-gzip"', 'W/"abc"' -> 'W/"abc-gzip"'
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match ตรงกับ etag ไหม (รองรับหลายค่าคั่นด้วย comma, "*" และ weak tag W/"...")
+    ตาม RFC 9110 การเทียบของ If-None-Match เป็นแบบ weak
+    ค่าที่ต่อท้ายด้วย encoding (จาก response ที่ถูกบีบ) นับว่าตรงด้วย - เป็นเนื้อหาเดียวกัน
+    """
+    if not if_none_match:
+        return False
+    accepted = {etag}
+    accepted.update(encoded_etag(etag, encoding) for encoding in CONTENT_CODINGS)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in accepted:
+            return True
+    return False
+
+def not_modified(etag: str, cache_control: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    headers = {**(headers or {}), "ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+class PrebuiltJSON:
+    """
+    response JSON ที่ serialize ไว้แล้ว - bytes เหมือนที่ FastAPI สร้างจาก content เดิมทุกตัวอักษร
+    (jsonable_encoder + JSONResponse.render)
+    """
+    __slots__ = ("body", "etag", "cache_control")
+
+    def __init__(self, content: Any, cache_control: str = "no-cache"):
+        self.body = JSONResponse(jsonable_encoder(content)).body
+        self.etag = etag_for(self.body)
+        # no-cache = เก็บไว้ได้แต่ต้องถามก่อนใช้ (ได้ 304 ถ้ายังเหมือนเดิม)
+        self.cache_control = cache_control
+
+    def response(self, request: Optional[Request] = None) -> Response:
+        """body เดิม หรือ 304 ถ้า If-None-Match ของ request ตรงกับ ETag (request=None = ไม่เช็ค เช่น POST)"""
+        if request is not None and etag_matches(request.headers.get("if-none-match"), self.etag):
+            return not_modified(self.etag, self.cache_control)
+        return Response(
+            self.body,
+            media_type="application/json",
+            headers={"ETag": self.etag, "Cache-Control": self.cache_control}
+        )
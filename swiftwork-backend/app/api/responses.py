@@ -0,0 +1,76 @@
+"""
+Response แบบเร็วสำหรับ model ที่ service สร้างเอง (AnalysisResponse, BatchItemResult)
+
+endpoint ที่คืน model ตรง ๆ ผ่าน response_model ทำให้ FastAPI validate model ซ้ำทั้งก้อน
+แล้ว jsonable_encoder + json.dumps อีกรอบ ทั้งที่ model ถูก validate ตอนสร้างแล้ว
+ModelResponse ข้ามขั้นนั้นแล้ว serialize ด้วย serializer ของ pydantic-core (Rust) ครั้งเดียว
+endpoint เลือกใช้เอง (opt-in) เฉพาะ model ที่เชื่อถือได้ - ยังประกาศ response_model ไว้สำหรับ OpenAPI
+หัวข้อที่ analyzer สร้างไว้ล่วงหน้า (prebuilt_topics) ไม่ถูก serialize ซ้ำ - ต่อ bytes ที่เก็บไว้เข้าไปตรง ๆ
+"""
+from app.api.schemas import AnalysisResponse, BatchItemResult, TopicAnalysis
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+class JSONFragments:
+    """
+    JSON ของ model ที่แชร์กันหลาย response (เช่น TopicAnalysis ที่ analyzer สร้างไว้ล่วงหน้า) serialize ครั้งเดียว
+    lookup ด้วย id() + ตรวจว่าเป็น object เดิม (ถือ reference ไว้ id จึงไม่ถูกใช้ซ้ำระหว่างที่ยังอยู่ใน registry)
+    """
+
+    def __init__(self):
+        self._fragments: Dict[int, Tuple[BaseModel, bytes]] = {}
+
+    def add(self, model: BaseModel) -> None:
+        self._fragments[id(model)] = (model, _to_json(model))
+
+    def get(self, model: BaseModel) -> Optional[bytes]:
+        entry = self._fragments.get(id(model))
+        return entry[1] if entry is not None and entry[0] is model else None
+
+    def clear(self) -> None:
+        self._fragments.clear()
+
+# TopicAnalysis ที่สร้างไว้ล่วงหน้าของ rule ชุดปัจจุบัน (analyzer ล้างตอน reload rule)
+prebuilt_topics = JSONFragments()
+
+class ModelResponse(Response):
+    """JSON ของ model (หรือ list ของ model) - ได้ bytes เหมือน response_model ทุกตัวอักษร"""
+    media_type = "application/json"
+
+    def render(self, content: Union[BaseModel, Sequence[BaseModel]]) -> bytes:
+        if isinstance(content, BaseModel):
+            return model_json(content)
+        return b"[" + b",".join(model_json(item) for item in content) + b"]"
+
+def model_json(model: BaseModel) -> bytes:
+    """
+    JSON ของ model แบบเดียวกับ model_dump_json() (bytes)
+    TopicAnalysis ที่อยู่ใน prebuilt_topics ใช้ bytes ที่ serialize ไว้แล้ว ส่วนที่เหลือ serialize ตามปกติ
+    """
+    if isinstance(model, AnalysisResponse):
+        return _analysis_json(model)
+    if isinstance(model, BatchItemResult) and model.result is not None:
+        return (
+            b'{"index":' + to_json(model.index) + b',"result":' + _analysis_json(model.result)
+            + b',"error":' + to_json(model.error) + b"}"
+        )
+    if isinstance(model, TopicAnalysis):
+        return prebuilt_topics.get(model) or _to_json(model)
+    return _to_json(model)
+
+def _analysis_json(result: AnalysisResponse) -> bytes:
+    fragments = [prebuilt_topics.get(topic) for topic in result.topics]
+    if not any(fragments):
+        return _to_json(result)
+    # ต่อ bytes ตามลำดับ field ของ AnalysisResponse (ทดสอบว่าตรงกับ model_dump_json ใน tests/test_responses.py)
+    topics = b",".join(fragment or _to_json(topic) for fragment, topic in zip(fragments, result.topics))
+    return (
+        b'{"overall_score":' + to_json(result.overall_score) + b',"topics":[' + topics
+        + b'],"recommendations":' + to_json(result.recommendations) + b"}"
+    )
+
+def _to_json(model: BaseModel) -> bytes:
+    # เหมือน model_dump_json() แต่ได้ bytes จาก Rust โดยตรง ไม่ต้อง decode เป็น str แล้ว encode กลับ
+    return model.__pydantic_serializer__.to_json(model)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 
 class ProductData(BaseModel):
@@ -20,7 +20,9 @@ class TopicScore(BaseModel):
     status: str  # 'pass', 'suggest', 'fail'
     
 class TopicDetails(BaseModel):
-    """รายละเอียดของหัวข้อ"""
+    """รายละเอียดของหัวข้อ (frozen: analyzer แชร์ object เดียวกันข้าม request - แก้ด้วย model_copy)"""
+    model_config = ConfigDict(frozen=True)
+
     current: Optional[Any] = None
     ai_analysis: Optional[str] = None
     suggestion: Optional[str] = None
@@ -29,7 +31,9 @@ class TopicDetails(BaseModel):
     pass_tips: Optional[List[str]] = None
 
 class TopicAnalysis(BaseModel):
-    """การวิเคราะห์แต่ละหัวข้อ"""
+    """การวิเคราะห์แต่ละหัวข้อ (frozen เหมือน TopicDetails)"""
+    model_config = ConfigDict(frozen=True)
+
     name: str
     emoji: str
     score: int
@@ -42,8 +46,19 @@ class AnalysisResponse(BaseModel):
     topics: List[TopicAnalysis]
     recommendations: List[str]
 
+class IncrementalAnalysisRequest(BaseModel):
+    """Request สำหรับวิเคราะห์ใหม่เฉพาะ field ที่เปลี่ยน"""
+    previous_id: str  # X-Analysis-Id ของผลก่อนหน้า
+    changes: Dict[str, Any]  # field ของ ProductData ที่เปลี่ยน -> ค่าใหม่
+
 class SuggestionRequest(BaseModel):
     """Request สำหรับขอคำแนะนำเฉพาะหัวข้อ"""
     topic: str
     current_value: str
-    context: Optional[Dict] = None
\ No newline at end of file
+    context: Optional[Dict] = None
+
+class BatchItemResult(BaseModel):
+    """ผลการวิเคราะห์ของแต่ละรายการใน batch"""
+    index: int
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,50 @@
+"""
+CLI สำหรับวิเคราะห์ catalog แบบ offline (NDJSON -> NDJSON)
+
+ตัวอย่าง:
+    python -m app.cli catalog.ndjson -o results.ndjson
+    cat catalog.ndjson | python -m app.cli - > results.ndjson
+"""
+from app.config import get_settings
+from app.services.pipeline import (
+    analyze_ndjson,
+    iter_file_chunks,
+    iter_lines,
+    PipelineStats
+)
+from typing import Optional
+import argparse
+import asyncio
+import json
+import sys
+
+async def run(input_file, output_file, window: Optional[int]) -> PipelineStats:
+    stats = PipelineStats()
+    lines = iter_lines(iter_file_chunks(input_file), get_settings().pipeline_max_line_bytes)
+    async for line in analyze_ndjson(lines, stats, window):
+        output_file.write(line)
+    output_file.flush()
+    return stats
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="วิเคราะห์ไฟล์ NDJSON ของ ProductData แล้วเขียนผลเป็น NDJSON")
+    parser.add_argument("input", help="ไฟล์ NDJSON ขาเข้า (ใช้ - สำหรับ stdin)")
+    parser.add_argument("-o", "--output", default="-", help="ไฟล์ NDJSON ขาออก (ค่าเริ่มต้น: stdout)")
+    parser.add_argument("--window", type=int, default=None, help="จำนวนรายการที่วิเคราะห์พร้อมกัน (ค่าเริ่มต้น: PIPELINE_WINDOW)")
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output_file = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        stats = asyncio.run(run(input_file, output_file, args.window))
+    finally:
+        if input_file is not sys.stdin.buffer:
+            input_file.close()
+        if output_file is not sys.stdout.buffer:
+            output_file.close()
+
+    print(json.dumps(stats.summary()), file=sys.stderr)
+    return 1 if stats.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
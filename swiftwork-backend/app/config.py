@@ -0,0 +1,215 @@
+"""
+Settings ของทั้ง service โหลดครั้งเดียวจาก environment (+ ไฟล์ .env ผ่าน python-dotenv)
+ชื่อตัวแปร = ชื่อ field ตัวพิมพ์ใหญ่ เช่น cache_max_entries -> CACHE_MAX_ENTRIES
+
+ค่าทั้งหมดถูกตรวจตอนโหลด (startup) ถ้าผิดจะ raise SettingsError พร้อมรายชื่อตัวแปรที่ผิดทุกตัว
+endpoint ใช้ผ่าน Depends(get_settings), service ใช้ get_settings() ตรง ๆ
+"""
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import os
+import typing
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+def _min(value):
+    return {"min": value}
+
+@dataclass(frozen=True)
+class Settings:
+    # server
+    host: str = "0.0.0.0"
+    port: int = field(default=8000, metadata=_min(1))
+    cors_origins: Tuple[str, ...] = ("*",)
+
+    # feature toggles
+    mock_analysis: bool = False  # True = /analyze ตอบด้วย dummy analysis (ใช้พัฒนา extension)
+
+    # analysis cache
+    cache_max_entries: int = field(default=1024, metadata=_min(0))
+    cache_ttl_seconds: float = field(default=600.0, metadata=_min(0))
+    tokenizer_cache_entries: int = field(default=4096, metadata=_min(0))
+
+    # concurrency / batch
+    batch_default_concurrency: int = field(default=8, metadata=_min(1))
+    batch_max_concurrency: int = field(default=32, metadata=_min(1))
+    batch_max_size: int = field(default=500, metadata=_min(1))
+    pipeline_window: int = field(default=16, metadata=_min(1))
+    pipeline_max_line_bytes: int = field(default=1048576, metadata=_min(1))  # 1 บรรทัด NDJSON (ยาวกว่านี้ = error ของบรรทัดนั้น)
+
+    # rate limit ต่อ client และจำกัดงานวิเคราะห์พร้อมกัน (app.services.admission)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # memory | sqlite (ไฟล์เดียวใช้ร่วมกันทุก worker บนเครื่อง)
+    rate_limit_per_second: float = field(default=2.0, metadata=_min(0.001))
+    rate_limit_burst: int = field(default=20, metadata=_min(1))
+    rate_limit_ip_per_second: float = field(default=20.0, metadata=_min(0.001))  # รวมทุก client หลัง IP เดียวกัน (NAT/proxy)
+    rate_limit_ip_burst: int = field(default=200, metadata=_min(1))
+    rate_limit_max_clients: int = field(default=100000, metadata=_min(1))  # จำนวน bucket สูงสุดของ backend memory
+    rate_limit_sqlite_path: Path = DATA_DIR / "rate_limits.sqlite3"
+    client_id_header: str = "X-Client-Id"  # id ของ install ที่ extension ส่งมา (นับคู่กับ IP, ไม่มี = ทั้ง IP)
+    admission_enabled: bool = True
+    admission_max_concurrent: int = field(default=64, metadata=_min(1))
+    admission_max_queue: int = field(default=256, metadata=_min(0))
+    admission_queue_timeout_seconds: float = field(default=5.0, metadata=_min(0.001))
+
+    # topic scheduler (analyze_product)
+    topic_timeout_seconds: float = field(default=2.0, metadata=_min(0.001))
+    topic_pool_workers: int = field(default=4, metadata=_min(1))
+    topic_pool_topics: Tuple[str, ...] = ()  # หัวข้อ inline ที่ให้ย้ายไปรันบน thread pool เช่น category,visibility
+
+    # rules และ index ใน app/data
+    analysis_rules_path: Path = DATA_DIR / "analysis_rules.json"
+    corpus_path: Path = DATA_DIR / "listings_corpus.jsonl"  # corpus ที่เชื่อถือได้สำหรับสร้าง index ราคา/หมวดหมู่/คำ
+    thai_words_path: Path = DATA_DIR / "thai_words.txt"
+    thai_stopwords_path: Path = DATA_DIR / "thai_stopwords.txt"
+    rules_reload_interval: float = field(default=2.0, metadata=_min(0))
+    price_index_path: Path = DATA_DIR / "price_index.json"
+    price_index_max_per_group: int = field(default=10000, metadata=_min(2))  # ราคาต่อหมวดหมู่ (เกิน = สุ่มแบบเท่า ๆ กันตาม quantile)
+    category_index_path: Path = DATA_DIR / "category_index.json"
+    keyword_index_path: Path = DATA_DIR / "keyword_index.json"
+
+    # ตรวจขนาดภาพปกและภาพในอัลบั้มจาก URL (อ่านแค่ header ของไฟล์)
+    image_inspection_enabled: bool = True
+    image_fetch_timeout_seconds: float = field(default=1.5, metadata=_min(0.001))
+    image_pool_size: int = field(default=10, metadata=_min(1))
+    image_max_header_bytes: int = field(default=65536, metadata=_min(64))
+    image_cache_entries: int = field(default=4096, metadata=_min(0))
+    image_cache_ttl_seconds: float = field(default=86400.0, metadata=_min(0))
+    image_cache_path: Path = DATA_DIR / "image_cache.json"
+    image_allowed_hosts: Tuple[str, ...] = ()  # host ของ CDN ที่ยอมให้ดึง (รวม subdomain) ว่าง = ทุก host สาธารณะ
+    image_allow_private_hosts: bool = False  # True = ยอมดึง address ภายใน/loopback (ใช้ตอนพัฒนาเท่านั้น)
+    album_inspection_concurrency: int = field(default=8, metadata=_min(1))  # request พร้อมกันต่ออัลบั้ม
+    album_max_inspected: int = field(default=30, metadata=_min(0))  # ตรวจเฉพาะ N ภาพแรกของอัลบั้ม
+
+    # MongoDB (ไม่ตั้ง MONGODB_URL = ไม่บันทึกผล)
+    mongodb_url: Optional[str] = None
+    mongodb_db: str = "swiftwork"
+    mongodb_max_pool_size: int = field(default=20, metadata=_min(1))
+    mongodb_min_pool_size: int = field(default=2, metadata=_min(0))
+    storage_queue_size: int = field(default=10000, metadata=_min(1))
+    storage_write_batch_size: int = field(default=200, metadata=_min(1))
+    storage_flush_interval: float = field(default=0.5, metadata=_min(0))
+
+    # บีบอัด response ตาม Accept-Encoding (app.api.compression)
+    compression_enabled: bool = True
+    compression_min_bytes: int = field(default=1024, metadata=_min(0))  # body เล็กกว่านี้ส่งตามเดิม
+    compression_gzip_level: int = field(default=5, metadata=_min(1))
+    compression_brotli_quality: int = field(default=4, metadata=_min(0))  # ใช้เมื่อติดตั้ง package brotli
+
+    # instrumentation (/metrics)
+    metrics_enabled: bool = True
+    metrics_trace_allocations: bool = False  # tracemalloc ทำให้ช้าลงหลายเท่า - เปิดเฉพาะตอนหาสาเหตุ
+
+    # LLM สำหรับคำแนะนำ/ai_fix (app.services.llm)
+    llm_backend: str = "none"  # none | fake | openai
+    llm_model: str = "gpt-3.5-turbo"
+    llm_max_tokens: int = field(default=300, metadata=_min(1))  # ต่อคำตอบ 1 ข้อ
+    llm_max_completion_tokens: int = field(default=4096, metadata=_min(1))  # เพดาน completion token ต่อ call ของ LLM_MODEL
+    llm_timeout_seconds: float = field(default=10.0, metadata=_min(0.001))
+    llm_cache_entries: int = field(default=2048, metadata=_min(0))
+    llm_cache_ttl_seconds: float = field(default=3600.0, metadata=_min(0))
+    llm_rate_per_second: float = field(default=2.0, metadata=_min(0.001))
+    llm_burst: int = field(default=10, metadata=_min(1))
+    llm_ai_fix: bool = False  # True = ให้ LLM เขียน ai_fix ของหัวข้อที่ยังไม่ผ่านแทนข้อความจาก rule
+    llm_base_url: Optional[str] = None  # endpoint ที่เข้ากันได้กับ OpenAI API (เช่น server ภายใน/ตัวจำลอง)
+    llm_batch_max_size: int = field(default=16, metadata=_min(1))  # 1 = ไม่รวม request
+    llm_batch_max_wait_ms: float = field(default=5.0, metadata=_min(0))
+    llm_fake_latency_seconds: float = field(default=0.05, metadata=_min(0))
+    openai_api_key: Optional[str] = None
+
+    # admin API (/api/admin/*) ไม่ตั้ง ADMIN_TOKEN = ปิด
+    admin_token: Optional[str] = None
+
+class SettingsError(ValueError):
+    pass
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+def _parse(raw: str, annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:  # Optional[X]
+        if raw == "":
+            return None
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    if annotation is bool:
+        lowered = raw.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+        raise ValueError(f"expected a boolean, got {raw!r}")
+    if annotation is int:
+        return int(raw)
+    if annotation is float:
+        return float(raw)
+    if annotation is Path:
+        return Path(raw)
+    if typing.get_origin(annotation) is tuple:
+        return tuple(item.strip() for item in raw.split(",") if item.strip())
+    return raw
+
+def _cross_field_errors(settings: Settings) -> List[str]:
+    errors = []
+    if settings.batch_default_concurrency > settings.batch_max_concurrency:
+        errors.append("BATCH_DEFAULT_CONCURRENCY must not exceed BATCH_MAX_CONCURRENCY")
+    if settings.mongodb_min_pool_size > settings.mongodb_max_pool_size:
+        errors.append("MONGODB_MIN_POOL_SIZE must not exceed MONGODB_MAX_POOL_SIZE")
+    if settings.image_inspection_enabled and settings.image_fetch_timeout_seconds >= settings.topic_timeout_seconds:
+        errors.append("IMAGE_FETCH_TIMEOUT_SECONDS must be below TOPIC_TIMEOUT_SECONDS")
+    if settings.rate_limit_ip_per_second < settings.rate_limit_per_second or settings.rate_limit_ip_burst < settings.rate_limit_burst:
+        errors.append("RATE_LIMIT_IP_PER_SECOND/RATE_LIMIT_IP_BURST must not be below RATE_LIMIT_PER_SECOND/RATE_LIMIT_BURST")
+    if settings.rate_limit_backend not in ("memory", "sqlite"):
+        errors.append(f"RATE_LIMIT_BACKEND: expected one of memory, sqlite, got {settings.rate_limit_backend!r}")
+    if settings.compression_gzip_level > 9:
+        errors.append(f"COMPRESSION_GZIP_LEVEL: must be <= 9, got {settings.compression_gzip_level}")
+    if settings.compression_brotli_quality > 11:
+        errors.append(f"COMPRESSION_BROTLI_QUALITY: must be <= 11, got {settings.compression_brotli_quality}")
+    if settings.llm_backend not in ("none", "fake", "openai"):
+        errors.append(f"LLM_BACKEND: expected one of none, fake, openai, got {settings.llm_backend!r}")
+    if settings.llm_max_tokens > settings.llm_max_completion_tokens:
+        errors.append("LLM_MAX_TOKENS must not exceed LLM_MAX_COMPLETION_TOKENS")
+    if settings.llm_backend == "openai" and not settings.openai_api_key:
+        errors.append("OPENAI_API_KEY is required when LLM_BACKEND=openai")
+    if not settings.analysis_rules_path.is_file():
+        errors.append(f"ANALYSIS_RULES_PATH: file not found: {settings.analysis_rules_path}")
+    return errors
+
+def load_settings(environ: Optional[Mapping[str, str]] = None) -> Settings:
+    """อ่าน Settings จาก environ (ค่าเริ่มต้น: os.environ หลังโหลด .env)"""
+    if environ is None:
+        from dotenv import load_dotenv
+        load_dotenv()  # ไม่ทับตัวแปรที่ตั้งไว้แล้วใน environment
+        environ = os.environ
+
+    hints = typing.get_type_hints(Settings)
+    values: Dict[str, Any] = {}
+    errors: List[str] = []
+    for f in fields(Settings):
+        name = f.name.upper()
+        if name not in environ:
+            continue
+        try:
+            value = _parse(environ[name], hints[f.name])
+        except ValueError as e:
+            errors.append(f"{name}: {e}")
+            continue
+        minimum = f.metadata.get("min")
+        if minimum is not None and value < minimum:
+            errors.append(f"{name}: must be >= {minimum}, got {value}")
+            continue
+        values[f.name] = value
+
+    if errors:
+        raise SettingsError("Invalid settings: " + "; ".join(errors))
+    settings = Settings(**values)
+    errors = _cross_field_errors(settings)
+    if errors:
+        raise SettingsError("Invalid settings: " + "; ".join(errors))
+    return settings
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings กลางของ process (โหลดครั้งแรกที่เรียก) - ใช้เป็น FastAPI dependency ได้"""
+    return load_settings()
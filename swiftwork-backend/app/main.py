@@ -1,22 +1,70 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import router
+from app.api.compression import CompressionMiddleware
+from app.config import get_settings
+from app.services.price_index import get_price_index, save_price_index
+from app.services.category_index import get_category_index
+from app.services.thai_tokenizer import get_tokenizer
+from app.services.keywords import get_keyword_index, save_keyword_index
+from app.services.storage import start_store, stop_store
+from app.services import metrics
+from app.services.scheduler import shutdown_executor
+from app.services.image_inspector import get_image_inspector, close_image_inspector
+from app.services.llm import close_llm_client
+from app.services.admission import close_rate_limiter
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # โหลด index ตอน startup และบันทึก index ที่เพิ่งสร้างจาก corpus ตอน shutdown
+    get_price_index()
+    get_category_index()
+    get_tokenizer()
+    get_keyword_index()
+    get_image_inspector()
+    metrics.start()
+    await start_store()
+    yield
+    await stop_store()
+    shutdown_executor()
+    await close_image_inspector()
+    await close_llm_client()
+    await close_rate_limiter()
+    save_price_index()
+    save_keyword_index()
+
+# โหลดและตรวจ settings ก่อนสร้าง app - ค่าผิดจะ error ตั้งแต่ startup
+settings = get_settings()
 
 app = FastAPI(
     title="SwiftWork AI Optimizer API",
     description="AI-powered API for optimizing Fastwork product listings",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - อนุญาตให้ Extension เรียก API ได้
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # ในโปรดักชันควรระบุ origin ที่ชัดเจน
+    allow_origins=list(settings.cors_origins),  # ในโปรดักชันควรระบุ origin ที่ชัดเจน (CORS_ORIGINS)
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Analysis-Id", "X-Recomputed-Topics", "ETag"],  # ให้ extension อ่าน id/ETag ไปใช้กับ request ถัดไป
 )
 
+# บีบอัด response ที่ยาวพอ (gzip/brotli ตาม Accept-Encoding)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_bytes,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        record_metrics=settings.metrics_enabled
+    )
+
 # Include routers
 app.include_router(router, prefix="/api", tags=["analysis"])
 
@@ -32,6 +80,13 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """histogram เวลา/allocation ของแต่ละหัวข้อและ request (Prometheus text format)"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host=settings.host, port=settings.port)
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+กัน service ล่มเมื่อ request พุ่ง (content script ยิง /api/analyze ได้ทุกครั้งที่พิมพ์)
+
+- rate limit ต่อ client: token bucket ตาม IP + id ของ install (header X-Client-Id, ไม่มี = ทั้ง IP)
+  batch/NDJSON จ่าย 1 token ต่อรายการจาก bucket เดียวกัน (ItemQuota) ไม่ใช่ 1 token ต่อ upload
+  อีก bucket รวมต่อ IP (RATE_LIMIT_IP_*) กันการสุ่ม id ใหม่ทุก request เพื่อได้ bucket เต็ม
+  backend เลือกด้วย RATE_LIMIT_BACKEND:
+  "memory" = dict ใน process (แต่ละ worker นับแยกกัน)
+  "sqlite" = ไฟล์ SQLite ที่ทุก worker บนเครื่องเดียวกันใช้ร่วมกัน (ใช้แทน store กลางอย่าง Redis)
+- admission control: งานวิเคราะห์รันพร้อมกันได้ไม่เกิน ADMISSION_MAX_CONCURRENT ทั้ง process
+  ที่เกินรอในคิวได้ไม่เกิน ADMISSION_MAX_QUEUE คิวเต็ม/รอนานเกิน = ปฏิเสธทันที (endpoint ตอบ 503)
+"""
+from app.config import Settings, get_settings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimitBackend:
+    """interface ของ backend: acquire คืน 0 ถ้าได้ token, ไม่งั้นคืนจำนวนวินาทีที่ต้องรอ"""
+    name = "base"
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+
+    async def acquire(self, key: str) -> float:
+        raise NotImplementedError
+
+    def _take(self, tokens: float, elapsed: float) -> Tuple[float, float]:
+        """(token ที่เหลือ, วินาทีที่ต้องรอ) หลังเติม token ตามเวลาที่ผ่านไปแล้วหยิบ 1 token"""
+        tokens = min(self.burst, tokens + elapsed * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        return tokens, (1 - tokens) / self.rate
+
+    async def aclose(self) -> None:
+        pass
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """bucket ใน process - เก็บ client ล่าสุดไม่เกิน max_keys ราย (client ที่หลุดไปเริ่มใหม่ด้วย bucket เต็ม)"""
+    name = "memory"
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        super().__init__(rate, burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens, wait = self._take(tokens, now - updated)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    bucket ในไฟล์ SQLite (WAL) ที่ทุก worker process บนเครื่องเดียวกันใช้ร่วมกัน
+    แต่ละครั้งเป็น transaction เดียว (BEGIN IMMEDIATE) รันบน thread เพื่อไม่ block event loop ตอนไฟล์ถูก lock
+    """
+    name = "sqlite"
+    PURGE_EVERY = 1000  # ลบ bucket ที่เต็มแล้ว (ไม่มี request นาน) ทุก ๆ N ครั้ง
+
+    def __init__(self, path: Path, rate: float, burst: int):
+        super().__init__(rate, burst)
+        self._conn = sqlite3.connect(str(path), timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # สถานะ bucket หายได้ ไม่ต้อง fsync
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def _acquire(self, key: str) -> float:
+        now = time.time()  # นาฬิกาที่ทุก process เห็นตรงกัน
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (self.burst, now)
+                tokens, wait = self._take(tokens, max(0.0, now - updated))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                self._calls += 1
+                if self._calls % self.PURGE_EVERY == 0:
+                    self._conn.execute(
+                        "DELETE FROM rate_limit_buckets WHERE updated < ?", (now - self.burst / self.rate,)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    async def acquire(self, key: str) -> float:
+        return await asyncio.to_thread(self._acquire, key)
+
+    async def aclose(self) -> None:
+        self._conn.close()
+
+class RateLimiter:
+    """
+    rate limit ต่อ client + ต่อ IP (ต้องผ่านทั้งสอง bucket)
+    backend error = ปล่อยผ่าน (ไม่ให้ limiter ทำ service ล่มเอง)
+    """
+
+    def __init__(self, backend: RateLimitBackend, ip_backend: RateLimitBackend):
+        self.backend = backend
+        self.ip_backend = ip_backend
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    async def acquire(self, key: str, ip_key: str) -> float:
+        """0 = ผ่าน, ไม่งั้นคืนวินาทีที่ต้องรอ (ใช้ key จาก client_keys)"""
+        try:
+            wait = max(await self.ip_backend.acquire(ip_key), await self.backend.acquire(key))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Rate limit backend %s failed (%s); allowing request", self.backend.name, e)
+            return 0.0
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend.name,
+            "rate_per_second": self.backend.rate,
+            "burst": self.backend.burst,
+            "ip_rate_per_second": self.ip_backend.rate,
+            "ip_burst": self.ip_backend.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors
+        }
+
+def client_keys(client_id: Optional[str], host: Optional[str]) -> Tuple[str, str]:
+    """
+    (key ของ bucket ต่อ client, key ของ bucket รวมต่อ IP)
+    client = IP + id ของ install ที่ extension ส่งมา (ไม่มี id = ทั้ง IP เป็น client เดียว)
+    id มาจาก client จึงเชื่อไม่ได้ - bucket ต่อ IP จำกัดทั้ง IP ไม่ว่าจะส่ง id มากี่ค่า
+    """
+    ip = host or "unknown"
+    client_id = (client_id or "").strip()[:128]
+    return ("id:" + ip + "/" + client_id if client_id else "ip:" + ip), "net:" + ip
+
+class RateLimited(Exception):
+    """bucket ของ client หมดระหว่าง batch/NDJSON - รายการนี้ลองใหม่ได้หลัง retry_after วินาที"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"rate limited: retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class ItemQuota:
+    """
+    token ต่อรายการของ batch/NDJSON 1 upload จาก bucket ของ client ที่อัปโหลด
+    prepaid = รายการที่จ่ายไปแล้วตอนผ่าน rate limit ของ request (รายการแรก)
+    """
+
+    def __init__(self, limiter: RateLimiter, key: str, ip_key: str, prepaid: int = 1):
+        self.limiter = limiter
+        self.key = key
+        self.ip_key = ip_key
+        self.prepaid = prepaid
+
+    async def charge(self) -> None:
+        """หยิบ 1 token ให้รายการถัดไป หรือ raise RateLimited"""
+        if self.prepaid > 0:
+            self.prepaid -= 1
+            return
+        wait = await self.limiter.acquire(self.key, self.ip_key)
+        if wait > 0:
+            raise RateLimited(math.ceil(wait))
+
+class AdmissionRejected(Exception):
+    """คิวเต็มหรือรอในคิวนานเกิน - ให้ client ลองใหม่หลัง retry_after วินาที"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """จำกัดงานวิเคราะห์ที่รันพร้อมกันทั้ง process + คิวรอที่มีขนาดจำกัด"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))  # ประมาณเวลาที่คิวปัจจุบันจะหมด
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def enter(self) -> None:
+        """ได้ที่รันทันที / รอในคิว / raise AdmissionRejected - ได้ที่แล้วต้องเรียก leave() เสมอ"""
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("analysis queue is full", self.retry_after)
+            self.waiting += 1
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise AdmissionRejected("timed out waiting in the analysis queue", self.retry_after)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.active += 1
+        self.admitted += 1
+
+    def leave(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+def create_backend(settings: Settings, rate: float, burst: int) -> RateLimitBackend:
+    if settings.rate_limit_backend == "sqlite":
+        return SQLiteRateLimitBackend(settings.rate_limit_sqlite_path, rate, burst)
+    return MemoryRateLimitBackend(rate, burst, settings.rate_limit_max_clients)
+
+_limiter: Optional[RateLimiter] = None
+_admission: Optional[AdmissionController] = None
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """limiter กลางของ process (None ถ้า RATE_LIMIT_ENABLED=false)"""
+    global _limiter
+    settings = get_settings()
+    if _limiter is None and settings.rate_limit_enabled:
+        _limiter = RateLimiter(
+            create_backend(settings, settings.rate_limit_per_second, settings.rate_limit_burst),
+            create_backend(settings, settings.rate_limit_ip_per_second, settings.rate_limit_ip_burst)
+        )
+    return _limiter
+
+def get_admission() -> Optional[AdmissionController]:
+    """admission controller กลางของ process (None ถ้า ADMISSION_ENABLED=false)"""
+    global _admission
+    settings = get_settings()
+    if _admission is None and settings.admission_enabled:
+        _admission = AdmissionController(
+            settings.admission_max_concurrent, settings.admission_max_queue, settings.admission_queue_timeout_seconds
+        )
+    return _admission
+
+async def close_rate_limiter() -> None:
+    global _limiter
+    if _limiter is not None:
+        await _limiter.backend.aclose()
+        await _limiter.ip_backend.aclose()
+        _limiter = None
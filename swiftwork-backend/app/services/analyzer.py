@@ -1,7 +1,30 @@
 from app.api.schemas import ProductData, AnalysisResponse, TopicAnalysis, TopicDetails
-from typing import List
+from app.api.mock_data import DUMMY_ANALYSIS_RESPONSES
+from app.api.responses import prebuilt_topics
+from app.config import get_settings
+from app.services.cache import analysis_cache, analysis_flights, compute_product_hash, product_cache
+from app.services.rules import get_rules, rule_store
+from app.services.price_index import get_price_index
+from app.services.category_index import get_category_index, label_for
+from app.services.thai_tokenizer import tokenize, truncate_at_word
+from app.services.keywords import get_keyword_index
+from app.services.storage import get_store
+from app.services import metrics
+from app.services.metrics import instrument
+from app.services.scheduler import TopicTask, affected_topics, iter_topics, run_topics, validate_topics
+from app.services.image_inspector import BROKEN, UNCHECKED, ImageInfo, get_image_inspector
+from app.services.suggestions import generate_ai_fix
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
 import re
 import json
+import threading
+
+logger = logging.getLogger(__name__)
+
+_METRICS_ENABLED = metrics.metrics_enabled()
+_LLM_AI_FIX = get_settings().llm_ai_fix and get_settings().llm_backend != "none"
 
 def serialize_ai_fix(ai_fix_data):
     """Convert ai_fix objects/lists to JSON string for frontend compatibility"""
@@ -14,41 +37,128 @@ def serialize_ai_fix(ai_fix_data):
 async def analyze_product(product: ProductData, force_refresh: bool = False) -> AnalysisResponse:
     """
     วิเคราะห์ข้อมูลสินค้าและให้คะแนนแต่ละหัวข้อ
+    ผลลัพธ์ถูก cache ตาม hash ของ product; force_refresh=True จะลบ entry เดิมแล้วคำนวณใหม่
     """
-    topics = []
-    
-    # 1. ภาพปกงาน
-    cover_analysis = analyze_cover_image(product.cover_image)
-    topics.append(cover_analysis)
-    
-    # 2. ชื่องาน
-    title_analysis = analyze_title(product.title)
-    topics.append(title_analysis)
-    
-    # 3. หมวดหมู่
-    category_analysis = analyze_category(product.category, product.subcategory, product.title)
-    topics.append(category_analysis)
-    
-    # 4. ราคาเริ่มต้น
-    price_analysis = analyze_price(product.price, product.category)
-    topics.append(price_analysis)
-    
-    # 5. เพิ่มการมองเห็นของการ์ดงาน (Visibility/SEO)
-    visibility_analysis = analyze_visibility(product.tags, product.description)
-    topics.append(visibility_analysis)
-    
-    # 6. ข้อมูลแพ็กเกจ (Package Info)
-    packages = getattr(product, 'packages', None)
-    package_analysis = analyze_package(packages)
-    topics.append(package_analysis)
-    
-    # 7. อัลบั้มผลงาน (Portfolio/Album)
-    album_images = getattr(product, 'album_images', None)
-    album_analysis = analyze_album(album_images)
-    topics.append(album_analysis)
+    return (await analyze_with_id(product, force_refresh))[1]
+
+async def analyze_with_id(product: ProductData, force_refresh: bool = False) -> Tuple[str, AnalysisResponse]:
+    """เหมือน analyze_product แต่คืน analysis id (hash ของ product) ด้วย สำหรับ /api/analyze/incremental"""
+    # ตรวจว่า rule ถูกแก้ไขหรือไม่ก่อนใช้ cache (ถ้า reload จะล้าง cache ให้)
+    get_rules()
+
+    cache_key = compute_product_hash(product)
+    product_cache.set(cache_key, product)
+    if get_settings().mock_analysis:
+        # MOCK_ANALYSIS=true: ตอบด้วย dummy analysis (คงที่ต่อ product) ไม่ผ่าน cache/index/database
+        return cache_key, DUMMY_ANALYSIS_RESPONSES[int(cache_key, 16) % len(DUMMY_ANALYSIS_RESPONSES)]
+
+    timer = metrics.RequestTimer() if _METRICS_ENABLED else None
+    if force_refresh:
+        # regenerate ต้องได้ผลใหม่เสมอ - ไม่ร่วมกับงานที่กำลังทำอยู่
+        analysis_cache.invalidate(cache_key)
+        result, degraded = await build_analysis(product)
+        _record(cache_key, product, result, degraded, "refresh", timer)
+        return cache_key, result
+
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        if timer is not None:
+            timer.finish("hit")
+        return cache_key, cached
+
+    # product เดียวกันที่มาพร้อมกัน (หลายแท็บ/extension retry) รอผลของการวิเคราะห์ครั้งเดียว
+    result, shared = await analysis_flights.do(cache_key, lambda: _analyze_miss(cache_key, product, timer))
+    if _METRICS_ENABLED:
+        metrics.analysis_singleflight.inc("shared" if shared else "leader")
+        if shared:
+            timer.finish("shared")
+    return cache_key, result
+
+async def _analyze_miss(cache_key: str, product: ProductData, timer) -> AnalysisResponse:
+    result, degraded = await build_analysis(product)
+    _record(cache_key, product, result, degraded, "miss", timer)
+    return result
+
+async def analyze_incremental(previous_id: str, changes: Dict[str, Any]) -> Optional[Tuple[str, AnalysisResponse, List[str]]]:
+    """
+    วิเคราะห์ใหม่เฉพาะหัวข้อที่อ่าน field ที่เปลี่ยน (ดู TopicTask.inputs) หัวข้ออื่นใช้ผลเดิมของ previous_id
+    คืน (analysis id ใหม่, ผลวิเคราะห์, ชื่อหัวข้อที่คำนวณใหม่) หรือ None ถ้าไม่รู้จัก previous_id (หมดอายุ/ไม่เคยวิเคราะห์)
+    field ที่ไม่มีใน ProductData หรือค่าไม่ถูกต้อง raise ValueError
+    """
+    unknown = set(changes) - set(ProductData.model_fields)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    get_rules()
+    previous_product = product_cache.get(previous_id)
+    if previous_product is None:
+        return None
+    product = ProductData.model_validate({**previous_product.model_dump(), **changes})
+
+    # อ่านผลเดิมเพื่อใช้ซ้ำ ไม่ใช่ lookup ของ request - peek ไม่ให้ hit ratio ของ cache เพี้ยน
+    previous = analysis_cache.peek(previous_id)
+    if previous is None or get_settings().mock_analysis:
+        # ผลเดิมหมดอายุ/ถูกล้างเพราะ rule เปลี่ยน -> วิเคราะห์ทั้งหมด
+        cache_key, result = await analyze_with_id(product)
+        return cache_key, result, [topic.name for topic in TOPICS]
+
+    cache_key = compute_product_hash(product)
+    product_cache.set(cache_key, product)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        return cache_key, cached, []
+
+    timer = metrics.RequestTimer() if _METRICS_ENABLED else None
+    changed = {name for name in changes if getattr(product, name) != getattr(previous_product, name)}
+    affected = affected_topics(TOPICS, changed)
+    results = dict(zip((topic.name for topic in TOPICS), previous.topics))
+    recomputed, degraded = await run_topics([topic for topic in TOPICS if topic.name in affected], product)
+    results.update(recomputed)
+    if _LLM_AI_FIX:
+        await rewrite_ai_fixes(results, degraded, product, recomputed)
+    result = compose_response(results, degraded)
+    _record(cache_key, product, result, degraded, "incremental", timer)
+    return cache_key, result, list(recomputed)
+
+def _record(cache_key: str, product: ProductData, result: AnalysisResponse, degraded: Set[str], outcome: str, timer) -> None:
+    """
+    เก็บผลที่คำนวณใหม่ลง cache/database และบันทึกเวลา
+    outcome = "miss" | "refresh" | "incremental"
+    (index ราคา/คำสร้างจาก corpus เท่านั้น - ไม่เรียนจาก request ที่ client ปลอมข้อมูลได้)
+    """
+    if degraded:
+        # ผลที่มี fallback ไม่ cache/ไม่บันทึก - request ถัดไปจะลองวิเคราะห์ใหม่
+        if timer is not None:
+            timer.finish("degraded")
+        return
+    analysis_cache.set(cache_key, result)
+    store = get_store()
+    if store is not None:
+        # เขียนลง database เบื้องหลัง - request ไม่ต้องรอ
+        store.enqueue(cache_key, product, result)
+    if timer is not None:
+        timer.finish(outcome)
+
+# ผลที่ cache ไว้ใช้ rule ชุดเก่า - ล้างทิ้งเมื่อ rule ถูก reload
+rule_store.add_reload_listener(lambda rules: analysis_cache.clear())
+rule_store.add_reload_listener(lambda rules: prebuilt_topics.clear())
+
+async def build_analysis(product: ProductData) -> Tuple[AnalysisResponse, Set[str]]:
+    """
+    คำนวณผลวิเคราะห์ทั้ง 7 หัวข้อ (ไม่ผ่าน cache) พร้อมกันตาม TOPICS
+    คืน (ผลวิเคราะห์, ชื่อหัวข้อที่ timeout/error แล้วใช้ fallback)
+    """
+    results, degraded = await run_topics(TOPICS, product)
+    if _LLM_AI_FIX:
+        await rewrite_ai_fixes(results, degraded, product)
+    return compose_response(results, degraded), degraded
+
+def compose_response(results: Dict[str, TopicAnalysis], degraded: Set[str]) -> AnalysisResponse:
+    """รวมผลรายหัวข้อ (เรียงตาม TOPICS) เป็น AnalysisResponse"""
+    topics = list(results.values())
     
-    # คำนวณคะแนนรวม
-    overall_score = sum(t.score for t in topics) // len(topics)
+    # คำนวณคะแนนรวม (ไม่นับหัวข้อที่วิเคราะห์ไม่สำเร็จ)
+    scored = [results[name].score for name in results if name not in degraded] or [0]
+    overall_score = sum(scored) // len(scored)
     
     # สร้างคำแนะนำรวม
     recommendations = generate_recommendations(topics)
@@ -59,224 +169,414 @@ async def analyze_product(product: ProductData, force_refresh: bool = False) ->
         recommendations=recommendations
     )
 
-def analyze_cover_image(cover_image: str | None) -> TopicAnalysis:
-    """วิเคราะห์ภาพปก"""
+async def stream_analysis(product: ProductData) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    เหมือน analyze_product แต่ yield ("topic", TopicAnalysis) ทันทีที่แต่ละหัวข้อเสร็จ
+    แล้วปิดท้ายด้วย ("result", (analysis id, AnalysisResponse)) - ผลจาก cache/mock ส่งทุกหัวข้อต่อกันทันที
+    LLM_AI_FIX: หัวข้อที่ ai_fix ถูกเขียนใหม่จะถูกส่งซ้ำ (ชื่อเดิม) ก่อน result
+    cache miss ใช้ analysis_flights เดียวกับ analyze_with_id: มีงานของ product นี้อยู่แล้ว = รอผลนั้นแล้วส่งทุกหัวข้อ
+    งานรันเป็น task ของ flight - client ตัดการเชื่อมต่อ งานยังทำต่อให้คนที่รออยู่ (และ cache ผล)
+    """
+    get_rules()
+    cache_key = compute_product_hash(product)
+    product_cache.set(cache_key, product)
+    timer = None
+    if get_settings().mock_analysis:
+        cached = DUMMY_ANALYSIS_RESPONSES[int(cache_key, 16) % len(DUMMY_ANALYSIS_RESPONSES)]
+    else:
+        timer = metrics.RequestTimer() if _METRICS_ENABLED else None
+        cached = analysis_cache.get(cache_key)
+        if cached is not None and timer is not None:
+            timer.finish("hit")
+    if cached is not None:
+        for topic in cached.topics:
+            yield "topic", topic
+        yield "result", (cache_key, cached)
+        return
+
+    streamed: "asyncio.Queue[Optional[TopicAnalysis]]" = asyncio.Queue()
+    flight, shared = analysis_flights.start(cache_key, lambda: _stream_miss(cache_key, product, timer, streamed.put_nowait))
+    if _METRICS_ENABLED:
+        metrics.analysis_singleflight.inc("shared" if shared else "leader")
+    if shared:
+        result = await asyncio.shield(flight)
+        if timer is not None:
+            timer.finish("shared")
+        for topic in result.topics:
+            yield "topic", topic
+        yield "result", (cache_key, result)
+        return
+
+    while True:
+        topic = await streamed.get()
+        if topic is None:
+            break
+        yield "topic", topic
+    yield "result", (cache_key, await asyncio.shield(flight))
+
+async def _stream_miss(cache_key: str, product: ProductData, timer, emit: Callable[[Optional[TopicAnalysis]], None]) -> AnalysisResponse:
+    """เหมือน _analyze_miss แต่ส่งแต่ละหัวข้อให้ emit ทันทีที่เสร็จ แล้ว emit(None) เมื่อจบ (รวมกรณี error)"""
+    try:
+        finished: Dict[str, TopicAnalysis] = {}
+        degraded: Set[str] = set()
+        async for name, topic, failed in iter_topics(TOPICS, product):
+            finished[name] = topic
+            if failed:
+                degraded.add(name)
+            emit(topic)
+
+        results = {topic.name: finished[topic.name] for topic in TOPICS}
+        if _LLM_AI_FIX:
+            await rewrite_ai_fixes(results, degraded, product)
+            for name, topic in results.items():
+                if topic is not finished[name]:
+                    emit(topic)
+        result = compose_response(results, degraded)
+        _record(cache_key, product, result, degraded, "miss", timer)
+        return result
+    finally:
+        emit(None)
+
+async def rewrite_ai_fixes(
+    results: Dict[str, TopicAnalysis],
+    degraded: Set[str],
+    product: ProductData,
+    only: Optional[Iterable[str]] = None
+) -> None:
+    """
+    LLM_AI_FIX=true: ให้ LLM เขียน ai_fix ของหัวข้อที่ยังไม่ผ่าน (แทนข้อความจาก rule)
+    รอไม่เกิน TOPIC_TIMEOUT_SECONDS - หัวข้อที่ยังไม่ได้คำตอบใช้ข้อความจาก rule
+    (การเรียกที่ค้างอยู่ยังทำต่อจนเสร็จและเก็บลง cache ของ LLM client)
+    """
+    candidates = results if only is None else only
+    names = [name for name in candidates if results[name].status != "pass" and name not in degraded]
+    if not names:
+        return
+    context = product.model_dump(exclude_none=True)
+    tasks = {name: asyncio.ensure_future(generate_ai_fix(results[name], context)) for name in names}
+    done, pending = await asyncio.wait(tasks.values(), timeout=get_settings().topic_timeout_seconds)
+    for task in pending:
+        task.cancel()
+    for name, task in tasks.items():
+        if task in done and task.result() is not None:
+            topic = results[name]
+            results[name] = topic.model_copy(update={"details": topic.details.model_copy(update={"ai_fix": task.result()})})
+
+_prebuilt_lock = threading.Lock()
+
+def _prebuilt(rules, key, build: Callable[[], TopicAnalysis]) -> TopicAnalysis:
+    """
+    ผลวิเคราะห์ที่ไม่ขึ้นกับ input (เช่น ไม่มีภาพปก/ไม่มีแพ็กเกจ) สร้างครั้งเดียวต่อ rule ชุดหนึ่งแล้วใช้ object เดิมซ้ำ
+    พร้อม JSON ที่ serialize ไว้แล้วใน prebuilt_topics (response ต่อ bytes เดิมได้เลย)
+    TopicAnalysis เป็น frozen model - แก้ได้แค่ผ่าน model_copy (เหมือน rewrite_ai_fixes) ไม่กระทบ object ที่แชร์
+    key ต้องมาจากข้อมูลของ rule (ชื่อหัวข้อ, ลำดับ band) ไม่ใช่ id() ของ object ที่อาจถูกใช้ซ้ำหลัง reload
+    สร้างใต้ lock (หัวข้ออาจรันบน thread pool) ให้ทุก thread ได้ object เดียวกันที่ลงทะเบียนไว้แล้ว
+    """
+    topic = rules.prebuilt.get(key)
+    if topic is None:
+        with _prebuilt_lock:
+            topic = rules.prebuilt.get(key)
+            if topic is None:
+                topic = build()
+                prebuilt_topics.add(topic)
+                rules.prebuilt[key] = topic
+    return topic
+
+def _missing_topic(rules, key: str, name: str, emoji: str) -> TopicAnalysis:
+    """ผล fail ของหัวข้อที่ยังไม่กรอก (มีแค่ fail_steps จาก rules[key]["missing"])"""
+    return _prebuilt(rules, (key, "missing"), lambda: TopicAnalysis(
+        name=name,
+        emoji=emoji,
+        score=0,
+        status="fail",
+        details=TopicDetails(fail_steps=_rule_value(getattr(rules, key)["missing"], "fail_steps"))
+    ))
+
+def _rule_value(outcome: dict, key: str, default=None):
+    """ดึงค่าจาก outcome และแปลง tuple (จาก rule ที่ freeze แล้ว) กลับเป็น list"""
+    value = outcome.get(key, default)
+    return list(value) if isinstance(value, tuple) else value
+
+@instrument("analyze_cover_image")
+def analyze_cover_image(cover_image: str | None, info: ImageInfo | None = None) -> TopicAnalysis:
+    """วิเคราะห์ภาพปก (info = format/ขนาดจริงจาก image_inspector ถ้าตรวจได้)"""
+    compiled = get_rules()
+    rules = compiled.cover_image
     if not cover_image:
+        return _missing_topic(compiled, "cover_image", "ภาพปกงาน", "🖼️")
+
+    if info is not None:
+        inspection = rules["inspection"]
+        current = f"{info.width}x{info.height}px ({info.format})"
+        outcome = None
+        if info.format not in inspection["formats"]:
+            outcome = inspection["unsupported_format"]
+        elif abs(info.aspect_ratio - inspection["aspect_ratio"]) > inspection["aspect_tolerance"] * inspection["aspect_ratio"]:
+            outcome = inspection["wrong_aspect"]
+        elif info.width < inspection["min_width"] or info.height < inspection["min_height"]:
+            outcome = inspection["too_small"]
+        if outcome is not None:
+            fmt = {"format": info.format.upper(), "width": info.width, "height": info.height, "ratio": f"{info.aspect_ratio:.2f}"}
+            return TopicAnalysis(
+                name="ภาพปกงาน",
+                emoji="🖼️",
+                score=outcome["score"],
+                status="suggest",
+                details=TopicDetails(
+                    current=current,
+                    ai_analysis=outcome["ai_analysis"].format(**fmt),
+                    suggestion=outcome["suggestion"],
+                    ai_fix=outcome["ai_fix"]
+                )
+            )
+    else:
+        current = None
+
+    def passed() -> TopicAnalysis:
         return TopicAnalysis(
             name="ภาพปกงาน",
             emoji="🖼️",
-            score=0,
-            status="fail",
+            score=rules["pass_score"],
+            status="pass",
             details=TopicDetails(
-                fail_steps=[
-                    "- อัปโหลดภาพคุณภาพสูง (1280x720px หรือ 16:9)",
-                    "- ใช้ภาพที่สื่อถึงแบรนด์หรือสไตล์ที่เป็นตัวตนของคุณ",
-                    "- หลีกเลี่ยงการใส่ข้อความมากเกินไปในรูปภาพ"
-                ]
+                current=current,
+                pass_tips=_rule_value(rules["pass"], "pass_tips")
             )
         )
-    
-    return TopicAnalysis(
-        name="ภาพปกงาน",
-        emoji="🖼️",
-        score=85,
-        status="pass",
-        details=TopicDetails(
-            pass_tips=[
-                "- ภาพปกของคุณมีคุณภาพดี",
-                "- พิจารณาเพิ่ม branding elements"
-            ]
-        )
-    )
+    # ไม่ได้ตรวจภาพ (ปิดการตรวจ/ดึงไม่สำเร็จ) = ผลเหมือนกันทุก listing
+    return passed() if current is not None else _prebuilt(compiled, ("cover_image", "pass"), passed)
+
+async def inspect_and_analyze_cover_image(cover_image: str | None) -> TopicAnalysis:
+    """
+    ตรวจขนาดภาพปกจริงก่อนให้คะแนน
+    ปิดการตรวจ / ดึงภาพไม่สำเร็จ = ให้คะแนนจากการมีภาพเหมือนเดิม (ไม่นับเป็น degraded)
+    """
+    info = None
+    inspector = get_image_inspector()
+    if cover_image and inspector is not None and cover_image.startswith(("http://", "https://")):
+        try:
+            info = await inspector.inspect(cover_image)
+        except Exception as e:  # network/HTTP error ไม่ควรทำให้ทั้งหัวข้อล้ม
+            logger.info("Cannot inspect cover image %s (%s)", cover_image, e)
+    return analyze_cover_image(cover_image, info)
 
+@instrument("analyze_title")
 def analyze_title(title: str | None) -> TopicAnalysis:
     """วิเคราะห์ชื่องาน"""
+    compiled = get_rules()
+    rules = compiled.title
     if not title:
-        return TopicAnalysis(
-            name="ชื่องาน",
-            emoji="📝",
-            score=0,
-            status="fail",
-            details=TopicDetails(
-                fail_steps=["- กรุณาใส่ชื่องาน"]
-            )
-        )
+        return _missing_topic(compiled, "title", "ชื่องาน", "📝")
     
     title_length = len(title)
+    position = compiled.title_bands.position(title_length)
+    band = compiled.title_bands.outcomes[position]
     
-    if title_length > 70:
-        score = 60
-        status = "suggest"
-        details = TopicDetails(
-            current=title,
-            ai_analysis=f"ชื่องานยาวเกินไป ({title_length} ตัวอักษร) อาจทำให้แสดงผลไม่สวย",
-            suggestion="ลดความยาวของชื่อให้อยู่ที่ 50-70 ตัวอักษร และใส่คีย์เวิร์ดหลักไว้ต้นชื่อ",
-            ai_fix=title[:70] + "..." if title_length > 70 else title
-        )
-    elif title_length < 20:
-        score = 65
-        status = "suggest"
-        details = TopicDetails(
-            current=title,
-            ai_analysis="ชื่องานสั้นเกินไป อาจไม่ได้ให้ข้อมูลที่เพียงพอกับลูกค้า",
-            suggestion="เพิ่มรายละเอียดและคีย์เวิร์ดที่เกี่ยวข้องเพื่อให้ลูกค้าเข้าใจชัดเจนขึ้น",
-            ai_fix=f"{title} - บริการคุณภาพ ราคาเป็นกันเอง"
-        )
+    if band["status"] == "pass":
+        # band ที่ผ่านไม่อ้างถึงชื่องาน -> ผลเดียวกันทุกชื่อใน band นี้
+        return _prebuilt(compiled, ("title", position), lambda: TopicAnalysis(
+            name="ชื่องาน",
+            emoji="📝",
+            score=band["score"],
+            status="pass",
+            details=TopicDetails(pass_tips=_rule_value(band, "pass_tips"))
+        ))
     else:
-        score = 80
-        status = "pass"
+        fmt = {
+            "title": title,
+            "length": title_length,
+            "word_count": len(tokenize(title)),
+            "truncated": truncate_at_word(title, rules["max_length"])
+        }
         details = TopicDetails(
-            pass_tips=[
-                "- ทำให้ชื่อไม่เกิน 70 ตัวอักษร",
-                "- ใส่คีย์เวิร์ดหลักไว้ต้นชื่อ"
-            ]
+            current=title,
+            ai_analysis=band["ai_analysis"].format(**fmt),
+            suggestion=band["suggestion"].format(**fmt),
+            ai_fix=band["ai_fix"].format(**fmt)
         )
     
     return TopicAnalysis(
         name="ชื่องาน",
         emoji="📝",
-        score=score,
-        status=status,
+        score=band["score"],
+        status=band["status"],
         details=details
     )
 
+@instrument("analyze_category")
 def analyze_category(category: str | None, subcategory: str | None, title: str | None) -> TopicAnalysis:
     """วิเคราะห์หมวดหมู่"""
+    compiled = get_rules()
+    rules = compiled.category
     if not category or not subcategory:
-        return TopicAnalysis(
-            name="หมวดหมู่",
-            emoji="🏷️",
-            score=0,
-            status="fail",
-            details=TopicDetails(
-                fail_steps=["- กรุณาเลือกหมวดหมู่และหมวดหมู่ย่อย"]
-            )
-        )
+        return _missing_topic(compiled, "category", "หมวดหมู่", "🏷️")
     
     # ตรวจสอบความสอดคล้องระหว่างหมวดหมู่และชื่องาน
     current = f"{category} > {subcategory}"
     
-    # ตัวอย่าง: ถ้าชื่องานมี "โลโก้" แต่หมวดหมู่ไม่ใช่ Logo
-    if title and "โลโก้" in title.lower() and "logo" not in subcategory.lower():
+    # เทียบชื่องานกับ index ของหมวดหมู่ย่อย: ถ้าหมวดอื่นใกล้เคียงกว่าหมวดที่เลือกชัดเจน ถือว่าไม่สอดคล้อง
+    classifier = rules["classifier"]
+    match = get_category_index().classify(title, label_for(category, subcategory))
+    if (
+        match is not None
+        and match.label.lower() != current.lower()
+        and match.similarity >= classifier["min_similarity"]
+        and match.current_similarity < match.similarity * classifier["max_current_ratio"]
+    ):
+        mismatch = rules["mismatch"]
+        fmt = {"suggested": match.label, "suggested_subcategory": match.label.split(" > ", 1)[-1]}
         return TopicAnalysis(
             name="หมวดหมู่",
             emoji="🏷️",
-            score=60,
+            score=mismatch["score"],
             status="suggest",
             details=TopicDetails(
                 current=current,
-                ai_analysis="หมวดหมู่ที่คุณเลือกไม่สอดคล้องกับประเภทงานบริการ รับจ้างทำโลโก้ อาจทำให้ลูกค้าค้นหาบริการของคุณไม่เจอ",
-                suggestion="ตรวจสอบและปรับหมวดหมู่ให้ตรงกับประเภทของงานคุณ",
-                ai_fix="ออกแบบกราฟิก > Logo"
+                ai_analysis=mismatch["ai_analysis"].format(**fmt),
+                suggestion=mismatch["suggestion"],
+                ai_fix=mismatch["ai_fix"].format(**fmt)
             )
         )
     
     return TopicAnalysis(
         name="หมวดหมู่",
         emoji="🏷️",
-        score=85,
+        score=rules["pass"]["score"],
         status="pass",
         details=TopicDetails(
             current=current,
-            pass_tips=["- หมวดหมู่สอดคล้องกับประเภทงาน"]
+            pass_tips=_rule_value(rules["pass"], "pass_tips")
         )
     )
 
-def analyze_price(price: float | None, category: str | None) -> TopicAnalysis:
+@instrument("analyze_price")
+def analyze_price(price: float | None, category: str | None, subcategory: str | None = None) -> TopicAnalysis:
     """วิเคราะห์ราคา"""
+    compiled = get_rules()
+    rules = compiled.price
     if not price:
+        return _missing_topic(compiled, "price", "ราคาเริ่มต้น", "💲")
+    
+    # ถ้ามีข้อมูลราคาในหมวดเดียวกันพอ ให้คะแนนตามตำแหน่งใน distribution
+    distribution_rules = rules["distribution"]
+    distribution = get_price_index().distribution(category, subcategory, distribution_rules["min_samples"])
+    if distribution is not None:
+        rank = distribution.percentile_rank(price)
+        band = compiled.price_distribution_bands.lookup(rank)
+        q_low, q_high = distribution_rules["range_quantiles"]
+        fmt = {
+            "percent_higher": round((1 - rank) * 100),
+            "percent_lower": round(rank * 100),
+            "range_low": distribution.quantile(q_low),
+            "range_high": distribution.quantile(q_high),
+            "median": distribution.quantile(0.5)
+        }
+        if band["status"] == "pass":
+            details = TopicDetails(
+                current=f"{price:,.0f} บาท",
+                pass_tips=[tip.format(**fmt) for tip in band["pass_tips"]]
+            )
+        else:
+            details = TopicDetails(
+                current=f"{price:,.0f} บาท",
+                ai_analysis=band["ai_analysis"].format(**fmt),
+                suggestion=band["suggestion"].format(**fmt),
+                ai_fix=band["ai_fix"].format(**fmt)
+            )
         return TopicAnalysis(
             name="ราคาเริ่มต้น",
             emoji="💲",
-            score=0,
-            status="fail",
-            details=TopicDetails(
-                fail_steps=["- กรุณาระบุราคาเริ่มต้น"]
-            )
+            score=band["score"],
+            status=band["status"],
+            details=details
         )
     
-    # เกณฑ์ราคาตามหมวดหมู่ (ตัวอย่าง)
-    price_ranges = {
-        "logo": (2000, 5000),
-        "graphic": (1500, 4000),
-        "label & packaging": (5000, 15000)
-    }
-    
-    # ตัวอย่าง: ถ้าราคาต่ำเกินไป
-    if price < 500:
+    # ไม่มีข้อมูลเปรียบเทียบ - ใช้เกณฑ์ราคาขั้นต่ำตามหมวดหมู่ (fallback เป็นค่า default ใน rules)
+    category_rules = compiled.price_rules(category)
+    
+    if price < category_rules["floor"]:
+        low = rules["low"]
+        range_low, range_high = category_rules["suggested_range"]
+        fmt = {
+            "range_low": range_low,
+            "range_high": range_high,
+            "suggested_price": category_rules["suggested_price"]
+        }
         return TopicAnalysis(
             name="ราคาเริ่มต้น",
             emoji="💲",
-            score=70,
+            score=low["score"],
             status="suggest",
             details=TopicDetails(
                 current=f"{price:,.0f} บาท",
-                ai_analysis="ราคาตั้งต้นอาจต่ำกว่าเรทตลาดเมื่อเทียบกับบริการในหมวดเดียวกัน",
-                suggestion="ปรับราคาเริ่มต้นให้อยู่ในช่วง 2,000-3,000 บาท หรือตั้งให้ใกล้เคียงกับคู่แข่ง",
-                ai_fix="2,500 บาท"
+                ai_analysis=low["ai_analysis"],
+                suggestion=low["suggestion"].format(**fmt),
+                ai_fix=low["ai_fix"].format(**fmt)
             )
         )
     
     return TopicAnalysis(
         name="ราคาเริ่มต้น",
         emoji="💲",
-        score=85,
+        score=rules["pass"]["score"],
         status="pass",
         details=TopicDetails(
             current=f"{price:,.0f} บาท",
-            pass_tips=["- ราคาอยู่ในช่วงที่เหมาะสม"]
+            pass_tips=_rule_value(rules["pass"], "pass_tips")
         )
     )
 
+@instrument("analyze_visibility")
 def analyze_visibility(tags: list | None, description: str | None) -> TopicAnalysis:
     """วิเคราะห์การมองเห็นและ SEO (Tags + Description Quality)"""
+    compiled = get_rules()
+    rules = compiled.visibility
     tags_count = len(tags) if tags else 0
     desc_len = len(description.strip()) if description else 0
 
     # scoring logic: consider both tags and description
-    if tags_count >= 5 and desc_len >= 200:
-        score = 85
-    elif tags_count >= 5 or desc_len >= 200:
-        score = 80
+    enough_tags = tags_count >= rules["min_tags"]
+    enough_desc = desc_len >= rules["min_description"]
+    scores = rules["scores"]
+    if enough_tags and enough_desc:
+        score = scores["both"]
+    elif enough_tags or enough_desc:
+        score = scores["either"]
     elif tags_count > 0 or desc_len > 0:
-        score = 70
+        score = scores["partial"]
     else:
-        score = 50
+        score = scores["none"]
 
-    status = "pass" if score >= 75 else ("suggest" if score >= 50 else "fail")
+    status = compiled.visibility_status.status(score)
 
     # ai_analysis message more informative
+    messages = rules["ai_analysis"]
     if tags_count == 0 and desc_len == 0:
-        ai_analysis = "ไม่มี tags และคำอธิบาย ทำให้ลูกค้าค้นหาบริการยาก"
+        ai_analysis = messages["none"]
     elif tags_count == 0:
-        ai_analysis = "ไม่มี tags — คำอธิบายมีอยู่แต่การค้นหาอาจไม่แม่นยำเพียงพอ"
+        ai_analysis = messages["no_tags"]
     elif desc_len == 0:
-        ai_analysis = "มี tags แต่คำอธิบายสั้นหรือไม่มี — เพิ่มคำอธิบายเพื่อช่วยแสดงรายละเอียด"
+        ai_analysis = messages["no_description"]
     else:
-        ai_analysis = "มีข้อมูลเพื่อเพิ่มการมองเห็น แต่ยังสามารถปรับปรุงให้ดีกว่าได้"
+        ai_analysis = messages["both"]
 
     # ai_fix: generate concrete suggestions - ส่งเป็น string แทน dict
     suggested_tags_text = None
     if not tags:
         if description:
-            words = [w.strip(".,/()[]") for w in description.split() if len(w) > 2]
-            suggested_list = list(dict.fromkeys(words))[:5] if words else ["ออกแบบ","งาน","บริการ"]
+            words = get_keyword_index().top_keywords(description, rules["max_suggested_tags"])
+            suggested_list = words or rules["default_tags"]
             suggested_tags_text = ", ".join(suggested_list)
         else:
-            suggested_tags_text = "ออกแบบ, โลโก้, แบรนด์, กราฟิก, illustration"
+            suggested_tags_text = ", ".join(rules["fallback_tags"])
     else:
-        suggested_tags_text = ", ".join(tags[:8])
+        suggested_tags_text = ", ".join(tags[:rules["max_echoed_tags"]])
 
     ai_fix_text = None
-    if desc_len < 100:
-        ai_fix_text = (
-            f"Tags แนะนำ: {suggested_tags_text}\n\n"
-            "คำอธิบายแนะนำ: เพิ่มรายละเอียดสินค้า เช่น กระบวนการทำงาน สิ่งที่จะได้ ระยะเวลา "
-            "และตัวอย่างผลงาน ตัวอย่าง: 'ให้บริการวาดรูปการ์ตูนคุณภาพสูง มีไฟล์ต้นฉบับ (AI, PSD) "
-            "ส่งงานภายใน 3 วัน แก้ไข 2 ครั้ง'"
-        )
+    if desc_len < rules["short_description"]:
+        ai_fix_text = rules["ai_fix"]["short_description"].format(tags=suggested_tags_text)
     elif tags_count == 0:
-        ai_fix_text = f"Tags แนะนำ: {suggested_tags_text}"
+        ai_fix_text = rules["ai_fix"]["no_tags"].format(tags=suggested_tags_text)
     
     return TopicAnalysis(
         name="เพิ่มการมองเห็นของการ์ดงาน",
@@ -284,44 +584,36 @@ def analyze_visibility(tags: list | None, description: str | None) -> TopicAnaly
         score=int(score),
         status=status,
         details=TopicDetails(
-            current=f"Tags: {tags_count} คำ, คำอธิบาย: {desc_len} ตัวอักษร",
+            current=rules["current"].format(tags_count=tags_count, desc_len=desc_len),
             ai_analysis=ai_analysis,
-            suggestion="เพิ่ม tags 5-8 คำและคำอธิบายอย่างน้อย 100-200 ตัวอักษร" if score < 80 else "ข้อมูลมองเห็นดี แต่ตรวจสอบคำค้นหลัก",
+            suggestion=rules["suggestion"]["improve"] if score < rules["good_suggestion_score"] else rules["suggestion"]["good"],
             ai_fix=ai_fix_text,
-            fail_steps=[
-                "- เพิ่ม tags สำคัญ ๆ 5-8 คำ",
-                "- ขยายคำอธิบายให้มีรายละเอียด (กระบวนการ ผลลัพธ์ ระยะเวลา)",
-                "- ใช้คำที่ลูกค้าจะค้นหา เช่น: โลโก้, ออกแบบ, แบรนด์"
-            ] if score < 50 else None,
-            pass_tips=["ใช้คำค้นหลักในชื่อและคำอธิบาย", "เพิ่มแท็กที่เกี่ยวข้อง 5-8 คำ"] if score >= 75 else None
+            fail_steps=_rule_value(rules, "fail_steps") if score < compiled.visibility_status.suggest else None,
+            pass_tips=_rule_value(rules, "pass_tips") if score >= compiled.visibility_status.passing else None
         )
     )
 
+@instrument("analyze_package")
 def analyze_package(packages: list | None) -> TopicAnalysis:
     """วิเคราะห์ข้อมูลแพ็กเกจ"""
+    compiled = get_rules()
+    rules = compiled.package
     if not packages:
-        return TopicAnalysis(
+        missing = rules["missing"]
+        return _prebuilt(compiled, ("package", "missing"), lambda: TopicAnalysis(
             name="ข้อมูลแพ็กเกจ",
             emoji="📦",
             score=0,
             status="fail",
             details=TopicDetails(
-                current="ไม่มีแพ็กเกจ",
-                ai_analysis="ยังไม่มีข้อมูลแพ็กเกจ",
-                suggestion="เพิ่มอย่างน้อย 2 แพ็กเกจ (basic, standard, premium)",
-                ai_fix=(
-                    "แพ็กเกจแนะนำ:\n\n"
-                    "1. Basic - 500 บาท (5 วัน)\n"
-                    "   ไฟล์คุณภาพต่ำสำหรับใช้งานทั่วไป\n\n"
-                    "2. Standard - 1,500 บาท (3 วัน)\n"
-                    "   ไฟล์คุณภาพสูง + 2 ครั้งแก้ไข\n\n"
-                    "3. Premium - 4,000 บาท (1-2 วัน)\n"
-                    "   ไฟล์พร้อมใช้งาน + ลิขสิทธิ์เต็มรูปแบบ"
-                ),
-                fail_steps=["สร้างแพ็กเกจอย่างน้อย 2 ระดับ", "ระบุราคาและระยะเวลาให้ชัดเจน"],
+                current=missing["current"],
+                ai_analysis=missing["ai_analysis"],
+                suggestion=missing["suggestion"],
+                ai_fix=missing["ai_fix"],
+                fail_steps=_rule_value(missing, "fail_steps"),
                 pass_tips=None
             )
-        )
+        ))
     
     count = len(packages)
     required_fields_missing = 0
@@ -329,26 +621,17 @@ def analyze_package(packages: list | None) -> TopicAnalysis:
         if not p.get("name") or p.get("price") is None or not p.get("delivery_time"):
             required_fields_missing += 1
     
-    if count == 1:
-        score = 60
-    elif 2 <= count <= 3:
-        score = 90
-    else:
-        score = 80
-    score -= min(required_fields_missing * 10, 30)
-    status = "pass" if score >= 80 else ("suggest" if score >= 50 else "fail")
+    score = compiled.package_bands.lookup(count)["score"]
+    score -= min(required_fields_missing * rules["missing_field_penalty"], rules["max_missing_field_penalty"])
+    status = compiled.package_status.status(score)
     
     ai_fix_text = None
-    if required_fields_missing or count < 2:
-        ai_fix_text = (
-            "แพ็กเกจแนะนำ:\n\n"
-            "1. Basic - 500 บาท (5 วัน)\n"
-            "   งานพื้นฐาน ส่งงานไฟล์ JPG/PNG\n\n"
-            "2. Standard - 1,500 บาท (3 วัน)\n"
-            "   รวมไฟล์ต้นฉบับและแก้ไข 2 ครั้ง\n\n"
-            "3. Premium - 4,000 บาท (1-2 วัน)\n"
-            "   งานด่วน พร้อมสิทธิ์เชิงพาณิชย์"
-        )
+    if required_fields_missing or count < rules["min_packages"]:
+        ai_fix_text = rules["ai_fix"]
+    
+    current = rules["current"].format(count=count)
+    if required_fields_missing:
+        current += rules["current_incomplete"].format(missing=required_fields_missing)
     
     return TopicAnalysis(
         name="ข้อมูลแพ็กเกจ",
@@ -356,62 +639,51 @@ def analyze_package(packages: list | None) -> TopicAnalysis:
         score=max(0, int(score)),
         status=status,
         details=TopicDetails(
-            current=f"{count} แพ็กเกจ" + (f" (ข้อมูลไม่ครบ {required_fields_missing} แพ็กเกจ)" if required_fields_missing else ""),
-            ai_analysis="จำนวนแพ็กเกจและความสมบูรณ์ของข้อมูลถูกตรวจสอบ",
-            suggestion="เพิ่มอย่างน้อย 2-3 แพ็กเกจ พร้อมชื่อ ราคา และระยะเวลา",
+            current=current,
+            ai_analysis=rules["ai_analysis"],
+            suggestion=rules["suggestion"],
             ai_fix=ai_fix_text,
             fail_steps=None,
-            pass_tips=["มีแพ็กเกจ 2-3 ระดับ", "ระบุเวลาและความแตกต่างของแต่ละแพ็กเกจ"] if status == "pass" else None
+            pass_tips=_rule_value(rules, "pass_tips") if status == "pass" else None
         )
     )
 
-def analyze_album(album_images: list | None) -> TopicAnalysis:
-    """วิเคราะห์อัลบั้มผลงาน"""
+@instrument("analyze_album")
+def analyze_album(album_images: list | None, checks: list | None = None) -> TopicAnalysis:
+    """
+    วิเคราะห์อัลบั้มผลงาน
+    checks = ผลตรวจแต่ละภาพ (status, ImageInfo) จาก image_inspector ตามลำดับภาพ ถ้าตรวจได้
+    """
+    compiled = get_rules()
+    rules = compiled.album
     if not album_images or len(album_images) == 0:
-        return TopicAnalysis(
+        missing = rules["missing"]
+        return _prebuilt(compiled, ("album", "missing"), lambda: TopicAnalysis(
             name="อัลบั้มผลงาน",
             emoji="📚",
             score=0,
             status="fail",
             details=TopicDetails(
-                current="0 รูปภาพ",
-                ai_analysis="ไม่มีผลงานตัวอย่าง",
-                suggestion="อัปโหลดผลงานอย่างน้อย 5 รูปภาพ",
-                ai_fix=(
-                    "แนะนำอัปโหลดภาพผลงาน 5-10 รูป:\n\n"
-                    "- อัปโหลดภาพผลงานที่มีมุมมองหลากหลายและคำบรรยายสั้นๆ\n"
-                    "- อัปโหลดภาพขนาดคุณภาพสูง (1280x720px) และตัวอย่างไฟล์ต้นฉบับหากเป็นไปได้\n"
-                    "- แสดงขั้นตอนการทำงาน (Before/After) เพื่อสร้างความน่าเชื่อถือ"
-                ),
-                fail_steps=["เพิ่มภาพผลงานอย่างน้อย 5 รูปภาพ", "ใส่คำอธิบายสั้น ๆ ในแต่ละผลงาน"],
+                current=missing["current"],
+                ai_analysis=missing["ai_analysis"],
+                suggestion=missing["suggestion"],
+                ai_fix=missing["ai_fix"],
+                fail_steps=_rule_value(missing, "fail_steps"),
                 pass_tips=None
             )
-        )
+        ))
     
     count = len(album_images)
-    if count < 5:
-        score = 60
-    elif 5 <= count <= 15:
-        score = 90
-    else:
-        score = 85
-    status = "pass" if score >= 80 else ("suggest" if score >= 50 else "fail")
-    
-    ai_fix_text = None
-    if count < 5:
-        ai_fix_text = (
-            "คำแนะนำในการเพิ่มภาพผลงาน:\n\n"
-            "- เพิ่มภาพผลงานอย่างน้อย 5 รูป ครอบคลุมสไตล์ต่าง ๆ\n"
-            "- ใส่คำบรรยายสั้น ๆ (1-2 บรรทัด) ให้แต่ละภาพ เช่น ขั้นตอน ผลลัพธ์ ลูกค้นที่เหมาะสม\n"
-            "- จัดเรียงภาพจากงานที่ดีที่สุดไปหางานรอง"
-        )
-    else:
-        ai_fix_text = (
-            "ปรับปรุงอัลบั้มผลงาน:\n\n"
-            "- เพิ่มคำบรรยายสั้น ๆ ใต้ภาพแต่ละภาพเพื่ออธิบายงานและผลลัพธ์\n"
-            "- จัดเรียงภาพจากงานที่ดีที่สุดไปหางานรอง\n"
-            "- ลบภาพที่คุณภาพต่ำหรือไม่เกี่ยวข้อง"
-        )
+    band = compiled.album_bands.lookup(count)
+    score = band["score"]
+    ai_analysis = band["ai_analysis"].format(count=count)
+    if checks:
+        issues = _album_issues(checks, rules["inspection"])
+        if issues:
+            inspection = rules["inspection"]
+            score = max(0, score - min(inspection["max_penalty"], inspection["penalty_per_issue"] * len(issues)))
+            ai_analysis = "\n".join([ai_analysis] + _album_issue_lines(issues, inspection))
+    status = compiled.album_status.status(score)
     
     return TopicAnalysis(
         name="อัลบั้มผลงาน",
@@ -419,15 +691,129 @@ def analyze_album(album_images: list | None) -> TopicAnalysis:
         score=int(score),
         status=status,
         details=TopicDetails(
-            current=f"{count} รูปภาพ",
-            ai_analysis=f"มีผลงาน {count} รายการ" + (" - ควรเพิ่มเติมเพื่อสร้างความน่าเชื่อถือ" if count < 5 else ""),
-            suggestion="อัพโหลดผลงานเพิ่มเติม" if count < 5 else "เพิ่มคำอธิบายในแต่ละภาพ",
-            ai_fix=ai_fix_text,
+            current=rules["current"].format(count=count),
+            ai_analysis=ai_analysis,
+            suggestion=band["suggestion"],
+            ai_fix=band["ai_fix"],
             fail_steps=None,
-            pass_tips=["เพิ่มตัวอย่างผลงาน 5-15 รูป", "แสดงงานหลากหลายสไตล์"] if status == "pass" else None
+            pass_tips=_rule_value(rules, "pass_tips") if status == "pass" else None
         )
     )
 
+def _album_issues(checks: list, inspection) -> List[Tuple[str, int]]:
+    """(ประเภทปัญหา, ลำดับภาพเริ่มที่ 1) - ภาพหนึ่งมีได้ปัญหาเดียว เรียงตาม broken > duplicate > too_small"""
+    issues = []
+    seen = set()
+    for position, (status, info) in enumerate(checks, 1):
+        if status == BROKEN:
+            issues.append(("broken", position))
+        elif info is None:
+            continue
+        elif info.fingerprint and info.fingerprint in seen:
+            issues.append(("duplicate", position))
+        elif info.width < inspection["min_width"] or info.height < inspection["min_height"]:
+            issues.append(("too_small", position))
+        if info is not None and info.fingerprint:
+            seen.add(info.fingerprint)
+    return issues
+
+def _album_issue_lines(issues: List[Tuple[str, int]], inspection) -> List[str]:
+    lines = []
+    for kind in ("broken", "duplicate", "too_small"):
+        positions = [str(position) for k, position in issues if k == kind]
+        if positions:
+            lines.append(inspection[kind].format(positions=", ".join(positions)))
+    return lines
+
+async def inspect_and_analyze_album(album_images: list | None) -> TopicAnalysis:
+    """
+    ตรวจภาพในอัลบั้มพร้อมกัน (จำกัดจำนวน request ต่ออัลบั้ม ใช้ connection pool และ cache เดียวกับภาพปก)
+    ภาพที่ตรวจไม่ทันภายใน IMAGE_FETCH_TIMEOUT_SECONDS ถือว่าไม่ทราบผล ไม่นับเป็นปัญหา
+    """
+    inspector = get_image_inspector()
+    settings = get_settings()
+    urls = [
+        url for url in (album_images or [])[:settings.album_max_inspected]
+        if isinstance(url, str) and url.startswith(("http://", "https://"))
+    ]
+    if inspector is None or not urls:
+        return analyze_album(album_images)
+    results = await inspector.inspect_many(
+        urls, settings.album_inspection_concurrency, settings.image_fetch_timeout_seconds
+    )
+    by_url = dict(zip(urls, results))
+    checks = [by_url.get(url, (UNCHECKED, None)) for url in album_images[:settings.album_max_inspected]]
+    return analyze_album(album_images, checks)
+
+FALLBACK_ANALYSIS = "ยังวิเคราะห์หัวข้อนี้ไม่สำเร็จในขณะนี้"
+FALLBACK_SUGGESTION = "ลองกดวิเคราะห์ใหม่อีกครั้งในภายหลัง"
+
+def _fallback(name: str, emoji: str):
+    """ผลแทนของหัวข้อที่ timeout/error (ไม่นับในคะแนนรวม) - object เดียวใช้ซ้ำทุกครั้ง"""
+    result = TopicAnalysis(
+        name=name,
+        emoji=emoji,
+        score=0,
+        status="suggest",
+        details=TopicDetails(ai_analysis=FALLBACK_ANALYSIS, suggestion=FALLBACK_SUGGESTION)
+    )
+    def fallback(product: ProductData) -> TopicAnalysis:
+        return result
+    return fallback
+
+# หัวข้อทั้งหมดตามลำดับที่แสดงผล
+# cover_image และ album ดึง header ของภาพผ่าน network จึงเป็น io
+# หัวข้ออื่นเป็น pure Python ที่ใช้เวลาไม่กี่สิบ µs จึงรันแบบ inline
+# (ย้ายไป thread pool ได้ด้วย TOPIC_POOL_TOPICS โดยไม่ต้องแก้โค้ด)
+# inputs = field ของ ProductData ที่แต่ละหัวข้ออ่าน ใช้เลือกหัวข้อที่ต้องคำนวณใหม่ใน analyze_incremental
+TOPICS = [
+    TopicTask(
+        "cover_image",
+        lambda p, deps: inspect_and_analyze_cover_image(p.cover_image),
+        _fallback("ภาพปกงาน", "🖼️"),
+        kind="io",
+        inputs=("cover_image",)
+    ),
+    TopicTask(
+        "title",
+        lambda p, deps: analyze_title(p.title),
+        _fallback("ชื่องาน", "📝"),
+        inputs=("title",)
+    ),
+    TopicTask(
+        "category",
+        lambda p, deps: analyze_category(p.category, p.subcategory, p.title),
+        _fallback("หมวดหมู่", "🏷️"),
+        inputs=("category", "subcategory", "title")
+    ),
+    TopicTask(
+        "price",
+        lambda p, deps: analyze_price(p.price, p.category, p.subcategory),
+        _fallback("ราคาเริ่มต้น", "💲"),
+        inputs=("price", "category", "subcategory")
+    ),
+    TopicTask(
+        "visibility",
+        lambda p, deps: analyze_visibility(p.tags, p.description),
+        _fallback("เพิ่มการมองเห็นของการ์ดงาน", "👁️"),
+        inputs=("tags", "description")
+    ),
+    TopicTask(
+        "package",
+        lambda p, deps: analyze_package(p.packages),
+        _fallback("ข้อมูลแพ็กเกจ", "📦"),
+        inputs=("packages",)
+    ),
+    TopicTask(
+        "album",
+        lambda p, deps: inspect_and_analyze_album(p.album_images),
+        _fallback("อัลบั้มผลงาน", "📚"),
+        kind="io",
+        inputs=("album_images",)
+    )
+]
+validate_topics(TOPICS)
+
 def generate_recommendations(topics: List[TopicAnalysis]) -> List[str]:
     """สร้างคำแนะนำรวม"""
     recommendations = []
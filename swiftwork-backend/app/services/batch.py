@@ -0,0 +1,82 @@
+"""
+วิเคราะห์สินค้าหลายรายการพร้อมกัน (batch) โดยจำกัดจำนวนงานที่รันพร้อมกัน
+แต่ละรายการ error แยกกัน - รายการที่เสียจะไม่ทำให้ทั้ง batch ล้ม
+"""
+from app.api.schemas import ProductData, BatchItemResult
+from app.config import get_settings
+from app.services.admission import AdmissionController, ItemQuota
+from app.services.analyzer import analyze_product
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+
+async def analyze_item(
+    index: int,
+    raw: Dict[str, Any],
+    admission: Optional[AdmissionController] = None,
+    quota: Optional[ItemQuota] = None
+) -> BatchItemResult:
+    """
+    วิเคราะห์ 1 รายการ และแปลง error เป็นผลลัพธ์ของรายการนั้น
+    admission = นับรายการนี้ในเพดานงานวิเคราะห์ของ process (คิวเต็ม = error ของรายการนี้)
+    quota = จ่าย rate limit ของ client 1 token ต่อรายการ (bucket หมด = error ของรายการนี้)
+    """
+    try:
+        if quota is not None:
+            await quota.charge()
+        product = ProductData.model_validate(raw)
+        if admission is None:
+            result = await analyze_product(product)
+        else:
+            await admission.enter()
+            try:
+                result = await analyze_product(product)
+            finally:
+                admission.leave()
+        return BatchItemResult(index=index, result=result)
+    except ValidationError as e:
+        fields = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return BatchItemResult(index=index, error=f"invalid product: {fields}")
+    except Exception as e:
+        return BatchItemResult(index=index, error=str(e))
+
+async def iter_batch(
+    items: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    admission: Optional[AdmissionController] = None,
+    quota: Optional[ItemQuota] = None
+) -> AsyncIterator[BatchItemResult]:
+    """
+    ส่งผลลัพธ์ออกทีละรายการตามลำดับที่วิเคราะห์เสร็จ (ไม่ใช่ลำดับ input)
+    สร้าง task ไม่เกิน concurrency ตัวพร้อมกัน เพื่อไม่ให้ถือทั้ง batch ไว้ใน memory
+    """
+    settings = get_settings()
+    concurrency = max(1, min(concurrency or settings.batch_default_concurrency, settings.batch_max_concurrency))
+    pending = set()
+    next_index = 0
+
+    try:
+        while next_index < len(items) or pending:
+            while next_index < len(items) and len(pending) < concurrency:
+                pending.add(asyncio.create_task(analyze_item(next_index, items[next_index], admission, quota)))
+                next_index += 1
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # client ตัดการเชื่อมต่อระหว่าง stream - ยกเลิกงานที่ค้างอยู่
+        for task in pending:
+            task.cancel()
+
+async def analyze_batch(
+    items: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    admission: Optional[AdmissionController] = None,
+    quota: Optional[ItemQuota] = None
+) -> List[BatchItemResult]:
+    """วิเคราะห์ทั้ง batch แล้วคืนผลเรียงตามลำดับ input"""
+    results: List[BatchItemResult] = [None] * len(items)
+    async for item in iter_batch(items, concurrency, admission, quota):
+        results[item.index] = item
+    return results
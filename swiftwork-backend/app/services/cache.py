@@ -0,0 +1,141 @@
+"""
+Cache ผลการวิเคราะห์ (content-addressed) สำหรับ /api/analyze
+key = hash ของ ProductData ที่ normalize แล้ว, มี TTL และ LRU eviction
+TTLCache ตัวเดียวกันใช้เก็บค่าอื่น (ProductData ตาม analysis id, ข้อความจาก LLM) โดยไม่ปน stats กับผลวิเคราะห์
+SingleFlight รวม request ที่ key เดียวกันและยังไม่อยู่ใน cache ให้คำนวณครั้งเดียว
+"""
+from app.api.schemas import ProductData
+from app.config import get_settings
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Dict, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+def compute_product_hash(product: ProductData) -> str:
+    """สร้าง hash ที่คงที่จาก ProductData (ไม่ขึ้นกับลำดับ key ใน payload)"""
+    payload = product.model_dump(mode="json")
+    normalized = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class TTLCache:
+    """LRU cache + TTL ทั่วไป (ค่าเป็นอะไรก็ได้) นับ hit/miss เฉพาะ get()"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """ค่าที่ยังไม่หมดอายุ โดยไม่นับ hit/miss และไม่ขยับลำดับ LRU (ใช้อ่านผลเดิมที่ไม่ใช่การ lookup ของ request)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> bool:
+        """ลบ entry ออกจาก cache (ใช้ตอน regenerate)"""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class AnalysisCache(TTLCache):
+    """TTLCache ของ AnalysisResponse (stats ของตัวนี้คือ hit ratio ที่ /api/cache/stats รายงาน)"""
+
+class SingleFlight:
+    """
+    งานที่ key เดียวกันและกำลังทำอยู่ รันครั้งเดียว ผู้เรียกพร้อมกันทุกคนได้ผล (หรือ exception) เดียวกัน
+    งานรันเป็น task แยก: ผู้เรียกคนแรกถูกยกเลิก (client ตัดการเชื่อมต่อ) งานยังทำต่อให้คนที่รออยู่
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(ผลของ fn, True ถ้าได้จากงานที่ผู้อื่นเริ่มไว้แล้ว)"""
+        task, shared = self.start(key, fn)
+        # shield: ผู้รอคนหนึ่งถูกยกเลิก ไม่ทำให้งานของคนอื่นถูกยกเลิกไปด้วย
+        return await asyncio.shield(task), shared
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """
+        (task ของงาน key นี้, True ถ้าเป็นงานที่ผู้อื่นเริ่มไว้แล้ว) โดยไม่รอผล
+        สำหรับผู้เรียกที่ต้องรู้ก่อนว่าเป็นผู้เริ่มงานหรือไม่ (เช่น stream ผลระหว่างทาง) - รอผลด้วย asyncio.shield(task)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            return task, True
+        self.leaders += 1
+        task = self._inflight[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done, key=key: self._finished(key, done))
+        return task, False
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # ผู้รอทุกคนอาจถูกยกเลิกไปแล้ว - กัน warning "exception was never retrieved"
+
+    def stats(self) -> Dict:
+        total = self.leaders + self.shared
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "dedup_ratio": round(self.shared / total, 4) if total else 0.0
+        }
+
+# cache กลางที่ใช้ร่วมกันทั้ง process
+analysis_cache = AnalysisCache(get_settings().cache_max_entries, get_settings().cache_ttl_seconds)
+# ProductData ตาม analysis id (hash) สำหรับ /api/analyze/incremental - ไม่ขึ้นกับ rule จึงไม่ถูกล้างตอน reload
+product_cache = TTLCache(get_settings().cache_max_entries, get_settings().cache_ttl_seconds)
+# การวิเคราะห์ที่กำลังทำอยู่ตาม hash ของ product (request ซ้ำพร้อมกันรอผลเดียวกัน)
+analysis_flights = SingleFlight()
@@ -0,0 +1,191 @@
+"""
+Inverted index จากคำ/n-gram ในชื่องาน -> หมวดหมู่ย่อย
+ใช้ตรวจว่าชื่องานสอดคล้องกับหมวดหมู่ที่เลือกหรือไม่ และแนะนำหมวดหมู่ที่ใกล้เคียงที่สุด
+
+แต่ละหมวดหมู่ย่อยเป็นเวกเตอร์ TF-IDF (normalize แล้ว) ของชื่องาน + tags ใน corpus
+การ lookup = รวมคะแนนจาก postings ของคำใน query เท่านั้น (cosine similarity)
+จึงไม่ขึ้นกับจำนวนหมวดหมู่ทั้งหมด
+"""
+from app.api.mock_data import DUMMY_PRODUCTS
+from app.config import get_settings
+from app.services.corpus import corpus_version
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+MAX_POSTINGS_PER_TERM = 64  # ตัด postings ของคำที่พบในหลายหมวดมาก ๆ ให้เหลือเฉพาะหมวดที่น้ำหนักสูงสุด
+THAI_NGRAM = 3
+
+_WORD_RE = re.compile(r"[฀-๿]+|[a-z0-9]+(?:[-&][a-z0-9]+)*")
+_THAI_RE = re.compile(r"[฀-๿]+")
+
+def label_for(category: str, subcategory: str) -> str:
+    return f"{category.strip()} > {subcategory.strip()}"
+
+def extract_terms(text: Optional[str]) -> List[str]:
+    """
+    แยก text เป็น term สำหรับ index
+    - คำภาษาอังกฤษ/ตัวเลข ใช้ทั้งคำ
+    - ภาษาไทย (ไม่มีช่องว่างระหว่างคำ) ใช้ character n-gram
+    """
+    if not text:
+        return []
+    terms = []
+    for token in _WORD_RE.findall(text.lower()):
+        if _THAI_RE.fullmatch(token):
+            if len(token) <= THAI_NGRAM:
+                terms.append(token)
+            else:
+                terms.extend(token[i:i + THAI_NGRAM] for i in range(len(token) - THAI_NGRAM + 1))
+        elif len(token) > 1:
+            terms.append(token)
+    return terms
+
+class CategoryMatch:
+    def __init__(self, label: str, similarity: float, current_similarity: float):
+        self.label = label
+        self.similarity = similarity
+        self.current_similarity = current_similarity
+
+class CategoryIndex:
+    def __init__(
+        self,
+        labels: List[str],
+        idf: Dict[str, float],
+        postings: Dict[str, List[Tuple[int, float]]],
+        source_version: Optional[str] = None
+    ):
+        self.labels = labels
+        self.source_version = source_version
+        self.idf = idf
+        self.postings = postings
+        self._label_ids = {label.lower(): i for i, label in enumerate(labels)}
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]], source_version: Optional[str] = None) -> "CategoryIndex":
+        """สร้าง index จาก (label, text) ของ listing ที่รู้หมวดหมู่แล้ว"""
+        label_terms: Dict[str, Counter] = defaultdict(Counter)
+        for label, text in documents:
+            label_terms[label].update(extract_terms(text))
+
+        labels = sorted(label_terms)
+        n_labels = len(labels)
+        label_freq = Counter()
+        for counts in label_terms.values():
+            label_freq.update(counts.keys())
+        idf = {term: math.log((1 + n_labels) / (1 + df)) + 1.0 for term, df in label_freq.items()}
+
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for label_id, label in enumerate(labels):
+            counts = label_terms[label]
+            weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, w in weights.items():
+                postings[term].append((label_id, w / norm))
+
+        for term, plist in postings.items():
+            if len(plist) > MAX_POSTINGS_PER_TERM:
+                plist.sort(key=lambda p: p[1], reverse=True)
+                del plist[MAX_POSTINGS_PER_TERM:]
+
+        return cls(labels, idf, dict(postings), source_version)
+
+    def classify(self, text: Optional[str], current_label: Optional[str] = None) -> Optional[CategoryMatch]:
+        """หาหมวดหมู่ย่อยที่ใกล้เคียงกับ text ที่สุด (None ถ้าไม่มีคำที่รู้จักเลย)"""
+        query = Counter(t for t in extract_terms(text) if t in self.postings)
+        if not query:
+            return None
+
+        query_weights = {term: (1 + math.log(tf)) * self.idf[term] for term, tf in query.items()}
+        query_norm = math.sqrt(sum(w * w for w in query_weights.values()))
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term, qw in query_weights.items():
+            for label_id, lw in self.postings[term]:
+                scores[label_id] += qw * lw
+
+        best_id = max(scores, key=scores.get)
+        current_id = self._label_ids.get(current_label.lower()) if current_label else None
+        current_similarity = scores.get(current_id, 0.0) / query_norm if current_id is not None else 0.0
+        return CategoryMatch(self.labels[best_id], scores[best_id] / query_norm, current_similarity)
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "source_version": self.source_version,
+            "labels": self.labels,
+            "idf": self.idf,
+            "postings": self.postings
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CategoryIndex":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"unsupported category index version: {payload.get('version')}")
+        postings = {term: [tuple(p) for p in plist] for term, plist in payload["postings"].items()}
+        return cls(payload["labels"], payload["idf"], postings, payload.get("source_version"))
+
+def iter_training_documents(corpus_path: Path) -> Iterable[Tuple[str, str]]:
+    """(label, text) จาก DUMMY_PRODUCTS และ labeled corpus"""
+    for product in DUMMY_PRODUCTS:
+        if product.category and product.subcategory:
+            yield label_for(product.category, product.subcategory), " ".join([product.title or ""] + (product.tags or []))
+
+    with open(corpus_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            listing = json.loads(line)
+            if listing.get("category") and listing.get("subcategory"):
+                text = " ".join([listing.get("title") or ""] + (listing.get("tags") or []))
+                yield label_for(listing["category"], listing["subcategory"]), text
+
+def build_category_index(corpus_path: Path) -> CategoryIndex:
+    return CategoryIndex.build(iter_training_documents(corpus_path), corpus_version(corpus_path))
+
+_category_index: Optional[CategoryIndex] = None
+
+def get_category_index(
+    index_path: Optional[Path] = None,
+    corpus_path: Optional[Path] = None
+) -> CategoryIndex:
+    """
+    index กลางของ process
+    โหลดจากไฟล์ที่ serialize ไว้ถ้ายังตรงกับ corpus ไม่งั้นสร้างใหม่จาก corpus แล้วบันทึก
+    """
+    global _category_index
+    if _category_index is None:
+        settings = get_settings()
+        index_path = index_path or settings.category_index_path
+        corpus_path = corpus_path or settings.corpus_path
+        index = None
+        try:
+            index = CategoryIndex.load(index_path)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning("Cannot load category index %s (%s); rebuilding from corpus", index_path, e)
+
+        if index is None or index.source_version != corpus_version(corpus_path):
+            index = build_category_index(corpus_path)
+            try:
+                index.save(index_path)
+            except OSError as e:
+                logger.warning("Cannot save category index to %s (%s)", index_path, e)
+        _category_index = index
+    return _category_index
@@ -0,0 +1,64 @@
+"""
+corpus ของ listing ที่เชื่อถือได้ (NDJSON, CORPUS_PATH) - แหล่งข้อมูลเดียวของ index ราคา/หมวดหมู่/คำ
+index ที่ serialize ไว้เก็บ corpus_version ตอนสร้าง ถ้าไม่ตรงกับไฟล์ปัจจุบัน = สร้างใหม่
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import os
+
+LISTING_FIELDS = ("title", "description", "category", "subcategory", "price", "tags")
+
+def corpus_version(corpus_path: Path) -> str:
+    """เวอร์ชันของ corpus (ใช้ตรวจว่าไฟล์ index ที่ serialize ไว้ยังตรงกับ corpus หรือไม่)"""
+    return f"{os.stat(corpus_path).st_mtime_ns:x}"
+
+def iter_listings(path: Path) -> Iterable[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _optional_text(raw: Dict[str, Any], name: str) -> Optional[str]:
+    value = raw.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be a string")
+    return value.strip() or None
+
+def vet_listing(raw: Any) -> Dict:
+    """
+    ตรวจ listing 1 รายการก่อนเข้า corpus (ต้องมี category และ price > 0)
+    คืน dict เฉพาะ LISTING_FIELDS ที่มีค่า หรือ raise ValueError
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("expected an object")
+    listing: Dict[str, Any] = {}
+    for name in ("title", "description", "category", "subcategory"):
+        value = _optional_text(raw, name)
+        if value is not None:
+            listing[name] = value
+    if "category" not in listing:
+        raise ValueError("category is required")
+
+    price = raw.get("price")
+    if isinstance(price, bool) or not isinstance(price, (int, float)) or not 0 < price < float("inf"):
+        raise ValueError("price must be a positive number")
+    listing["price"] = float(price)
+
+    tags = raw.get("tags")
+    if tags is not None:
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError("tags must be a list of strings")
+        listing["tags"] = [tag.strip() for tag in tags if tag.strip()]
+    return listing
+
+def append_listings(corpus_path: Path, listings: List[Dict]) -> str:
+    """ต่อท้าย listing ที่ตรวจแล้วลง corpus และคืน corpus_version ใหม่"""
+    with open(corpus_path, "a", encoding="utf-8") as f:
+        for listing in listings:
+            f.write(json.dumps(listing, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return corpus_version(corpus_path)
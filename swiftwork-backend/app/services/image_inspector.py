@@ -0,0 +1,387 @@
+"""
+ตรวจภาพปก/ภาพในอัลบั้มจาก URL: อ่านเฉพาะ header ของไฟล์ (ไม่ decode ทั้งภาพ) เพื่อหา format และขนาด
+
+- ใช้ httpx.AsyncClient ตัวเดียวทั้ง process (connection pool) ส่ง Range request และหยุดอ่านทันทีที่ได้ขนาด
+- ผลลัพธ์ cache ตาม URL (LRU ใน memory) พร้อม ETag; หมดอายุแล้วค่อย revalidate ด้วย If-None-Match
+- cache ถูก persist ลงดิสก์ตอน shutdown และโหลดกลับตอน startup
+- URL มาจาก input ของผู้ใช้: ตรวจทุก hop (รวม redirect) ด้วย URLGuard ก่อนยิง กันการสั่ง server
+  ไปดึง address ภายใน (SSRF) - ตั้ง IMAGE_ALLOWED_HOSTS เพื่อจำกัดเฉพาะ CDN ของภาพ
+"""
+from app.config import get_settings
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import httpx
+import ipaddress
+import json
+import logging
+import os
+import socket
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+
+# จำนวน byte ต้นไฟล์ที่ใช้ทำ fingerprint (ไฟล์เดียวกันที่อัปโหลดซ้ำจะได้ค่าเดียวกัน)
+FINGERPRINT_BYTES = 4096
+
+# redirect ที่ตามได้ต่อภาพ (ทุก hop ผ่าน URLGuard)
+MAX_REDIRECTS = 3
+
+# ผลตรวจภาพในอัลบั้ม
+OK = "ok"
+BROKEN = "broken"        # 4xx หรือไม่ใช่ไฟล์ภาพ
+UNCHECKED = "unchecked"  # 5xx/timeout/network error - ไม่รู้ผล จึงไม่นับเป็นปัญหา
+
+class ImageInfo:
+    def __init__(self, format: str, width: int, height: int, fingerprint: Optional[str] = None):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.fingerprint = fingerprint
+
+    @property
+    def aspect_ratio(self) -> float:
+        return self.width / self.height if self.height else 0.0
+
+    def to_dict(self) -> Dict:
+        return {"format": self.format, "width": self.width, "height": self.height, "fingerprint": self.fingerprint}
+
+def _png(data: bytes) -> Optional[ImageInfo]:
+    if len(data) >= 24 and data[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", data[16:24])
+        return ImageInfo("png", width, height)
+    return None
+
+def _gif(data: bytes) -> Optional[ImageInfo]:
+    if len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return ImageInfo("gif", width, height)
+    return None
+
+# SOF0-SOF15 ยกเว้น DHT(C4), JPG(C8), DAC(CC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def _jpeg(data: bytes) -> Optional[ImageInfo]:
+    """ไล่ segment จนเจอ SOF (ขนาดภาพ) - EXIF/ICC ก่อนหน้าอาจยาวหลายสิบ KB"""
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # ไม่มี length
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in _JPEG_SOF:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return ImageInfo("jpeg", width, height)
+        i += 2 + length
+    return None
+
+def _webp(data: bytes) -> Optional[ImageInfo]:
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], "little")
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X":
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return ImageInfo("webp", width, height)
+    return None
+
+def parse_image_header(data: bytes) -> Optional[ImageInfo]:
+    """format + ขนาดจาก byte ต้นไฟล์ (None ถ้ายังอ่านไม่พอหรือไม่ใช่ภาพที่รู้จัก)"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _png(data)
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return _gif(data)
+    if data.startswith(b"\xff\xd8"):
+        return _jpeg(data)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _webp(data)
+    return None
+
+def is_known_image_prefix(data: bytes) -> bool:
+    return (
+        data.startswith(b"\x89PNG") or data[:4] == b"GIF8" or data.startswith(b"\xff\xd8")
+        or (data[:4] == b"RIFF" and data[8:12] == b"WEBP")
+    )
+
+def _total_size(response) -> Optional[int]:
+    """ขนาดเต็มของไฟล์ (Content-Range ของ 206 หรือ Content-Length ของ 200)"""
+    content_range = response.headers.get("content-range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("content-length", "")
+    return int(length) if response.status_code == 200 and length.isdigit() else None
+
+def _fingerprint(buffer: bytes, total_size: Optional[int]) -> str:
+    """byte ต้นไฟล์ + ขนาดเต็ม -> ไฟล์เดียวกันที่อัปโหลดซ้ำคนละ URL ได้ค่าเดียวกัน"""
+    digest = hashlib.blake2b(buffer[:FINGERPRINT_BYTES], digest_size=8)
+    digest.update(str(total_size).encode())
+    return digest.hexdigest()
+
+class BlockedURLError(ValueError):
+    """URL ที่ไม่ให้ server ดึง: ไม่ใช่ http(s), host ไม่อยู่ใน allowlist หรือชี้ไป address ภายใน"""
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped is not None:  # ::ffff:127.0.0.1
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+class URLGuard:
+    """
+    ตรวจ URL ก่อนดึงภาพ (SSRF)
+    allowed_hosts = host ที่ยอมให้ดึง (รวม subdomain) ว่าง = ทุก host ที่เป็น address สาธารณะ
+    host ต้อง resolve ได้เฉพาะ address สาธารณะ - loopback/private/link-local (เช่น metadata ของ cloud) ถูกปฏิเสธ
+    allow_private=True ข้ามการตรวจ address (ใช้กับ server ทดสอบในเครื่องเท่านั้น)
+    """
+
+    def __init__(self, allowed_hosts: Sequence[str] = (), allow_private: bool = False):
+        self.allowed_hosts = tuple(host.lower().strip(".") for host in allowed_hosts if host.strip("."))
+        self.allow_private = allow_private
+
+    def host_allowed(self, host: str) -> bool:
+        if not self.allowed_hosts:
+            return True
+        return any(host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts)
+
+    async def check(self, url: httpx.URL) -> None:
+        """raise BlockedURLError ถ้าไม่ให้ดึง url (resolve ไม่ได้ = socket.gaierror)"""
+        if url.scheme not in ("http", "https") or not url.host:
+            raise BlockedURLError(f"unsupported image URL: {url}")
+        host = url.host.lower().rstrip(".")
+        if not self.host_allowed(host):
+            raise BlockedURLError(f"image host not allowed: {host}")
+        if self.allow_private:
+            return
+        try:
+            addresses = [str(ipaddress.ip_address(host))]
+        except ValueError:
+            port = url.port or (443 if url.scheme == "https" else 80)
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = [info[4][0] for info in infos]
+        for address in addresses:
+            if not _is_public_address(address):
+                raise BlockedURLError(f"image host {host} resolves to non-public address {address}")
+
+class InspectionCache:
+    """LRU ของผลตรวจภาพตาม URL: url -> (etag, info dict หรือ None, เวลาที่ตรวจล่าสุด)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[str], Optional[Dict], float]]" = OrderedDict()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[Dict], float]]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def set(self, url: str, etag: Optional[str], info: Optional[Dict], checked_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[url] = (etag, info, checked_at)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.dirty = True
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "entries": [[url, etag, info, checked_at] for url, (etag, info, checked_at) in self._entries.items()]
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path, max_entries: int) -> "InspectionCache":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != CACHE_FORMAT_VERSION:
+            raise ValueError(f"unsupported image cache version: {payload.get('version')}")
+        cache = cls(max_entries)
+        for url, etag, info, checked_at in payload["entries"][-max_entries:] if max_entries > 0 else []:
+            cache._entries[url] = (etag, info, checked_at)
+        return cache
+
+class ImageInspector:
+    def __init__(
+        self, client, cache: InspectionCache, ttl_seconds: float, max_header_bytes: int,
+        guard: Optional[URLGuard] = None
+    ):
+        self.client = client  # ต้องสร้างด้วย follow_redirects=False - redirect ตามเองใน _stream
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self.max_header_bytes = max_header_bytes
+        self.guard = guard or URLGuard()
+        self.fetches = 0
+        self.revalidated = 0
+        self.hits = 0
+        self.blocked = 0
+
+    @asynccontextmanager
+    async def _stream(self, url: str, headers: Dict[str, str]) -> AsyncIterator[httpx.Response]:
+        """GET url แล้วตาม redirect เอง (ไม่เกิน MAX_REDIRECTS) โดยตรวจ URL ทุก hop ด้วย guard"""
+        target = httpx.URL(url)
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                await self.guard.check(target)
+            except BlockedURLError:
+                self.blocked += 1
+                raise
+            async with self.client.stream("GET", target, headers=headers) as response:
+                location = response.headers.get("location")
+                if not (response.is_redirect and location):
+                    yield response
+                    return
+            target = target.join(location)
+        raise httpx.TooManyRedirects(f"more than {MAX_REDIRECTS} redirects: {url}", request=response.request)
+
+    async def inspect(self, url: str) -> Optional[ImageInfo]:
+        """
+        ขนาด/format ของภาพที่ url (None ถ้าเป็น 4xx หรือไม่ใช่ภาพ; 5xx/network error raise httpx.HTTPError)
+        URL ที่ guard ไม่ให้ดึง raise BlockedURLError (ไม่ cache)
+        ผลใน cache ที่ยังไม่หมดอายุใช้ได้เลยโดยไม่ยิง network
+        """
+        cached = self.cache.get(url)
+        now = time.time()
+        if cached is not None and now - cached[2] < self.ttl_seconds:
+            self.hits += 1
+            return ImageInfo(**cached[1]) if cached[1] else None
+
+        headers = {"Range": f"bytes=0-{self.max_header_bytes - 1}"}
+        if cached is not None and cached[0]:
+            headers["If-None-Match"] = cached[0]
+
+        self.fetches += 1
+        async with self._stream(url, headers) as response:
+            if response.status_code == 304 and cached is not None:
+                self.revalidated += 1
+                self.cache.set(url, cached[0], cached[1], now)
+                return ImageInfo(**cached[1]) if cached[1] else None
+            if 400 <= response.status_code < 500:  # ลิงก์เสีย: cache ไว้เหมือนไฟล์ที่ไม่ใช่ภาพ
+                self.cache.set(url, None, None, now)
+                return None
+            response.raise_for_status()
+
+            info = None
+            buffer = b""
+            async for chunk in response.aiter_bytes():
+                buffer += chunk
+                info = parse_image_header(buffer)
+                if info is not None or len(buffer) >= self.max_header_bytes:
+                    break
+                if len(buffer) >= 12 and not is_known_image_prefix(buffer):
+                    break
+            etag = response.headers.get("etag")
+            if info is not None:
+                info.fingerprint = _fingerprint(buffer, _total_size(response))
+
+        self.cache.set(url, etag, info.to_dict() if info else None, now)
+        return info
+
+    async def inspect_many(self, urls: Sequence[str], concurrency: int, timeout: float) -> List[Tuple[str, Optional[ImageInfo]]]:
+        """
+        ตรวจหลายภาพพร้อมกัน (ไม่เกิน concurrency request ต่อครั้ง) คืน (OK/BROKEN/UNCHECKED, info) ตามลำดับ urls
+        ภาพที่ยังไม่เสร็จภายใน timeout ถูกยกเลิกและนับเป็น UNCHECKED; URL ซ้ำกันตรวจครั้งเดียว
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check(url: str) -> Tuple[str, Optional[ImageInfo]]:
+            async with semaphore:
+                try:
+                    info = await self.inspect(url)
+                except (httpx.HTTPError, OSError, BlockedURLError):
+                    return UNCHECKED, None
+            return (OK, info) if info is not None else (BROKEN, None)
+
+        tasks = {url: asyncio.ensure_future(check(url)) for url in dict.fromkeys(urls)}
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        results = {
+            url: task.result() if task not in pending else (UNCHECKED, None)
+            for url, task in tasks.items()
+        }
+        return [results[url] for url in urls]
+
+    def stats(self) -> Dict:
+        return {
+            "cache_size": len(self.cache),
+            "max_cache_entries": self.cache.max_entries,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "revalidated": self.revalidated,
+            "blocked": self.blocked
+        }
+
+_inspector: Optional[ImageInspector] = None
+
+def get_image_inspector() -> Optional[ImageInspector]:
+    """inspector กลางของ process (None ถ้าปิด IMAGE_INSPECTION_ENABLED)"""
+    global _inspector
+    settings = get_settings()
+    if _inspector is None and settings.image_inspection_enabled:
+        try:
+            cache = InspectionCache.load(settings.image_cache_path, settings.image_cache_entries)
+        except FileNotFoundError:
+            cache = InspectionCache(settings.image_cache_entries)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Cannot load image cache %s (%s); starting empty", settings.image_cache_path, e)
+            cache = InspectionCache(settings.image_cache_entries)
+
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.image_fetch_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.image_pool_size,
+                max_keepalive_connections=settings.image_pool_size
+            ),
+            follow_redirects=False,  # ImageInspector ตามเองเพื่อตรวจทุก hop
+            headers={"User-Agent": "SwiftWork-ImageInspector/1.0"}
+        )
+        guard = URLGuard(settings.image_allowed_hosts, settings.image_allow_private_hosts)
+        _inspector = ImageInspector(
+            client, cache, settings.image_cache_ttl_seconds, settings.image_max_header_bytes, guard
+        )
+    return _inspector
+
+async def close_image_inspector() -> None:
+    """บันทึก cache ลงดิสก์และปิด connection pool (เรียกตอน shutdown)"""
+    global _inspector
+    if _inspector is None:
+        return
+    if _inspector.cache.dirty:
+        try:
+            _inspector.cache.save(get_settings().image_cache_path)
+        except OSError as e:
+            logger.warning("Cannot save image cache (%s)", e)
+    await _inspector.client.aclose()
+    _inspector = None
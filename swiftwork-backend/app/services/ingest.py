@@ -0,0 +1,52 @@
+"""
+เพิ่ม listing ที่ผ่านการตรวจเข้า corpus ที่เชื่อถือได้ (POST /api/admin/listings ต้องมี ADMIN_TOKEN)
+- เขียนลง corpus ก่อน แล้วค่อยเพิ่มเข้า index ราคาและตาราง df ของคำ ทีละรายการ และบันทึกพร้อม corpus_version ใหม่
+- index ที่ไม่ตรงกับ corpus ก่อนเขียน (worker อื่นเพิ่งเขียน) ถูกสร้างใหม่จาก corpus ทั้งไฟล์แทน
+- worker อื่นและ category index เห็นรายการใหม่เมื่อ restart (corpus_version ไม่ตรง = สร้างใหม่)
+"""
+from app.config import get_settings
+from app.services.corpus import append_listings, corpus_version, vet_listing
+from app.services.keywords import document_text, get_keyword_index, rebuild_keyword_index, save_keyword_index
+from app.services.price_index import get_price_index, rebuild_price_index, save_price_index
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+def ingest_listings(items: List[Any]) -> Dict:
+    """ตรวจและเพิ่ม listing เข้า corpus + index คืนจำนวนที่รับและ error ของแต่ละรายการที่ไม่ผ่าน"""
+    settings = get_settings()
+    accepted: List[Dict] = []
+    errors: List[Dict] = []
+    for index, raw in enumerate(items):
+        try:
+            accepted.append(vet_listing(raw))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    if not accepted:
+        return {"accepted": 0, "errors": errors}
+
+    price_index = get_price_index()
+    keyword_index = get_keyword_index()
+    current = corpus_version(settings.corpus_path)
+    price_in_sync = price_index.source_version == current
+    keywords_in_sync = keyword_index.source_version == current
+    version = append_listings(settings.corpus_path, accepted)
+
+    if price_in_sync:
+        price_index.add_many(accepted, settings.price_index_max_per_group)
+        price_index.source_version = version
+    else:
+        logger.info("Price index is behind the corpus; rebuilding instead of adding %d listings", len(accepted))
+        rebuild_price_index()
+    if keywords_in_sync:
+        for listing in accepted:
+            keyword_index.add_document(document_text(listing))
+        keyword_index.source_version = version
+        keyword_index.dirty = True
+    else:
+        logger.info("Keyword index is behind the corpus; rebuilding instead of adding %d listings", len(accepted))
+        rebuild_keyword_index()
+    save_price_index()
+    save_keyword_index()
+    return {"accepted": len(accepted), "errors": errors}
@@ -0,0 +1,217 @@
+"""
+ดึงคีย์เวิร์ดจากคำอธิบายด้วย TF-IDF เทียบกับ corpus ของ listing
+ตาราง document frequency (จำนวน listing ที่มีแต่ละคำ) สร้างจาก corpus ที่เชื่อถือได้แล้ว persist ลงดิสก์
+พร้อม corpus_version (ไม่ตรงกับ corpus ปัจจุบัน = สร้างใหม่) และนับเพิ่มทีละ listing จาก admin ingest (app.services.ingest)
+ไม่นับข้อความจาก request - คำศัพท์จะโตไม่สิ้นสุดและ client ปั่นน้ำหนักคำได้
+
+- 1 request: ตัดคำ (cache แล้ว) + dict lookup ต่อคำ -> ไม่ถึง 1ms
+- ทั้ง catalog: สร้าง sparse matrix (listing x คำ) ครั้งเดียว คำนวณ df/น้ำหนักแบบ vectorized
+
+    pip install -r requirements-bulk.txt  # numpy/scipy ใช้เฉพาะแบบทั้ง catalog
+    python -m app.services.keywords catalog.ndjson -o tags.ndjson
+"""
+from app.config import get_settings
+from app.services.corpus import corpus_version, iter_listings
+from app.services.thai_tokenizer import keyword_tokens
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import json
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2  # 2: ไม่มีข้อความจาก request (ไฟล์ v1 อาจมี) -> สร้างใหม่จาก corpus
+
+def document_text(listing: Dict) -> str:
+    """ข้อความของ listing ที่นับเป็น 1 document (ชื่องาน + คำอธิบาย + tags)"""
+    return " ".join([listing.get("title") or "", listing.get("description") or ""] + list(listing.get("tags") or []))
+
+def _term_counts(text: Optional[str]) -> Dict[str, List]:
+    """term (lowercase) -> [จำนวนครั้ง, รูปคำที่พบครั้งแรก] ตามลำดับที่พบ"""
+    counts: Dict[str, List] = {}
+    for token in keyword_tokens(text):
+        entry = counts.get(token.lower())
+        if entry is None:
+            counts[token.lower()] = [1, token]
+        else:
+            entry[0] += 1
+    return counts
+
+class KeywordIndex:
+    def __init__(self, doc_count: int = 0, doc_freq: Optional[Dict[str, int]] = None, source_version: Optional[str] = None):
+        self.doc_count = doc_count
+        self.doc_freq: Dict[str, int] = doc_freq or {}
+        self.source_version = source_version
+        self.dirty = False
+
+    def idf(self, term: str) -> float:
+        """smoothed idf: คำที่ไม่เคยพบใน corpus ได้น้ำหนักสูงสุด"""
+        return math.log((1 + self.doc_count) / (1 + self.doc_freq.get(term, 0))) + 1.0
+
+    def add_document(self, text: Optional[str]) -> None:
+        """นับ document ของ corpus 1 รายการเข้าตาราง df (ตอน build และ listing ที่ ingest เข้า corpus แล้วเท่านั้น)"""
+        terms = _term_counts(text)
+        if not terms:
+            return
+        self.doc_count += 1
+        for term in terms:
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+        self.dirty = True
+
+    def top_keywords(self, text: Optional[str], k: int) -> List[str]:
+        """k คำที่มีน้ำหนัก TF-IDF สูงสุดใน text (เท่ากันเรียงตามลำดับที่พบ)"""
+        terms = _term_counts(text)
+        scored = [
+            ((1 + math.log(count)) * self.idf(term), -position, surface)
+            for position, (term, (count, surface)) in enumerate(terms.items())
+        ]
+        scored.sort(reverse=True)
+        return [surface for _, _, surface in scored[:k]]
+
+    def bulk_top_keywords(self, texts: Sequence[Optional[str]], k: int, refresh_frequencies: bool = False) -> List[List[str]]:
+        """
+        top_keywords ของหลาย text พร้อมกันด้วย sparse matrix
+        refresh_frequencies=True จะแทนตาราง df ด้วยค่าที่นับจาก texts ชุดนี้ (คำนวณ catalog ใหม่ทั้งหมด)
+        ต้องติดตั้ง numpy/scipy (requirements-bulk.txt) - server ไม่ได้ใช้จึงไม่อยู่ใน requirements.txt
+        """
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError as e:
+            raise RuntimeError("bulk_top_keywords needs numpy and scipy: pip install -r requirements-bulk.txt") from e
+
+        vocabulary: Dict[str, int] = {}
+        surfaces: List[List[str]] = []
+        indptr, indices, counts = [0], [], []
+        for text in texts:
+            row_surfaces = []
+            for term, (count, surface) in _term_counts(text).items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+                row_surfaces.append(surface)
+            surfaces.append(row_surfaces)
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(texts), len(vocabulary))
+        )
+        terms = list(vocabulary)
+
+        if refresh_frequencies:
+            # แต่ละแถวมีคำไม่ซ้ำ -> df = จำนวนครั้งที่ column ปรากฏใน indices
+            doc_freq = np.bincount(matrix.indices, minlength=len(vocabulary))
+            self.doc_count = int(np.count_nonzero(np.diff(matrix.indptr)))
+            self.doc_freq = {term: int(df) for term, df in zip(terms, doc_freq)}
+            self.dirty = True
+
+        idf = np.fromiter((self.idf(term) for term in terms), dtype=np.float64, count=len(terms))
+        # คำนวณบน data โดยตรง (ไม่ผ่าน matrix product) เพื่อคงลำดับ column ตามลำดับที่พบในแต่ละแถว
+        weights = (1 + np.log(matrix.data)) * idf[matrix.indices]
+
+        results = []
+        for row, row_surfaces in enumerate(surfaces):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            order = np.argsort(-weights[start:end], kind="stable")[:k]
+            results.append([row_surfaces[i] for i in order])
+        return results
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "source_version": self.source_version,
+            "doc_count": self.doc_count,
+            "doc_freq": self.doc_freq
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "KeywordIndex":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"unsupported keyword index version: {payload.get('version')}")
+        return cls(payload["doc_count"], payload["doc_freq"], payload.get("source_version"))
+
+    @classmethod
+    def build_from_corpus(cls, corpus_path: Path) -> "KeywordIndex":
+        """สร้างตาราง df จากไฟล์ NDJSON ของ listing"""
+        index = cls(source_version=corpus_version(corpus_path))
+        for listing in iter_listings(corpus_path):
+            index.add_document(document_text(listing))
+        index.dirty = True
+        return index
+
+_keyword_index: Optional[KeywordIndex] = None
+
+def get_keyword_index(
+    index_path: Optional[Path] = None,
+    corpus_path: Optional[Path] = None
+) -> KeywordIndex:
+    """
+    index กลางของ process
+    โหลดจากไฟล์ที่ serialize ไว้ถ้ายังตรงกับ corpus ไม่งั้นสร้างใหม่จาก corpus (บันทึกตอน shutdown)
+    """
+    global _keyword_index
+    if _keyword_index is None:
+        settings = get_settings()
+        index_path = index_path or settings.keyword_index_path
+        corpus_path = corpus_path or settings.corpus_path
+        index = None
+        try:
+            index = KeywordIndex.load(index_path)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning("Cannot load keyword index %s (%s); rebuilding from corpus", index_path, e)
+
+        if index is None or index.source_version != corpus_version(corpus_path):
+            index = KeywordIndex.build_from_corpus(corpus_path)
+        _keyword_index = index
+    return _keyword_index
+
+def rebuild_keyword_index(corpus_path: Optional[Path] = None) -> KeywordIndex:
+    """แทน index กลางด้วย index ที่สร้างใหม่จาก corpus ทั้งไฟล์"""
+    global _keyword_index
+    _keyword_index = KeywordIndex.build_from_corpus(corpus_path or get_settings().corpus_path)
+    return _keyword_index
+
+def save_keyword_index(index_path: Optional[Path] = None) -> None:
+    """บันทึกตาราง df ที่เพิ่งสร้างหรือนับเพิ่มจาก ingest ลงดิสก์ (โหลดจากไฟล์แล้วไม่เปลี่ยน = ไม่มีอะไรให้บันทึก)"""
+    if _keyword_index is not None and _keyword_index.dirty:
+        _keyword_index.save(index_path or get_settings().keyword_index_path)
+
+def main(argv=None) -> int:
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="คำนวณตาราง df ใหม่จาก catalog ทั้งหมด แล้วแนะนำ tags ให้ทุก listing")
+    parser.add_argument("catalog", nargs="?", default=str(get_settings().corpus_path), help="ไฟล์ NDJSON ของ listing")
+    parser.add_argument("-o", "--output", help="ไฟล์ NDJSON ของ tags ที่แนะนำ (ค่าเริ่มต้น: ไม่เขียน)")
+    parser.add_argument("-k", type=int, default=5, help="จำนวน tags ต่อ listing")
+    parser.add_argument("--index", default=str(get_settings().keyword_index_path), help="ไฟล์ index ที่จะบันทึก")
+    args = parser.parse_args(argv)
+
+    listings = list(iter_listings(Path(args.catalog)))
+    # version ของ catalog ที่ใช้สร้าง: server ใช้ไฟล์นี้ต่อเมื่อ catalog คือ CORPUS_PATH ที่ยังไม่ถูกแก้
+    index = KeywordIndex(source_version=corpus_version(Path(args.catalog)))
+    index.bulk_top_keywords([document_text(l) for l in listings], 0, refresh_frequencies=True)
+    index.save(Path(args.index))
+
+    if args.output:
+        suggested = index.bulk_top_keywords([l.get("description") for l in listings], args.k)
+        with open(args.output, "w", encoding="utf-8") as f:
+            for listing, tags in zip(listings, suggested):
+                f.write(json.dumps({"title": listing.get("title"), "tags": tags}, ensure_ascii=False) + "\n")
+
+    print(json.dumps({"documents": index.doc_count, "terms": len(index.doc_freq)}), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,283 @@
+"""
+Client สำหรับเรียก LLM (สร้างคำแนะนำ / ai_fix) แบบ async
+
+- backend เลือกด้วย LLM_BACKEND: "none" (ไม่ใช้ LLM), "fake" (ตอบเองใน process ใช้ทดสอบ), "openai"
+- prompt ที่เหมือนกันและกำลังรอผลอยู่ จะรวมเป็นการเรียก upstream ครั้งเดียว
+- ผลลัพธ์ cache ตาม hash ของ prompt (มี TTL) - request ซ้ำจาก extension ไม่เสียเงิน/เวลาซ้ำ
+- token bucket จำกัดจำนวนการเรียก upstream ต่อวินาที (burst ได้ไม่เกิน LLM_BURST)
+- complete_many ส่งหลาย prompt ใน upstream call เดียว (ใช้ token เดียว) สำหรับ micro-batching
+"""
+from app.config import Settings, get_settings
+from app.services.cache import TTLCache
+from typing import Dict, List, Optional, Sequence, Set, Union
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "คุณเป็นผู้เชี่ยวชาญการขายบริการบน Fastwork "
+    "ตอบเป็นภาษาไทย กระชับ นำไปใช้ได้ทันที ไม่เกิน 3 ประโยค"
+)
+
+class LLMBackend:
+    """interface ของ backend: รับ prompt คืนข้อความคำตอบ"""
+    name = "base"
+    max_batch_size: Optional[int] = None  # prompt สูงสุดต่อ complete_many (None = ไม่จำกัด)
+
+    async def complete(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def complete_many(self, prompts: Sequence[str]) -> List[str]:
+        """คำตอบของหลาย prompt ตามลำดับ (ค่าเริ่มต้น: เรียกทีละ prompt พร้อมกัน)"""
+        return list(await asyncio.gather(*(self.complete(p) for p in prompts)))
+
+    async def aclose(self) -> None:
+        pass
+
+class FakeBackend(LLMBackend):
+    """backend ปลอมสำหรับทดสอบ/benchmark: หน่วงเวลาเหมือน network แล้วตอบแบบ deterministic"""
+    name = "fake"
+
+    def __init__(self, latency_seconds: float = 0.05):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        return self._answer(prompt)
+
+    async def complete_many(self, prompts: Sequence[str]) -> List[str]:
+        # 1 call = หน่วงครั้งเดียวเหมือนส่งหลายคำถามใน prompt เดียว
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        return [self._answer(p) for p in prompts]
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest()
+        return f"[fake-{digest}] {prompt.splitlines()[0][:80]}"
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(
+        self, api_key: str, model: str, max_tokens: int, timeout_seconds: float,
+        base_url: Optional[str] = None, max_completion_tokens: int = 4096
+    ):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout_seconds, max_retries=1)
+        self.model = model
+        self.max_tokens = min(max_tokens, max_completion_tokens)
+        self.max_completion_tokens = max_completion_tokens
+        # คำตอบรวมของ batch ต้องไม่เกินเพดาน completion ของ model (เกิน = upstream ปฏิเสธทั้ง call)
+        self.max_batch_size = max(1, max_completion_tokens // self.max_tokens)
+
+    async def _chat(self, content: str, max_tokens: int) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.4
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    async def complete(self, prompt: str) -> str:
+        return await self._chat(prompt, self.max_tokens)
+
+    async def complete_many(self, prompts: Sequence[str]) -> List[str]:
+        """รวมหลายคำถามเป็น prompt เดียว ให้ตอบเป็น JSON array ตามลำดับ"""
+        if len(prompts) == 1:
+            return [await self.complete(prompts[0])]
+        max_tokens = min(self.max_tokens * len(prompts), self.max_completion_tokens)
+        text = await self._chat(batch_prompt(prompts), max_tokens)
+        return parse_batch_answer(text, len(prompts))
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+BATCH_HEADER = "ตอบคำขอ {count} ข้อต่อไปนี้แยกกัน ส่งกลับเป็น JSON array ของข้อความ {count} รายการตามลำดับข้อ เท่านั้น"
+
+def batch_prompt(prompts: Sequence[str]) -> str:
+    parts = [BATCH_HEADER.format(count=len(prompts))]
+    parts.extend(f"### {i}\n{prompt}" for i, prompt in enumerate(prompts, 1))
+    return "\n\n".join(parts)
+
+def parse_batch_answer(text: str, count: int) -> List[str]:
+    """แยกคำตอบของ batch_prompt (raise ValueError ถ้ารูปแบบไม่ตรง - ผู้เรียกจะใช้ fallback)"""
+    start, end = text.find("["), text.rfind("]")
+    answers = json.loads(text[start:end + 1]) if start != -1 and end > start else None
+    if not isinstance(answers, list) or len(answers) != count:
+        raise ValueError(f"expected a JSON array of {count} answers")
+    return [str(answer).strip() for answer in answers]
+
+class TokenBucket:
+    """rate limit แบบ token bucket: เติม rate token ต่อวินาที เก็บได้ไม่เกิน capacity"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """รอจนได้ 1 token (ผู้รอถูกปล่อยตามลำดับเพราะถือ lock ระหว่างรอ)"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+class LLMClient:
+    def __init__(self, backend: LLMBackend, cache: TTLCache, bucket: TokenBucket, timeout_seconds: float):
+        self.backend = backend
+        self.cache = cache
+        self.bucket = bucket
+        self.timeout_seconds = timeout_seconds
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._calls: Set[asyncio.Task] = set()  # อ้างอิง task ไว้กันถูก garbage collect ระหว่างรอ
+        self.upstream_calls = 0
+        self.upstream_prompts = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def cached(self, prompt: str) -> Optional[str]:
+        return self.cache.get(prompt_key(prompt))
+
+    async def complete(self, prompt: str) -> str:
+        """
+        คำตอบของ prompt: จาก cache, จากการเรียกที่กำลังรออยู่ (prompt เดียวกัน), หรือเรียก backend ใหม่
+        error/timeout ถูกส่งต่อให้ผู้เรียกทุกคนที่รอ prompt นั้น (ไม่ cache)
+        """
+        result = (await self.complete_many([prompt]))[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def complete_many(self, prompts: Sequence[str]) -> List[Union[str, BaseException]]:
+        """
+        เหมือน complete แต่หลาย prompt: ที่ไม่อยู่ใน cache/ไม่มีใครกำลังรอ ถูกส่งใน upstream call เดียว
+        คืนคำตอบหรือ exception ของแต่ละ prompt ตามลำดับ
+        """
+        futures: List[asyncio.Future] = []
+        missing: Dict[str, str] = {}
+        loop = asyncio.get_running_loop()
+        for prompt in prompts:
+            key = prompt_key(prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                future = loop.create_future()
+                future.set_result(cached)
+            elif key in self._inflight:
+                self.coalesced += 1
+                future = self._inflight[key]
+            else:
+                future = self._inflight[key] = loop.create_future()
+                future.add_done_callback(lambda done, key=key: self._finished(key, done))
+                missing[key] = prompt
+            futures.append(future)
+
+        # แบ่งเป็นหลาย upstream call ถ้าเกินที่ backend รับได้ต่อ call
+        keys = list(missing)
+        chunk_size = self.backend.max_batch_size or len(keys) or 1
+        for start in range(0, len(keys), chunk_size):
+            call = asyncio.ensure_future(self._call({key: missing[key] for key in keys[start:start + chunk_size]}))
+            self._calls.add(call)
+            call.add_done_callback(self._calls.discard)
+        # shield: ผู้รอคนหนึ่งถูกยกเลิก ไม่ทำให้การเรียกของคนอื่นถูกยกเลิกไปด้วย
+        return list(await asyncio.gather(*(asyncio.shield(f) for f in futures), return_exceptions=True))
+
+    def _finished(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # ผู้รอทุกคนอาจถูกยกเลิกไปแล้ว - กัน warning "exception was never retrieved"
+
+    async def _call(self, missing: Dict[str, str]) -> None:
+        futures = [self._inflight[key] for key in missing]
+        try:
+            # timeout นับรวมเวลารอ token - burst ใหญ่ไม่ทำให้ผู้รอค้างนานเกิน LLM_TIMEOUT_SECONDS
+            texts = await asyncio.wait_for(self._limited(list(missing.values())), self.timeout_seconds)
+            if len(texts) != len(futures):
+                # จับคู่คำตอบกับ prompt ไม่ได้ - ไม่ cache และทุก prompt ของ call นี้ใช้ fallback (ไม่ค้างรอตลอดไป)
+                raise ValueError(f"{self.backend.name} backend returned {len(texts)} answers for {len(futures)} prompts")
+        except Exception as e:
+            self.errors += 1
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future, text in zip(missing, futures, texts):
+            self.cache.set(key, text)
+            if not future.done():
+                future.set_result(text)
+
+    async def _limited(self, prompts: List[str]) -> List[str]:
+        await self.bucket.acquire()
+        self.upstream_calls += 1
+        self.upstream_prompts += len(prompts)
+        if len(prompts) == 1:
+            return [await self.backend.complete(prompts[0])]
+        return await self.backend.complete_many(prompts)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend.name,
+            "upstream_calls": self.upstream_calls,
+            "upstream_prompts": self.upstream_prompts,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "inflight": len(self._inflight),
+            "cache": self.cache.stats()
+        }
+
+def create_backend(settings: Settings) -> Optional[LLMBackend]:
+    if settings.llm_backend == "fake":
+        return FakeBackend(settings.llm_fake_latency_seconds)
+    if settings.llm_backend == "openai":
+        return OpenAIBackend(
+            settings.openai_api_key, settings.llm_model, settings.llm_max_tokens,
+            settings.llm_timeout_seconds, settings.llm_base_url, settings.llm_max_completion_tokens
+        )
+    return None
+
+_client: Optional[LLMClient] = None
+
+def get_llm_client() -> Optional[LLMClient]:
+    """client กลางของ process (None ถ้า LLM_BACKEND=none)"""
+    global _client
+    if _client is None:
+        settings = get_settings()
+        backend = create_backend(settings)
+        if backend is None:
+            return None
+        _client = LLMClient(
+            backend,
+            TTLCache(settings.llm_cache_entries, settings.llm_cache_ttl_seconds),
+            TokenBucket(settings.llm_rate_per_second, settings.llm_burst),
+            settings.llm_timeout_seconds
+        )
+    return _client
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.backend.aclose()
+        _client = None
@@ -0,0 +1,192 @@
+"""
+Histogram เวลา (และ allocation ถ้าเปิด) ของแต่ละหัวข้อการวิเคราะห์และแต่ละ request
+แสดงผลในรูปแบบ Prometheus text ที่ /metrics
+
+เปิด/ปิดด้วย METRICS_ENABLED และ METRICS_TRACE_ALLOCATIONS (app.config)
+ถ้าปิด instrument() คืนฟังก์ชันเดิมโดยไม่ห่อ -> ไม่มี overhead บน hot path เลย
+"""
+from app.config import get_settings
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+import time
+import tracemalloc
+
+# หัวข้อ inline ใช้ไม่กี่ไมโครวินาที ส่วนหัวข้อที่ดึงภาพรอได้ถึง TOPIC_TIMEOUT_SECONDS (2s)
+DURATION_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5
+)
+# ทั้ง request: cache hit ไม่ถึง 1ms แต่ miss ที่ดึงภาพ + ให้ LLM เขียน ai_fix ใช้ 0.1-4s (LLM timeout 10s)
+REQUEST_DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ALLOC_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """histogram แบบ bucket คงที่ (upper bound inclusive) เก็บเป็นจำนวนต่อ bucket ไม่ใช่สะสม"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # ช่องสุดท้าย = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+class HistogramFamily:
+    """histogram หลายชุดภายใต้ชื่อ metric เดียว แยกตาม label"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.children: Dict[str, Histogram] = {}
+
+    def labels(self, value: str) -> Histogram:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = Histogram(self.buckets)
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for value, histogram in sorted(self.children.items()):
+            label = f'{self.label}="{value}"'
+            for bound, total in histogram.cumulative():
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {total}')
+            lines.append(f"{self.name}_sum{{{label}}} {histogram.sum}")
+            lines.append(f"{self.name}_count{{{label}}} {histogram.count}")
+        return lines
+
+class CounterFamily:
+    """counter (ค่าสะสม) หลายชุดภายใต้ชื่อ metric เดียว แยกตาม label"""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.children: Dict[str, float] = {}
+
+    def inc(self, value: str, amount: float = 1) -> None:
+        self.children[value] = self.children.get(value, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for value, total in sorted(self.children.items()):
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {total}')
+        return lines
+
+topic_duration = HistogramFamily(
+    "swiftwork_topic_duration_seconds", "Wall time of each analyze_* topic function", "topic", DURATION_BUCKETS
+)
+topic_alloc = HistogramFamily(
+    "swiftwork_topic_alloc_bytes", "Net bytes allocated by each analyze_* topic function (tracemalloc)", "topic", ALLOC_BUCKETS
+)
+request_duration = HistogramFamily(
+    "swiftwork_analysis_duration_seconds", "Wall time of analyze_product by cache outcome", "cache", REQUEST_DURATION_BUCKETS
+)
+request_alloc = HistogramFamily(
+    "swiftwork_analysis_alloc_bytes", "Net bytes allocated by analyze_product by cache outcome (tracemalloc)", "cache", ALLOC_BUCKETS
+)
+compression_duration = HistogramFamily(
+    "swiftwork_compression_duration_seconds", "Time spent compressing one response body", "encoding", DURATION_BUCKETS
+)
+compression_input_bytes = CounterFamily(
+    "swiftwork_compression_input_bytes_total", "Response bytes before compression", "encoding"
+)
+compression_output_bytes = CounterFamily(
+    "swiftwork_compression_output_bytes_total", "Response bytes after compression", "encoding"
+)
+compression_saved_bytes = CounterFamily(
+    "swiftwork_compression_saved_bytes_total", "Response bytes saved by compression", "encoding"
+)
+analysis_singleflight = CounterFamily(
+    "swiftwork_analysis_singleflight_total",
+    "Cache misses that started an analysis (leader) or joined an identical in-flight one (shared)",
+    "role"
+)
+FAMILIES = (
+    topic_duration, topic_alloc, request_duration, request_alloc,
+    compression_duration, compression_input_bytes, compression_output_bytes, compression_saved_bytes,
+    analysis_singleflight
+)
+
+def metrics_enabled() -> bool:
+    return get_settings().metrics_enabled
+
+def trace_allocations() -> bool:
+    settings = get_settings()
+    return settings.metrics_enabled and settings.metrics_trace_allocations
+
+def start() -> None:
+    """เริ่ม tracemalloc ถ้าเปิดการวัด allocation (เรียกตอน startup)"""
+    if trace_allocations() and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def instrument(topic: str) -> Callable[[Callable], Callable]:
+    """decorator สำหรับ analyze_* : บันทึกเวลา (และ allocation) ต่อครั้งลง histogram ของหัวข้อ"""
+    def decorator(fn: Callable) -> Callable:
+        if not metrics_enabled():
+            return fn
+
+        duration = topic_duration.labels(topic)
+        if not trace_allocations():
+            @wraps(fn)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    duration.observe(time.perf_counter() - started)
+            return timed
+
+        alloc = topic_alloc.labels(topic)
+
+        @wraps(fn)
+        def traced(*args, **kwargs):
+            before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                duration.observe(time.perf_counter() - started)
+                alloc.observe(max(0, tracemalloc.get_traced_memory()[0] - before))
+        return traced
+    return decorator
+
+class RequestTimer:
+    """จับเวลา analyze_product 1 ครั้ง (สร้างเฉพาะเมื่อเปิด metrics)"""
+    __slots__ = ("started", "alloc_before")
+
+    def __init__(self):
+        self.alloc_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.started = time.perf_counter()
+
+    def finish(self, cache: str) -> None:
+        request_duration.labels(cache).observe(time.perf_counter() - self.started)
+        if self.alloc_before is not None:
+            request_alloc.labels(cache).observe(max(0, tracemalloc.get_traced_memory()[0] - self.alloc_before))
+
+def record_compression(encoding: str, before: int, after: int, seconds: float) -> None:
+    compression_duration.labels(encoding).observe(seconds)
+    compression_input_bytes.inc(encoding, before)
+    compression_output_bytes.inc(encoding, after)
+    compression_saved_bytes.inc(encoding, before - after)
+
+def render() -> str:
+    lines: List[str] = []
+    for family in FAMILIES:
+        if family.children:
+            lines.extend(family.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,165 @@
+"""
+Pipeline วิเคราะห์ไฟล์ NDJSON ขนาดใหญ่ (1 บรรทัด = 1 ProductData)
+อ่านทีละบรรทัด วิเคราะห์แบบ sliding window แล้วเขียนผล NDJSON ออกตามลำดับ input
+memory ที่ใช้ขึ้นกับขนาด window x PIPELINE_MAX_LINE_BYTES เท่านั้น ไม่ขึ้นกับขนาดไฟล์
+(บรรทัดที่ยาวเกินถูกทิ้งระหว่างอ่านและได้ error ของบรรทัดนั้นแทน)
+"""
+from app.api.responses import model_json
+from app.config import get_settings
+from app.services.admission import AdmissionController, ItemQuota
+from app.services.batch import analyze_item
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Optional, Union
+import asyncio
+import json
+import time
+
+class PipelineStats:
+    """สถิติของการรัน pipeline 1 ครั้ง"""
+
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def records_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "records": self.records,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "records_per_second": round(self.records_per_second, 1)
+        }
+
+def summary_record(stats: PipelineStats) -> bytes:
+    """บรรทัดสุดท้ายของ response NDJSON: {"summary": จำนวนรายการ, error, เวลา, รายการ/วินาที}"""
+    return json.dumps({"summary": stats.summary()}).encode("utf-8") + b"\n"
+
+class OversizedLine:
+    """บรรทัดที่ยาวเกิน limit byte - เนื้อหาถูกทิ้งระหว่างอ่าน เหลือแค่ขนาด"""
+    __slots__ = ("size", "limit")
+
+    def __init__(self, size: int, limit: int):
+        self.size = size
+        self.limit = limit
+
+    @property
+    def error(self) -> str:
+        return f"line too long: {self.size} bytes (max {self.limit})"
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[Union[bytes, OversizedLine]]:
+    """
+    แปลง stream ของ chunk (เช่น request body) เป็นทีละบรรทัด
+    บรรทัดที่ยาวเกิน max_line_bytes ได้ OversizedLine แทน (ไม่เก็บเนื้อหา - memory ไม่โตตามขนาดบรรทัด)
+    """
+    buffer = bytearray()  # ต้นบรรทัดที่ยังไม่จบใน chunk ก่อนหน้า
+    skipped = 0  # > 0 = กำลังทิ้งบรรทัดที่ยาวเกิน (นับ byte ที่ทิ้งไปแล้ว)
+    async for chunk in chunks:
+        *lines, tail = chunk.split(b"\n")
+        for line in lines:
+            # มีแค่บรรทัดแรกของ chunk ที่ต่อจาก buffer/skipped
+            if skipped:
+                yield OversizedLine(skipped + len(line), max_line_bytes)
+                skipped = 0
+                continue
+            if buffer:
+                buffer += line
+                line = bytes(buffer)
+                buffer.clear()
+            yield line if len(line) <= max_line_bytes else OversizedLine(len(line), max_line_bytes)
+        if skipped:
+            skipped += len(tail)
+        else:
+            buffer += tail
+            if len(buffer) > max_line_bytes:
+                skipped = len(buffer)
+                buffer = bytearray()
+    if skipped:
+        yield OversizedLine(skipped, max_line_bytes)
+    elif buffer:
+        yield bytes(buffer)
+
+async def iter_file_chunks(file: BinaryIO, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """อ่านไฟล์แบบ sync ทีละ chunk ให้ใช้กับ iter_lines ได้ (เช่นไฟล์ NDJSON ใน CLI)"""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+async def _parse_and_analyze(
+    line_no: int,
+    line: bytes,
+    admission: Optional[AdmissionController],
+    quota: Optional[ItemQuota]
+):
+    try:
+        raw = json.loads(line)
+    except ValueError as e:
+        return line_no, None, f"invalid JSON: {e}"
+    if not isinstance(raw, dict):
+        return line_no, None, "invalid JSON: expected an object"
+
+    item = await analyze_item(line_no, raw, admission, quota)
+    return line_no, item.result, item.error
+
+def _encode(line_no: int, result, error) -> bytes:
+    if error is not None:
+        return json.dumps({"line": line_no, "error": error}, ensure_ascii=False).encode("utf-8") + b"\n"
+    return model_json(result) + b"\n"
+
+async def analyze_ndjson(
+    lines: AsyncIterable[Union[bytes, OversizedLine]],
+    stats: PipelineStats,
+    window: Optional[int] = None,
+    admission: Optional[AdmissionController] = None,
+    quota: Optional[ItemQuota] = None
+) -> AsyncIterator[bytes]:
+    """
+    วิเคราะห์ทุกบรรทัดและ yield ผล NDJSON ตามลำดับ input
+    - บรรทัดว่างถูกข้าม
+    - บรรทัดที่ผิดพลาด (รวม OversizedLine จาก iter_lines) จะได้ {"line": n, "error": "..."} แทน AnalysisResponse
+    - admission = แต่ละบรรทัดเข้าคิวงานวิเคราะห์ของ process (ใช้กับ endpoint; CLI ไม่ต้องส่ง)
+    - quota = แต่ละบรรทัดจ่าย rate limit ของ client ที่อัปโหลด 1 token (ใช้กับ endpoint)
+    """
+    window = max(1, window or get_settings().pipeline_window)
+    in_flight = deque()
+
+    async def emit_oldest() -> bytes:
+        line_no, result, error = await in_flight.popleft()
+        stats.records += 1
+        if error is not None:
+            stats.errors += 1
+        return _encode(line_no, result, error)
+
+    try:
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if isinstance(line, OversizedLine):
+                rejected = asyncio.get_running_loop().create_future()
+                rejected.set_result((line_no, None, line.error))
+                in_flight.append(rejected)
+            elif not line.strip():
+                continue
+            else:
+                in_flight.append(asyncio.ensure_future(_parse_and_analyze(line_no, line, admission, quota)))
+            if len(in_flight) >= window:
+                yield await emit_oldest()
+
+        while in_flight:
+            yield await emit_oldest()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        stats.finished_at = time.perf_counter()
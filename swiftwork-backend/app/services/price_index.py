@@ -0,0 +1,205 @@
+"""
+Index การกระจายตัวของราคาแยกตามหมวดหมู่/หมวดหมู่ย่อย
+ราคาแต่ละกลุ่มเก็บเป็น array('d') ที่เรียงแล้ว -> หา percentile ได้ด้วย binary search (O(log n))
+สร้างจาก corpus ที่เชื่อถือได้ (CORPUS_PATH) แล้ว persist ลงดิสก์เพื่อโหลดเร็วตอน startup
+ไฟล์ที่ corpus_version ไม่ตรงกับ corpus ปัจจุบันถูกสร้างใหม่ (เหมือน category_index)
+เพิ่มทีละรายการได้ด้วย add/add_many (insort) เฉพาะ listing จาก admin ingest ที่เขียนลง corpus แล้ว
+ไม่เรียนจาก request - ราคาจาก client ปลอมได้
+แต่ละกลุ่มเก็บไม่เกิน PRICE_INDEX_MAX_PER_GROUP ราคา (เกินแล้วสุ่มแบบ reservoir ให้เป็นตัวแทนของทุกราคาที่เคยเพิ่ม)
+"""
+from app.config import get_settings
+from app.services.corpus import corpus_version, iter_listings
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import base64
+import json
+import logging
+import os
+import random
+import sys
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2  # 2: ไม่มีราคาจาก request (ไฟล์ v1 อาจมี) -> สร้างใหม่จาก corpus
+
+def _group_key(category: str, subcategory: Optional[str] = None) -> str:
+    key = category.strip().lower()
+    if subcategory:
+        key += " > " + subcategory.strip().lower()
+    return key
+
+def _downsample(prices: List[float], limit: int) -> List[float]:
+    """limit ค่าที่ห่างกันเท่า ๆ กันจากราคาที่เรียงแล้ว (percentile คลาดจากเดิมไม่เกิน 1/limit)"""
+    if len(prices) <= limit:
+        return prices
+    step = (len(prices) - 1) / (limit - 1)
+    return [prices[round(i * step)] for i in range(limit)]
+
+class PriceDistribution:
+    """มุมมองแบบอ่านอย่างเดียวของราคาในกลุ่มเดียว"""
+
+    def __init__(self, key: str, prices: array):
+        self.key = key
+        self.prices = prices
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def percentile_rank(self, price: float) -> float:
+        """สัดส่วนของ listing ที่ราคาต่ำกว่า price (0.0 - 1.0) นับราคาเท่ากันเป็นครึ่งหนึ่ง"""
+        n = len(self.prices)
+        below = bisect_left(self.prices, price)
+        equal = bisect_right(self.prices, price, lo=below) - below
+        return (below + equal / 2) / n
+
+    def quantile(self, q: float) -> float:
+        """ค่าราคาที่ quantile q (nearest-rank)"""
+        n = len(self.prices)
+        return self.prices[min(n - 1, max(0, round(q * (n - 1))))]
+
+def _group_keys(category: str, subcategory: Optional[str]) -> List[str]:
+    keys = [_group_key(category)]
+    if subcategory:
+        keys.append(_group_key(category, subcategory))
+    return keys
+
+class PriceIndex:
+    def __init__(self, source_version: Optional[str] = None):
+        self._groups: Dict[str, array] = {}
+        self._seen: Dict[str, int] = {}  # จำนวนราคาที่เคยเข้ากลุ่ม (รวมที่ถูกสุ่มทิ้ง) สำหรับ reservoir sampling
+        self._random = random.Random()
+        self.source_version = source_version
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return sum(len(prices) for key, prices in self._groups.items() if " > " not in key)
+
+    def distribution(
+        self,
+        category: Optional[str],
+        subcategory: Optional[str] = None,
+        min_samples: int = 1
+    ) -> Optional[PriceDistribution]:
+        """กลุ่มที่เฉพาะเจาะจงที่สุดที่มีข้อมูลอย่างน้อย min_samples (subcategory ก่อน แล้วค่อย category)"""
+        if not category:
+            return None
+        candidates = [_group_key(category)]
+        if subcategory:
+            candidates.insert(0, _group_key(category, subcategory))
+        for key in candidates:
+            prices = self._groups.get(key)
+            if prices is not None and len(prices) >= min_samples:
+                return PriceDistribution(key, prices)
+        return None
+
+    def add(self, category: Optional[str], subcategory: Optional[str], price: Optional[float], max_per_group: int) -> None:
+        """
+        เพิ่มราคาของ listing ที่เชื่อถือได้ 1 รายการ (insort O(n) ต่อกลุ่ม)
+        กลุ่มที่เต็มแล้ว: ราคาใหม่แทนที่ราคาเดิมแบบสุ่มด้วยความน่าจะเป็น max_per_group / จำนวนที่เคยเพิ่ม
+        """
+        if not category or not price or price <= 0:
+            return
+        for key in _group_keys(category, subcategory):
+            prices = self._groups.setdefault(key, array("d"))
+            seen = self._seen.get(key, len(prices)) + 1
+            self._seen[key] = seen
+            if len(prices) >= max_per_group:
+                if self._random.randrange(seen) >= max_per_group:
+                    continue
+                del prices[self._random.randrange(len(prices))]
+            insort(prices, float(price))
+        self.dirty = True
+
+    def add_many(self, listings: Iterable[Dict], max_per_group: int) -> None:
+        for listing in listings:
+            self.add(listing.get("category"), listing.get("subcategory"), listing.get("price"), max_per_group)
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "source_version": self.source_version,
+            "byteorder": sys.byteorder,
+            "groups": {key: base64.b64encode(prices.tobytes()).decode("ascii") for key, prices in self._groups.items()},
+            "seen": self._seen
+        }
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceIndex":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"unsupported price index version: {payload.get('version')}")
+
+        index = cls(payload.get("source_version"))
+        index._seen = dict(payload.get("seen") or {})
+        for key, encoded in payload["groups"].items():
+            prices = array("d")
+            prices.frombytes(base64.b64decode(encoded))
+            if payload.get("byteorder") != sys.byteorder:
+                prices.byteswap()
+            index._groups[key] = prices
+        return index
+
+    @classmethod
+    def build_from_corpus(cls, corpus_path: Path, max_per_group: int) -> "PriceIndex":
+        """สร้าง index จากไฟล์ NDJSON ของ listing (ต้องมี category, subcategory, price)"""
+        index = cls(corpus_version(corpus_path))
+        groups: Dict[str, list] = {}
+        for listing in iter_listings(corpus_path):
+            category, price = listing.get("category"), listing.get("price")
+            if not category or not price or price <= 0:
+                continue
+            for key in _group_keys(category, listing.get("subcategory")):
+                groups.setdefault(key, []).append(float(price))
+        # sort ครั้งเดียวตอน build แทนการ insort ทีละรายการ
+        index._groups = {key: array("d", _downsample(sorted(prices), max_per_group)) for key, prices in groups.items()}
+        index._seen = {key: len(prices) for key, prices in groups.items()}
+        index.dirty = True
+        return index
+
+_price_index: Optional[PriceIndex] = None
+
+def get_price_index(
+    index_path: Optional[Path] = None,
+    corpus_path: Optional[Path] = None
+) -> PriceIndex:
+    """
+    index กลางของ process
+    โหลดจากไฟล์ที่ serialize ไว้ถ้ายังตรงกับ corpus ไม่งั้นสร้างใหม่จาก corpus (บันทึกตอน shutdown)
+    """
+    global _price_index
+    if _price_index is None:
+        settings = get_settings()
+        index_path = index_path or settings.price_index_path
+        corpus_path = corpus_path or settings.corpus_path
+        index = None
+        try:
+            index = PriceIndex.load(index_path)
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning("Cannot load price index %s (%s); rebuilding from corpus", index_path, e)
+
+        if index is None or index.source_version != corpus_version(corpus_path):
+            index = PriceIndex.build_from_corpus(corpus_path, settings.price_index_max_per_group)
+        _price_index = index
+    return _price_index
+
+def rebuild_price_index(corpus_path: Optional[Path] = None) -> PriceIndex:
+    """แทน index กลางด้วย index ที่สร้างใหม่จาก corpus ทั้งไฟล์"""
+    global _price_index
+    settings = get_settings()
+    _price_index = PriceIndex.build_from_corpus(corpus_path or settings.corpus_path, settings.price_index_max_per_group)
+    return _price_index
+
+def save_price_index(index_path: Optional[Path] = None) -> None:
+    """บันทึก index ที่เพิ่งสร้างหรือเพิ่มราคาจาก ingest ลงดิสก์ (โหลดจากไฟล์แล้วไม่เปลี่ยน = ไม่มีอะไรให้บันทึก)"""
+    if _price_index is not None and _price_index.dirty:
+        _price_index.save(index_path or get_settings().price_index_path)
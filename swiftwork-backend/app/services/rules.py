@@ -0,0 +1,163 @@
+"""
+Rule engine สำหรับ analyzer
+เกณฑ์คะแนน/ข้อความทั้งหมดอยู่ใน app/data/analysis_rules.json
+โหลดและ compile ครั้งเดียวเป็นโครงสร้างที่ lookup ได้ทันที และ reload อัตโนมัติเมื่อไฟล์เปลี่ยน
+"""
+from app.config import get_settings
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class Bands:
+    """
+    แบ่งช่วงค่าตัวเลขตาม upper bound (inclusive) แล้ว lookup ด้วย binary search
+    band สุดท้ายไม่มี max = ทุกค่าที่มากกว่า band ก่อนหน้า
+    """
+
+    def __init__(self, bands: Sequence[Dict[str, Any]]):
+        if not bands or "max" in bands[-1]:
+            raise ValueError("last band must not define 'max'")
+        self.uppers = [b["max"] for b in bands[:-1]]
+        if self.uppers != sorted(self.uppers):
+            raise ValueError("band 'max' values must be ascending")
+        self.outcomes = [_freeze(b) for b in bands]
+
+    def position(self, value: float) -> int:
+        """ลำดับของ band ที่ value ตกอยู่ (คงที่ตลอดอายุ rule ชุดนี้ - ใช้เป็น key ได้)"""
+        return bisect_left(self.uppers, value)
+
+    def lookup(self, value: float) -> Dict[str, Any]:
+        return self.outcomes[bisect_left(self.uppers, value)]
+
+class StatusThresholds:
+    """แปลงคะแนนเป็น status ('fail' < suggest <= 'suggest' < pass <= 'pass')"""
+    STATUSES = ("fail", "suggest", "pass")
+
+    def __init__(self, thresholds: Dict[str, int]):
+        self.bounds = [thresholds["suggest"], thresholds["pass"]]
+        self.suggest = thresholds["suggest"]
+        self.passing = thresholds["pass"]
+
+    def status(self, score: int) -> str:
+        return self.STATUSES[bisect_right(self.bounds, score)]
+
+def _freeze(value: Any) -> Any:
+    """list -> tuple เพื่อให้ rule ที่ compile แล้วแก้ไขไม่ได้โดยบังเอิญ"""
+    if isinstance(value, dict):
+        return {k: _freeze(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class CompiledRules:
+    """rule ที่ compile แล้ว แยกตามหัวข้อ"""
+
+    def __init__(self, raw: Dict[str, Any], version: str):
+        self.version = version
+
+        self.cover_image = _freeze(raw["cover_image"])
+
+        self.title = _freeze(raw["title"])
+        self.title_bands = Bands(raw["title"]["bands"])
+
+        self.category = _freeze(raw["category"])
+
+        price = raw["price"]
+        self.price = _freeze(price)
+        default_price = price["default"]
+        self.price_default = _freeze(default_price)
+        self.price_by_category = {
+            name.lower(): _freeze({**default_price, **overrides})
+            for name, overrides in price.get("categories", {}).items()
+        }
+        self.price_distribution_bands = Bands(price["distribution"]["bands"])
+
+        visibility = raw["visibility"]
+        self.visibility = _freeze(visibility)
+        self.visibility_status = StatusThresholds(visibility["status_thresholds"])
+
+        self.package = _freeze(raw["package"])
+        self.package_bands = Bands(raw["package"]["bands"])
+        self.package_status = StatusThresholds(raw["package"]["status_thresholds"])
+
+        self.album = _freeze(raw["album"])
+        self.album_bands = Bands(raw["album"]["bands"])
+        self.album_status = StatusThresholds(raw["album"]["status_thresholds"])
+
+        # object ที่สร้างจาก rule ชุดนี้แล้วใช้ซ้ำได้ (เช่น ผลวิเคราะห์ที่ไม่ขึ้นกับ input)
+        # หมดอายุไปพร้อม rule ชุดนี้เมื่อ reload
+        self.prebuilt: Dict[Any, Any] = {}
+
+    def price_rules(self, category: Optional[str]) -> Dict[str, Any]:
+        """เกณฑ์ราคาของหมวดหมู่ (fallback เป็นค่า default)"""
+        if category:
+            return self.price_by_category.get(category.lower(), self.price_default)
+        return self.price_default
+
+def load_rules(path: Path) -> CompiledRules:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    stat = os.stat(path)
+    return CompiledRules(raw, version=f"{stat.st_mtime_ns:x}")
+
+class RuleStore:
+    """ถือ rule ปัจจุบันและ hot-reload เมื่อไฟล์เปลี่ยน (ไม่ต้อง restart server)"""
+
+    def __init__(self, path: Path, check_interval: float):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._rules: Optional[CompiledRules] = None
+        self._mtime_ns: Optional[int] = None
+        self._next_check = 0.0
+        self._listeners: List[Callable[[CompiledRules], None]] = []
+
+    def add_reload_listener(self, callback: Callable[[CompiledRules], None]) -> None:
+        """เรียก callback ทุกครั้งที่ rule ถูก reload (เช่น ล้าง cache ผลวิเคราะห์)"""
+        self._listeners.append(callback)
+
+    def get(self) -> CompiledRules:
+        now = time.monotonic()
+        if self._rules is None or now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self._reload_if_changed()
+        return self._rules
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._rules is None:
+                raise
+            logger.warning("Rules file %s is not readable; keeping current rules", self.path)
+            return
+
+        if self._rules is not None and mtime_ns == self._mtime_ns:
+            return
+
+        try:
+            rules = load_rules(self.path)
+        except (ValueError, KeyError, TypeError) as e:
+            if self._rules is None:
+                raise
+            logger.error("Invalid rules file %s (%s); keeping current rules", self.path, e)
+            self._mtime_ns = mtime_ns
+            return
+
+        is_reload = self._rules is not None
+        self._rules = rules
+        self._mtime_ns = mtime_ns
+        if is_reload:
+            logger.info("Reloaded analysis rules from %s", self.path)
+            for callback in self._listeners:
+                callback(rules)
+
+rule_store = RuleStore(get_settings().analysis_rules_path, get_settings().rules_reload_interval)
+
+def get_rules() -> CompiledRules:
+    return rule_store.get()
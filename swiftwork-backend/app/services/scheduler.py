@@ -0,0 +1,181 @@
+"""
+รันหัวข้อการวิเคราะห์เป็น task อิสระตาม dependency ที่ประกาศไว้
+เวลาของ request = หัวข้อที่ช้าที่สุดบน critical path แทนผลรวมของทุกหัวข้อ
+
+ประเภทของหัวข้อ:
+- "inline": ฟังก์ชัน sync ที่เร็วมาก (ไม่กี่สิบ µs) รันใน event loop ตรง ๆ
+  (ส่งไป thread pool เสียเวลา ~35µs ต่อครั้ง มากกว่าตัวงานเอง)
+  TOPIC_POOL_TOPICS ย้ายหัวข้อ inline ไปรันแบบ cpu ได้ - state ที่หัวข้อ inline แชร์กัน
+  (LRU ของ tokenizer, CompiledRules.prebuilt) จึงต้องปลอดภัยเมื่อเรียกจากหลาย thread
+- "cpu": ฟังก์ชัน sync ที่ใช้เวลานาน รันบน thread pool กลางของ process
+- "io": coroutine (ดึงรูป, เรียก LLM, query database) รันพร้อมกันใน event loop
+
+ทุกหัวข้อมี timeout; ถ้าเกินเวลาหรือ error จะใช้ผล fallback ของหัวข้อนั้นแทน
+หัวข้อ inline ถูกหยุดกลางทางไม่ได้ - รันจนจบแล้วถ้าใช้เวลาเกิน timeout ผลจะถูกแทนด้วย fallback
+(หัวข้อที่เกินบ่อยควรย้ายไป TOPIC_POOL_TOPICS ซึ่ง timeout ตัดการรอได้จริง)
+"""
+from app.config import get_settings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("inline", "cpu", "io")
+
+class TopicTask:
+    """
+    หัวข้อการวิเคราะห์ 1 หัวข้อ
+    run(product, deps) รับผลของหัวข้อที่ depends_on (dict ตามชื่อ) แล้วคืนผลของหัวข้อนี้
+    inputs = field ของ product ที่หัวข้อนี้อ่าน (ใช้เลือกหัวข้อที่ต้องคำนวณใหม่เมื่อ field เปลี่ยน)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Any, Dict[str, Any]], Any],
+        fallback: Callable[[Any], Any],
+        kind: str = "inline",
+        depends_on: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        inputs: Sequence[str] = ()
+    ):
+        if kind not in KINDS:
+            raise ValueError(f"unknown topic kind: {kind}")
+        self.name = name
+        self.run = run
+        self.fallback = fallback
+        self.kind = kind
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.inputs = frozenset(inputs)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """thread pool กลางสำหรับหัวข้อแบบ cpu (สร้างครั้งแรกที่ใช้)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=get_settings().topic_pool_workers, thread_name_prefix="topic")
+    return _executor
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def validate_topics(topics: Sequence[TopicTask]) -> None:
+    """dependency ต้องประกาศก่อนหัวข้อที่ใช้ (จึงไม่มีวงวน) และชื่อต้องไม่ซ้ำ"""
+    seen: Set[str] = set()
+    for topic in topics:
+        if topic.name in seen:
+            raise ValueError(f"duplicate topic: {topic.name}")
+        missing = [d for d in topic.depends_on if d not in seen]
+        if missing:
+            raise ValueError(f"topic {topic.name} depends on undeclared/later topics: {missing}")
+        seen.add(topic.name)
+
+def affected_topics(topics: Sequence[TopicTask], changed_fields: Set[str]) -> Set[str]:
+    """
+    หัวข้อที่ต้องคำนวณใหม่เมื่อ changed_fields เปลี่ยน: หัวข้อที่อ่าน field นั้น + หัวข้อที่ depends_on หัวข้อเหล่านั้น
+    รวม dependency ของหัวข้อที่เลือกด้วย เพื่อให้รันชุดย่อยนี้ได้ด้วยตัวเอง
+    """
+    affected = {t.name for t in topics if t.inputs & changed_fields}
+    for topic in topics:  # topics เรียงตาม dependency แล้ว (validate_topics)
+        if affected.intersection(topic.depends_on):
+            affected.add(topic.name)
+    for topic in reversed(topics):
+        if topic.name in affected:
+            affected.update(topic.depends_on)
+    return affected
+
+def _run_inline(topic: TopicTask, product: Any, deps: Dict[str, Any], timeout: float) -> Any:
+    """รันหัวข้อ inline จนจบ แล้ว raise asyncio.TimeoutError ถ้าใช้เวลาเกิน timeout (ผู้เรียกใช้ fallback)"""
+    started = time.perf_counter()
+    result = topic.run(product, deps)
+    if time.perf_counter() - started > timeout:
+        raise asyncio.TimeoutError
+    return result
+
+async def _run_topic(topic: TopicTask, product: Any, deps: Dict[str, Any], kind: str, timeout: float) -> Any:
+    if kind == "inline":
+        return _run_inline(topic, product, deps, timeout)
+    if kind == "cpu":
+        work: Awaitable = asyncio.get_running_loop().run_in_executor(get_executor(), topic.run, product, deps)
+    else:
+        work = topic.run(product, deps)
+    return await asyncio.wait_for(work, timeout)
+
+async def run_topics(topics: Sequence[TopicTask], product: Any) -> Tuple[Dict[str, Any], Set[str]]:
+    """รันทุกหัวข้อ คืน (ผลตามชื่อหัวข้อเรียงตาม topics, ชื่อหัวข้อที่ใช้ fallback)"""
+    results: Dict[str, Any] = {}
+    degraded: Set[str] = set()
+    async for name, result, failed in iter_topics(topics, product):
+        results[name] = result
+        if failed:
+            degraded.add(name)
+    return {topic.name: results[topic.name] for topic in topics}, degraded
+
+async def iter_topics(topics: Sequence[TopicTask], product: Any) -> AsyncIterator[Tuple[str, Any, bool]]:
+    """
+    รันทุกหัวข้อ yield (ชื่อ, ผล, ใช้ fallback หรือไม่) ทันทีที่แต่ละหัวข้อเสร็จ
+    หัวข้อ io/cpu ถูกส่งออกไปก่อน แล้วหัวข้อ inline จึงรันใน event loop ระหว่างรอ
+    หัวข้อที่มี dependency เริ่มทันทีที่ dependency เสร็จ
+    ปิด generator ก่อนครบ (เช่น client ตัดการเชื่อมต่อ) = ยกเลิกหัวข้อที่ยังค้าง
+    """
+    settings = get_settings()
+    offloaded = set(settings.topic_pool_topics)
+    required = {d for topic in topics for d in topic.depends_on}
+    degraded: Set[str] = set()
+    tasks: Dict[str, asyncio.Task] = {}
+
+    def kind_of(topic: TopicTask) -> str:
+        return "cpu" if topic.kind == "inline" and topic.name in offloaded else topic.kind
+
+    async def evaluate(topic: TopicTask) -> Any:
+        deps = {}
+        if topic.depends_on:
+            results = await asyncio.gather(*(tasks[d] for d in topic.depends_on))
+            deps = dict(zip(topic.depends_on, results))
+        try:
+            return await _run_topic(topic, product, deps, kind_of(topic), topic.timeout or settings.topic_timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Topic %s timed out; using fallback", topic.name)
+        except Exception:
+            logger.exception("Topic %s failed; using fallback", topic.name)
+        degraded.add(topic.name)
+        return topic.fallback(product)
+
+    # inline ที่ไม่มีใครรอผล ไม่ต้องสร้าง task
+    direct = [t for t in topics if kind_of(t) == "inline" and not t.depends_on and t.name not in required]
+    for topic in topics:
+        if topic not in direct:
+            tasks[topic.name] = asyncio.ensure_future(evaluate(topic))
+
+    try:
+        if tasks and direct:
+            await asyncio.sleep(0)  # ให้ task io/cpu เริ่มส่งงานก่อนรันงาน inline
+        for topic in direct:
+            try:
+                result = _run_inline(topic, product, {}, topic.timeout or settings.topic_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning("Topic %s timed out; using fallback", topic.name)
+                degraded.add(topic.name)
+                result = topic.fallback(product)
+            except Exception:
+                logger.exception("Topic %s failed; using fallback", topic.name)
+                degraded.add(topic.name)
+                result = topic.fallback(product)
+            yield topic.name, result, topic.name in degraded
+        pending = set(tasks.values())
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for name, task in tasks.items():  # เสร็จพร้อมกัน -> เรียงตามลำดับใน topics
+                if task in done:
+                    yield name, task.result(), name in degraded
+    finally:
+        for task in tasks.values():
+            task.cancel()
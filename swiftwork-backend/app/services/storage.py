@@ -0,0 +1,178 @@
+"""
+บันทึกผลการวิเคราะห์ลง MongoDB (Motor) แบบไม่ให้ request ต้องรอ database
+
+- ใช้ client เดียวทั้ง process (สร้างใน lifespan) พร้อม connection pool ที่กำหนดขนาดได้
+- analyze_product แค่ใส่ผลลง asyncio.Queue; writer task เบื้องหลังรวมเป็น insert_many ทีละ batch
+- ขนาด pool/คิว/batch ตั้งได้ใน app.config (MONGODB_*, STORAGE_*)
+- MONGODB_URL=mongomock:// ใช้ mongomock_motor แทน (in-process ไม่ต้องมี MongoDB จริง; อยู่ใน requirements-dev.txt)
+"""
+from app.api.schemas import ProductData, AnalysisResponse
+from app.config import Settings, get_settings
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MOCK_URL_SCHEME = "mongomock://"
+COLLECTION_NAME = "analyses"
+
+def create_client(url: str, max_pool_size: int, min_pool_size: int):
+    """สร้าง Motor client (หรือ mongomock_motor สำหรับ mongomock://)"""
+    if url.startswith(MOCK_URL_SCHEME):
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(
+        url,
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        maxIdleTimeMS=60000,
+        serverSelectionTimeoutMS=5000,
+        tz_aware=True
+    )
+
+PendingWrite = Tuple[str, ProductData, AnalysisResponse, datetime]
+
+class AnalysisStore:
+    """
+    คิวเขียนผลการวิเคราะห์ลง collection analyses
+    enqueue ไม่ block: ถ้าคิวเต็ม (database ช้า/ล่ม) จะทิ้งรายการนั้นและนับใน dropped
+    """
+
+    def __init__(
+        self,
+        collection,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float  # วินาที - รอรวม batch ไม่นานกว่านี้
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "asyncio.Queue[PendingWrite]" = asyncio.Queue(maxsize=queue_size)
+        self._writer: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("hash")
+        await self.collection.create_index([("category", 1), ("subcategory", 1)])
+        await self.collection.create_index("created_at")
+
+    async def start(self) -> None:
+        await self.ensure_indexes()
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """เขียนรายการที่ค้างในคิวให้หมดแล้วหยุด writer"""
+        if self._writer is None:
+            return
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    def enqueue(self, product_hash: str, product: ProductData, result: AnalysisResponse) -> None:
+        try:
+            self._queue.put_nowait((product_hash, product, result, datetime.now(timezone.utc)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _next_batch(self) -> List[PendingWrite]:
+        """รอรายการแรก แล้วรวมรายการที่ตามมาภายใน flush_interval จนครบ batch_size"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.collection.insert_many([to_document(*item) for item in batch], ordered=False)
+                self.written += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning("Cannot persist %d analyses (%s)", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+def to_document(product_hash: str, product: ProductData, result: AnalysisResponse, created_at: datetime) -> Dict:
+    return {
+        "hash": product_hash,
+        "category": product.category,
+        "subcategory": product.subcategory,
+        "title": product.title,
+        "overall_score": result.overall_score,
+        "product": product.model_dump(mode="json"),
+        "result": result.model_dump(mode="json"),
+        "created_at": created_at
+    }
+
+_client = None
+_store: Optional[AnalysisStore] = None
+
+def get_store() -> Optional[AnalysisStore]:
+    """store กลางของ process (None ถ้าไม่ได้ตั้ง MONGODB_URL หรือยังไม่ได้ start)"""
+    return _store
+
+async def start_store(settings: Optional[Settings] = None) -> Optional[AnalysisStore]:
+    """สร้าง client + writer ตอน startup; ไม่มี MONGODB_URL = ไม่บันทึกผล"""
+    global _client, _store
+    settings = settings or get_settings()
+    if not settings.mongodb_url:
+        return None
+    _client = create_client(settings.mongodb_url, settings.mongodb_max_pool_size, settings.mongodb_min_pool_size)
+    store = AnalysisStore(
+        _client[settings.mongodb_db][COLLECTION_NAME],
+        queue_size=settings.storage_queue_size,
+        batch_size=settings.storage_write_batch_size,
+        flush_interval=settings.storage_flush_interval
+    )
+    try:
+        await store.start()
+    except Exception as e:
+        logger.warning("Cannot connect to MongoDB (%s); analyses will not be persisted", e)
+        _client.close()
+        _client = None
+        return None
+    _store = store
+    return _store
+
+async def stop_store() -> None:
+    global _client, _store
+    if _store is not None:
+        await _store.stop()
+        _store = None
+    if _client is not None:
+        _client.close()
+        _client = None
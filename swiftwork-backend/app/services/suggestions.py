@@ -1,4 +1,110 @@
-from typing import Dict, Optional
+from app.api.schemas import TopicAnalysis
+from app.config import get_settings
+from app.services.thai_tokenizer import extract_keywords, tokenize, truncate_at_word
+from app.services.llm import get_llm_client
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    รวม prompt จากหลาย request ที่เข้ามาภายใน max_wait_seconds เป็น LLM call เดียว
+    (ไม่เกิน max_batch_size prompt ต่อ call; ครบจำนวนแล้วส่งทันทีไม่ต้องรอ)
+    แล้วกระจายคำตอบกลับให้แต่ละ request ที่รออยู่
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_seconds: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sends: Set[asyncio.Task] = set()
+        self.submitted = 0
+        self.batches = 0
+
+    async def submit(self, prompt: str) -> str:
+        client = get_llm_client()
+        if client is None:
+            raise RuntimeError("LLM backend is not configured")
+        cached = client.cached(prompt)
+        if cached is not None:  # ไม่ต้องรอรอบ batch
+            return cached
+        if self.max_batch_size <= 1:
+            return await client.complete(prompt)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        self.submitted += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            send = asyncio.ensure_future(self._send(batch))
+            self._sends.add(send)
+            send.add_done_callback(self._sends.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            results = await get_llm_client().complete_many([prompt for prompt, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # request ถูกยกเลิกไปแล้ว
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "mean_batch_size": round(self.submitted / self.batches, 2) if self.batches else 0.0
+        }
+
+_batcher: Optional[MicroBatcher] = None
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        client = get_llm_client()
+        max_size = settings.llm_batch_max_size
+        if client is not None and client.backend.max_batch_size:
+            # batch ที่เต็มต้องส่งได้ใน upstream call เดียว (ตามเพดาน completion token ของ model)
+            max_size = min(max_size, client.backend.max_batch_size)
+        _batcher = MicroBatcher(max_size, settings.llm_batch_max_wait_ms / 1000)
+    return _batcher
+
+def _context_text(context: Optional[Dict]) -> str:
+    # sort_keys: context เดียวกันได้ prompt เดียวกัน -> ใช้ cache/รวม request ได้
+    return json.dumps(context or {}, ensure_ascii=False, sort_keys=True, default=str)
+
+async def _complete_or(prompt: str, fallback: str) -> str:
+    """คำตอบจาก LLM หรือ fallback (ไม่ได้ตั้ง LLM_BACKEND / เรียกไม่สำเร็จ)"""
+    if get_llm_client() is None:
+        return fallback
+    try:
+        return await get_batcher().submit(prompt) or fallback
+    except Exception as e:
+        logger.warning("LLM completion failed (%s); using rule-based text", e)
+        return fallback
 
 async def generate_suggestion(
     topic: str, 
@@ -7,9 +113,32 @@ async def generate_suggestion(
 ) -> str:
     """
     สร้างคำแนะนำเฉพาะหัวข้อ
-    ในอนาคตจะใช้ OpenAI API
+    ใช้คำแนะนำจาก rule เป็นพื้นฐาน แล้วให้ LLM (ถ้าตั้ง LLM_BACKEND) เขียนให้เจาะจงขึ้น
     """
-    
+    baseline = rule_based_suggestion(topic, current_value, context)
+    prompt = (
+        f"หัวข้อ: {topic}\n"
+        f"ข้อมูลปัจจุบัน: {current_value}\n"
+        f"ข้อมูลประกอบ: {_context_text(context)}\n"
+        f"คำแนะนำพื้นฐาน: {baseline}\n"
+        "เขียนคำแนะนำที่เจาะจงกับข้อมูลนี้สำหรับปรับปรุงหัวข้อดังกล่าว"
+    )
+    return await _complete_or(prompt, baseline)
+
+async def generate_ai_fix(topic: TopicAnalysis, context: Dict) -> Optional[str]:
+    """ai_fix ของหัวข้อที่ยังไม่ผ่าน เขียนโดย LLM (คืนค่าเดิมจาก rule ถ้าใช้ LLM ไม่ได้)"""
+    fallback = topic.details.ai_fix
+    prompt = (
+        f"หัวข้อ: {topic.name} (คะแนน {topic.score}/100)\n"
+        f"ผลวิเคราะห์: {topic.details.ai_analysis or ''}\n"
+        f"ข้อมูลงาน: {_context_text(context)}\n"
+        f"ตัวอย่างการแก้ไข: {json.dumps(fallback, ensure_ascii=False) if fallback is not None else ''}\n"
+        "เขียนข้อความที่ผู้ขายนำไปใช้แก้ไขหัวข้อนี้ได้ทันที"
+    )
+    return await _complete_or(prompt, fallback)
+
+def rule_based_suggestion(topic: str, current_value: str, context: Optional[Dict] = None) -> str:
+    """คำแนะนำจาก rule (ใช้เมื่อไม่มี LLM และเป็นพื้นฐานของ prompt)"""
     suggestions = {
         "ชื่องาน": generate_title_suggestion(current_value, context),
         "หมวดหมู่": "พิจารณาเปลี่ยนหมวดหมู่ให้ตรงกับประเภทงาน",
@@ -22,8 +151,17 @@ async def generate_suggestion(
 def generate_title_suggestion(title: str, context: Optional[Dict]) -> str:
     """สร้างคำแนะนำสำหรับชื่องาน"""
     if len(title) > 70:
-        return f"ลดความยาวของชื่อให้อยู่ที่ 50-70 ตัวอักษร (ปัจจุบัน: {len(title)} ตัวอักษร)"
+        return (
+            f"ลดความยาวของชื่อให้อยู่ที่ 50-70 ตัวอักษร (ปัจจุบัน: {len(title)} ตัวอักษร) "
+            f"เช่น: {truncate_at_word(title, 70)}"
+        )
     elif len(title) < 20:
+        # เสนอคีย์เวิร์ดจากคำอธิบายที่ยังไม่อยู่ในชื่อ
+        in_title = {w.lower() for w in tokenize(title)}
+        description = (context or {}).get("description")
+        missing = [w for w in extract_keywords(description) if w.lower() not in in_title][:3]
+        if missing:
+            return f"เพิ่มรายละเอียดและคีย์เวิร์ดที่เกี่ยวข้องเพื่อให้ลูกค้าเข้าใจชัดเจนขึ้น เช่น: {', '.join(missing)}"
         return "เพิ่มรายละเอียดและคีย์เวิร์ดที่เกี่ยวข้องเพื่อให้ลูกค้าเข้าใจชัดเจนขึ้น"
     else:
         return "ชื่องานของคุณมีความยาวที่เหมาะสม"
\ No newline at end of file
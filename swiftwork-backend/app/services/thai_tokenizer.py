@@ -0,0 +1,255 @@
+"""
+ตัดคำภาษาไทยแบบ dictionary-based (trie + maximal matching) สำหรับ tag/คีย์เวิร์ด
+ภาษาไทยไม่มีช่องว่างระหว่างคำ การใช้ str.split() จึงได้ทั้งประโยคเป็น "คำ" เดียว
+
+คำศัพท์โหลดครั้งเดียวจาก app/data/thai_words.txt เป็น trie
+ผลการตัดคำ cache ตาม hash ของข้อความ (LRU) เพราะ title/description เดียวกันถูกตัดซ้ำหลายหัวข้อ
+LRU มี lock - หัวข้อที่ตัดคำอาจรันบน thread pool (TOPIC_POOL_TOPICS) พร้อมกับ event loop
+
+วัด throughput:
+    python -m app.services.thai_tokenizer --repeat 200
+"""
+from app.config import get_settings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import re
+import threading
+
+_END = ""  # key ใน trie node ที่บอกว่าจบคำได้ตรงนี้
+
+# ข้อความไทยต่อเนื่อง หรือคำภาษาอังกฤษ/ตัวเลข (รวม AI-generated, 3D, R&D)
+_RUN_RE = re.compile(r"[ก-๛]+|[A-Za-z0-9]+(?:[-&'][A-Za-z0-9]+)*")
+_THAI_RE = re.compile(r"[ก-๛]")
+# สระบน/ล่าง วรรณยุกต์ และสระหลังที่ขึ้นต้นคำไม่ได้ - ต้องติดกับตัวอักษรก่อนหน้าเสมอ
+_TRAILING_MARKS = frozenset("ะัาำิีึืฺุู็่้๊๋์ํ๎")
+_LEADING_VOWELS = frozenset("เแโใไ")
+
+def _load_word_file(path: Path) -> List[str]:
+    """1 บรรทัด = 1 คำ, ข้ามบรรทัดว่างและบรรทัดที่ขึ้นต้นด้วย #"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class ThaiTokenizer:
+    """
+    ตัดคำด้วย maximal matching: เลือกการตัดที่มีตัวอักษรนอกพจนานุกรมน้อยที่สุด
+    แล้วจำนวนคำน้อยที่สุด (dynamic programming บน trie) ส่วนที่ไม่รู้จักติดกันรวมเป็น token เดียว
+    """
+
+    def __init__(self, words: Iterable[str], max_cache_entries: int):
+        self._trie: Dict = {}
+        self.word_count = 0
+        self.max_cache_entries = max_cache_entries
+        self._cache: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for word in words:
+            self.add_word(word)
+
+    def add_word(self, word: str) -> None:
+        node = self._trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        if _END not in node:
+            node[_END] = True
+            self.word_count += 1
+            with self._cache_lock:
+                self._cache.clear()
+
+    def tokenize(self, text: Optional[str]) -> Tuple[str, ...]:
+        """แยก text เป็น tuple ของคำ (ไม่รวมช่องว่าง/เครื่องหมาย) ผลลัพธ์ถูก cache ตาม hash ของ text"""
+        if not text:
+            return ()
+        key = text_key(text)
+        with self._cache_lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+
+        # ตัดคำนอก lock: thread อื่นที่ตัดข้อความเดียวกันพร้อมกันได้ผลเท่ากัน เขียนทับกันได้
+        result: List[str] = []
+        for run in _RUN_RE.findall(text):
+            if _THAI_RE.match(run):
+                result.extend(self._segment(run))
+            else:
+                result.append(run)
+        tokens = tuple(result)
+
+        if self.max_cache_entries > 0:
+            with self._cache_lock:
+                self._cache[key] = tokens
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+        return tokens
+
+    def _segment(self, run: str) -> List[str]:
+        n = len(run)
+        # best[i] = (ตัวอักษรที่ไม่รู้จัก, จำนวนคำ, ตำแหน่งเริ่มของคำสุดท้าย, คำสุดท้ายอยู่ในพจนานุกรมหรือไม่)
+        best: List[Optional[Tuple[int, int, int, bool]]] = [None] * (n + 1)
+        best[0] = (0, 0, 0, True)
+        for i in range(n):
+            state = best[i]
+            if state is None:
+                continue
+            unknown, count = state[0], state[1]
+
+            node = self._trie
+            j = i
+            while j < n:
+                node = node.get(run[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node and (j == n or run[j] not in _TRAILING_MARKS):
+                    candidate = (unknown, count + 1, i, True)
+                    if best[j] is None or candidate[:2] < best[j][:2]:
+                        best[j] = candidate
+
+            # ข้ามไป 1 พยางค์ย่อย (ตัวอักษร + สระ/วรรณยุกต์ที่ตามมา) ในฐานะส่วนที่ไม่รู้จัก
+            j = i + 1
+            if run[i] in _LEADING_VOWELS and j < n:
+                j += 1
+            while j < n and run[j] in _TRAILING_MARKS:
+                j += 1
+            candidate = (unknown + j - i, count + 1, i, False)
+            if best[j] is None or candidate[:2] < best[j][:2]:
+                best[j] = candidate
+
+        pieces: List[Tuple[str, bool]] = []
+        end = n
+        while end > 0:
+            _, _, start, known = best[end]
+            pieces.append((run[start:end], known))
+            end = start
+        pieces.reverse()
+
+        tokens: List[str] = []
+        previous_known = True
+        for piece, known in pieces:
+            if not known and not previous_known:
+                tokens[-1] += piece
+            else:
+                tokens.append(piece)
+            previous_known = known
+        return tokens
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "words": self.word_count,
+            "cache_size": len(self._cache),
+            "max_cache_entries": self.max_cache_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+_tokenizer: Optional[ThaiTokenizer] = None
+_stopwords: Optional[frozenset] = None
+
+def get_tokenizer(words_path: Optional[Path] = None) -> ThaiTokenizer:
+    """tokenizer กลางของ process (โหลดพจนานุกรมครั้งแรกที่เรียก)"""
+    global _tokenizer
+    if _tokenizer is None:
+        settings = get_settings()
+        words = _load_word_file(words_path or settings.thai_words_path)
+        _tokenizer = ThaiTokenizer(words, settings.tokenizer_cache_entries)
+    return _tokenizer
+
+def get_stopwords(stopwords_path: Optional[Path] = None) -> frozenset:
+    global _stopwords
+    if _stopwords is None:
+        path = stopwords_path or get_settings().thai_stopwords_path
+        _stopwords = frozenset(w.lower() for w in _load_word_file(path))
+    return _stopwords
+
+def tokenize(text: Optional[str]) -> Tuple[str, ...]:
+    return get_tokenizer().tokenize(text)
+
+def keyword_tokens(text: Optional[str]) -> List[str]:
+    """token ที่ใช้เป็น tag ได้ (ไม่ใช่ stopword, ยาวกว่า 1 ตัวอักษร, ไม่ใช่ตัวเลขล้วน) รวมคำซ้ำ"""
+    stopwords = get_stopwords()
+    return [t for t in tokenize(text) if len(t) > 1 and not t.isdigit() and t.lower() not in stopwords]
+
+def extract_keywords(text: Optional[str], limit: Optional[int] = None) -> List[str]:
+    """keyword_tokens ตามลำดับที่พบ ไม่ซ้ำ"""
+    seen = set()
+    keywords = []
+    for token in keyword_tokens(text):
+        key = token.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        keywords.append(token)
+        if limit is not None and len(keywords) >= limit:
+            break
+    return keywords
+
+def truncate_at_word(text: str, max_length: int) -> str:
+    """ตัด text ให้ยาวไม่เกิน max_length โดยไม่ตัดกลางคำ (ถ้าคำแรกยาวเกินก็ตัดตรง ๆ)"""
+    if len(text) <= max_length:
+        return text
+    cut = 0
+    position = 0
+    for token in tokenize(text):
+        start = text.find(token, position)
+        end = start + len(token)
+        if end > max_length:
+            break
+        cut = position = end
+    return (text[:cut] if cut else text[:max_length]).rstrip(" -–|,/")
+
+def main(argv=None) -> int:
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="วัด throughput ของการตัดคำกับคำอธิบายยาว ๆ")
+    parser.add_argument("--corpus", default=str(get_settings().corpus_path), help="ไฟล์ NDJSON ที่มี title/description")
+    parser.add_argument("--repeat", type=int, default=100, help="จำนวนรอบที่ตัดคำทั้ง corpus")
+    parser.add_argument("--join", type=int, default=20, help="ต่อ description กี่รายการเป็นข้อความยาว 1 ชิ้น")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, encoding="utf-8") as f:
+        listings = [json.loads(line) for line in f if line.strip()]
+    texts = [" ".join(filter(None, [l.get("title"), l.get("description")])) for l in listings]
+    long_texts = [" ".join(texts[i:i + args.join]) for i in range(0, len(texts), args.join)]
+    chars = sum(len(t) for t in long_texts)
+
+    settings = get_settings()
+    tokenizer = ThaiTokenizer(_load_word_file(settings.thai_words_path), max_cache_entries=0)
+    started = time.perf_counter()
+    tokens = 0
+    for _ in range(args.repeat):
+        for text in long_texts:
+            tokens += len(tokenizer.tokenize(text))
+    cold = time.perf_counter() - started
+
+    cached = ThaiTokenizer(_load_word_file(settings.thai_words_path), settings.tokenizer_cache_entries)
+    for text in long_texts:
+        cached.tokenize(text)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in long_texts:
+            cached.tokenize(text)
+    warm = time.perf_counter() - started
+
+    print(json.dumps({
+        "texts": len(long_texts),
+        "avg_chars": round(chars / len(long_texts)) if long_texts else 0,
+        "uncached_chars_per_sec": round(chars * args.repeat / cold) if cold else None,
+        "uncached_tokens_per_sec": round(tokens / cold) if cold else None,
+        "cached_lookups_per_sec": round(len(long_texts) * args.repeat / warm) if warm else None
+    }))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,355 @@
+"""
+Benchmark ของ analyzer และ /api/analyze
+
+สร้าง ProductData สังเคราะห์ครอบคลุม edge case ของ DUMMY_PRODUCTS (field ว่าง, ชื่อยาวมาก,
+แพ็กเกจเยอะ, อัลบั้มใหญ่) แล้ววัด analyze_* ทีละหัวข้อ, build_analysis, analyze_product
+และ round trip ของ /api/analyze ผ่าน ASGI client ใน process เดียวกัน
+
+ผลลัพธ์ (p50/p95/p99, throughput, allocation ต่อครั้ง) บันทึกเป็น JSON เพื่อเทียบกับรอบก่อน:
+
+    python -m benchmarks.bench_analyzer -o bench.json
+    python -m benchmarks.bench_analyzer -o new.json --compare bench.json --threshold 0.15
+
+ค่าเริ่มต้นปิดการดึงภาพปก (IMAGE_INSPECTION_ENABLED=false) เพื่อไม่ให้ผลขึ้นกับ network
+และปิด rate limit (RATE_LIMIT_ENABLED=false) เพราะทุก request มาจาก client เดียวกัน
+"""
+import os
+
+os.environ.setdefault("IMAGE_INSPECTION_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from app.api.mock_data import DUMMY_PRODUCTS
+from app.api.schemas import ProductData
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+THAI_WORDS = [
+    "ออกแบบ", "โลโก้", "แบรนด์", "มินิมอล", "ร้านกาแฟ", "แบนเนอร์", "โฆษณา", "คุณภาพสูง", "ส่งงานไว",
+    "แก้ไขฟรี", "ไฟล์ต้นฉบับ", "มืออาชีพ", "สติกเกอร์", "บรรจุภัณฑ์", "การ์ตูน", "วาดรูป", "ภาพประกอบ"
+]
+ENGLISH_WORDS = ["logo", "design", "brand", "minimal", "banner", "AI", "PSD", "PNG", "vector", "3D"]
+CATEGORIES = [(p.category, p.subcategory) for p in DUMMY_PRODUCTS if p.category]
+
+def _words(rng: random.Random, count: int) -> str:
+    """ข้อความไทยปนอังกฤษแบบไม่เว้นวรรคเป็นส่วนใหญ่ (เหมือนชื่องานจริง)"""
+    pool = THAI_WORDS + ENGLISH_WORDS
+    return "".join(rng.choice(pool) + (" " if rng.random() < 0.3 else "") for _ in range(count)).strip()
+
+def _package(rng: random.Random, complete: bool = True) -> Dict[str, Any]:
+    package = {"name": rng.choice(["Basic", "Standard", "Premium"]), "price": rng.randrange(300, 20000, 100)}
+    if complete:
+        package["delivery_time"] = f"{rng.randint(1, 14)} วัน"
+    return package
+
+def synthetic_product(rng: random.Random, kind: str) -> ProductData:
+    """ProductData 1 รายการตามประเภท edge case"""
+    category, subcategory = rng.choice(CATEGORIES)
+    if kind == "empty":
+        return ProductData()
+    if kind == "long_title":
+        return ProductData(
+            title=_words(rng, 40),
+            description=_words(rng, 30),
+            category=category,
+            subcategory=subcategory,
+            price=rng.randrange(500, 10000, 100),
+            tags=[]
+        )
+    if kind == "many_packages":
+        return ProductData(
+            title=_words(rng, 6),
+            description=_words(rng, 60),
+            category=category,
+            subcategory=subcategory,
+            price=rng.randrange(500, 10000, 100),
+            cover_image="https://example.com/cover.png",
+            tags=rng.sample(THAI_WORDS, 5),
+            packages=[_package(rng, complete=rng.random() < 0.8) for _ in range(rng.randint(10, 40))]
+        )
+    if kind == "large_album":
+        return ProductData(
+            title=_words(rng, 8),
+            description=_words(rng, 300),
+            category=category,
+            subcategory=subcategory,
+            price=rng.randrange(500, 10000, 100),
+            cover_image="https://example.com/cover.png",
+            tags=rng.sample(THAI_WORDS + ENGLISH_WORDS, 8),
+            packages=[_package(rng) for _ in range(3)],
+            album_images=[f"https://example.com/album/{i}.png" for i in range(rng.randint(50, 300))]
+        )
+    # typical
+    return ProductData(
+        title=_words(rng, rng.randint(3, 8)),
+        description=_words(rng, rng.randint(10, 80)),
+        category=category,
+        subcategory=subcategory,
+        price=rng.choice([None, rng.randrange(100, 8000, 50)]),
+        cover_image=rng.choice([None, "https://example.com/cover.png"]),
+        tags=rng.sample(THAI_WORDS, rng.randint(0, 6)),
+        packages=[_package(rng) for _ in range(rng.randint(0, 3))] or None,
+        album_images=[f"https://example.com/album/{i}.png" for i in range(rng.randint(0, 10))] or None
+    )
+
+KINDS = ("typical", "empty", "long_title", "many_packages", "large_album")
+
+def generate_products(count: int, seed: int = 42) -> List[ProductData]:
+    """สินค้าสังเคราะห์ count รายการ (สัดส่วน edge case เท่า ๆ กัน บวก DUMMY_PRODUCTS)"""
+    rng = random.Random(seed)
+    products = list(DUMMY_PRODUCTS)
+    while len(products) < count:
+        products.append(synthetic_product(rng, KINDS[len(products) % len(KINDS)]))
+    return products[:count]
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(durations_ns: List[int], alloc_bytes: Optional[List[int]]) -> Dict[str, Any]:
+    values = sorted(durations_ns)
+    total = sum(values)
+    summary = {
+        "calls": len(values),
+        "p50_us": round(_percentile(values, 0.50) / 1000, 2),
+        "p95_us": round(_percentile(values, 0.95) / 1000, 2),
+        "p99_us": round(_percentile(values, 0.99) / 1000, 2),
+        "mean_us": round(total / len(values) / 1000, 2),
+        "ops_per_sec": round(len(values) / (total / 1e9), 1) if total else None
+    }
+    if alloc_bytes:
+        summary["alloc_peak_bytes_mean"] = round(sum(alloc_bytes) / len(alloc_bytes))
+        summary["alloc_peak_bytes_max"] = max(alloc_bytes)
+    return summary
+
+def bench_sync(fn: Callable[[Any], Any], inputs: List[Any], repeat: int, measure_alloc: bool) -> Dict[str, Any]:
+    """จับเวลา fn(x) ทุก input (repeat รอบ) แล้ววัด allocation แยกอีก 1 รอบ (tracemalloc ทำให้ช้าลง)"""
+    for x in inputs[:min(len(inputs), 50)]:
+        fn(x)  # warm-up: โหลด rule/index/พจนานุกรม
+
+    durations = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        for x in inputs:
+            started = clock()
+            fn(x)
+            durations.append(clock() - started)
+
+    allocs = None
+    if measure_alloc:
+        allocs = []
+        tracemalloc.start()
+        for x in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn(x)
+            _, peak = tracemalloc.get_traced_memory()
+            allocs.append(peak - before)
+        tracemalloc.stop()
+    return summarize(durations, allocs)
+
+async def bench_async(fn, inputs: List[Any], repeat: int, measure_alloc: bool) -> Dict[str, Any]:
+    for x in inputs[:min(len(inputs), 50)]:
+        await fn(x)
+
+    durations = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        for x in inputs:
+            started = clock()
+            await fn(x)
+            durations.append(clock() - started)
+
+    allocs = None
+    if measure_alloc:
+        allocs = []
+        tracemalloc.start()
+        for x in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await fn(x)
+            _, peak = tracemalloc.get_traced_memory()
+            allocs.append(peak - before)
+        tracemalloc.stop()
+    return summarize(durations, allocs)
+
+async def run_benchmarks(products: List[ProductData], repeat: int, measure_alloc: bool, only: Optional[str] = None) -> Dict[str, Any]:
+    from app.services import analyzer
+    from app.services.cache import analysis_cache
+
+    topic_cases = {
+        "analyze_cover_image": lambda p: analyzer.analyze_cover_image(p.cover_image),
+        "analyze_title": lambda p: analyzer.analyze_title(p.title),
+        "analyze_category": lambda p: analyzer.analyze_category(p.category, p.subcategory, p.title),
+        "analyze_price": lambda p: analyzer.analyze_price(p.price, p.category, p.subcategory),
+        "analyze_visibility": lambda p: analyzer.analyze_visibility(p.tags, p.description),
+        "analyze_package": lambda p: analyzer.analyze_package(p.packages),
+        "analyze_album": lambda p: analyzer.analyze_album(p.album_images),
+    }
+
+    def selected(name: str) -> bool:
+        return not only or only in name
+
+    results: Dict[str, Any] = {}
+    for name, fn in topic_cases.items():
+        if not selected(name):
+            continue
+        results[name] = bench_sync(fn, products, repeat, measure_alloc)
+
+    if selected("build_analysis"):
+        results["build_analysis"] = await bench_async(analyzer.build_analysis, products, repeat, measure_alloc)
+    if selected("build_analysis_empty"):
+        # listing ว่าง (ยังไม่กรอกอะไร) - ทุกหัวข้อได้ผลคงที่จาก rule
+        empty = [ProductData() for _ in range(len(products))]
+        results["build_analysis_empty"] = await bench_async(analyzer.build_analysis, empty, repeat, measure_alloc)
+
+    if selected("serialize"):
+        # เวลา serialize ผลวิเคราะห์เป็น JSON: ทาง response_model ของ FastAPI (validate ซ้ำ + jsonable_encoder)
+        # เทียบกับ ModelResponse (model_dump_json ครั้งเดียว) ทั้งผลเดี่ยวและ batch 50 รายการ
+        from fastapi.responses import JSONResponse
+        from fastapi.routing import serialize_response
+        from fastapi.utils import create_response_field
+        from app.api.responses import ModelResponse
+        from app.api.schemas import AnalysisResponse, BatchItemResult
+
+        analyses = [(await analyzer.build_analysis(p))[0] for p in products]
+        batches = [
+            [BatchItemResult(index=i, result=r) for i, r in enumerate(analyses[start:start + 50])]
+            for start in range(0, len(analyses), 50)
+        ]
+        single_field = create_response_field("response", AnalysisResponse)
+        batch_field = create_response_field("response", List[BatchItemResult])
+
+        def framework(field):
+            async def render(content):
+                return JSONResponse(await serialize_response(field=field, response_content=content)).body
+            return render
+
+        async def fast(content):
+            return ModelResponse(content).body
+
+        results["serialize_response_model"] = await bench_async(framework(single_field), analyses, repeat, measure_alloc)
+        results["serialize_model_response"] = await bench_async(fast, analyses, repeat, measure_alloc)
+        results["serialize_batch_response_model"] = await bench_async(framework(batch_field), batches, repeat * 10, measure_alloc)
+        results["serialize_batch_model_response"] = await bench_async(fast, batches, repeat * 10, measure_alloc)
+
+        # listing ว่าง: ทุกหัวข้อเป็น prebuilt -> ModelResponse ต่อ JSON ที่ serialize ไว้แล้ว เทียบกับ serialize ทั้งก้อน
+        empty_analyses = [(await analyzer.build_analysis(ProductData()))[0] for _ in products]
+
+        async def whole(content):
+            return content.__pydantic_serializer__.to_json(content)
+
+        results["serialize_empty_whole_model"] = await bench_async(whole, empty_analyses, repeat, measure_alloc)
+        results["serialize_empty_model_response"] = await bench_async(fast, empty_analyses, repeat, measure_alloc)
+
+    async def cold(p):
+        # force_refresh: คำนวณใหม่ทุกครั้งและไม่เพิ่มข้อมูลเข้า price/keyword index
+        return await analyzer.analyze_product(p, force_refresh=True)
+
+    async def cached(p):
+        return await analyzer.analyze_product(p)
+
+    if selected("analyze_product_cold"):
+        results["analyze_product_cold"] = await bench_async(cold, products, repeat, measure_alloc)
+    if selected("analyze_product_cached"):
+        for p in products:
+            await cold(p)
+        results["analyze_product_cached"] = await bench_async(cached, products, repeat, measure_alloc)
+
+    if selected("api_analyze"):
+        import httpx
+        from app.main import app
+
+        payloads = [p.model_dump(mode="json") for p in products]
+        analysis_cache.clear()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def post(payload):
+                response = await client.post("/api/analyze", json=payload)
+                response.raise_for_status()
+
+            results["api_analyze"] = await bench_async(post, payloads, repeat, measure_alloc)
+
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """รายการ benchmark ที่ p50 หรือ p95 ช้าลงเกิน threshold (สัดส่วน) เทียบกับ baseline"""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            if before[metric] and result[metric] > before[metric] * (1 + threshold):
+                change = result[metric] / before[metric] - 1
+                regressions.append(f"{name}.{metric}: {before[metric]} -> {result[metric]} (+{change:.0%})")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark analyzer และ /api/analyze")
+    parser.add_argument("-n", "--products", type=int, default=500, help="จำนวนสินค้าสังเคราะห์")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="จำนวนรอบที่วัดต่อ benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-alloc", action="store_true", help="ไม่วัด allocation (tracemalloc)")
+    parser.add_argument("--only", help="รันเฉพาะ benchmark ที่ชื่อมีคำนี้")
+    parser.add_argument("-o", "--output", help="ไฟล์ JSON ของผลลัพธ์")
+    parser.add_argument("--compare", help="ไฟล์ JSON ของรอบก่อนสำหรับตรวจ regression")
+    parser.add_argument("--threshold", type=float, default=0.10, help="สัดส่วนที่ช้าลงได้ก่อนนับเป็น regression")
+    args = parser.parse_args(argv)
+
+    products = generate_products(args.products, args.seed)
+    results = asyncio.run(run_benchmarks(products, args.repeat, not args.no_alloc, args.only))
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "products": args.products,
+            "repeat": args.repeat,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    width = max(len(name) for name in results) if results else 0
+    for name, r in results.items():
+        print(
+            f"{name:<{width}}  p50 {r['p50_us']:>9.1f}us  p95 {r['p95_us']:>9.1f}us  "
+            f"p99 {r['p99_us']:>9.1f}us  {r['ops_per_sec']:>10.1f} ops/s",
+            file=sys.stderr
+        )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
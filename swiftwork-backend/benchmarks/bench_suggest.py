@@ -0,0 +1,163 @@
+"""
+Benchmark การเรียก LLM ของ /api/suggest: แบบรวม request (micro-batching) เทียบกับเรียกทีละ request
+
+เปิด model server จำลองที่เข้ากันได้กับ OpenAI API บน localhost (หน่วงเวลาต่อ call และรับ call
+พร้อมกันได้จำกัดเหมือน upstream จริง) แล้วยิง generate_suggestion พร้อมกันหลายร้อยครั้งผ่าน OpenAIBackend
+
+    python -m benchmarks.bench_suggest
+    python -m benchmarks.bench_suggest -n 500 -c 100 --latency-ms 300 --batch-sizes 1,8,32 -o suggest.json
+"""
+from benchmarks.bench_analyzer import THAI_WORDS, summarize, _git_commit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import platform
+import random
+import re
+import sys
+import threading
+import time
+
+_ITEM = re.compile(r"^### \d+$", re.MULTILINE)
+
+class FakeModelServer:
+    """
+    /v1/chat/completions จำลอง: หน่วง latency + per_item ต่อคำถามใน prompt
+    รับพร้อมกันได้ไม่เกิน capacity call (ที่เกินต้องรอคิว)
+    """
+
+    def __init__(self, latency_seconds: float, per_item_seconds: float, capacity: int):
+        slots = threading.BoundedSemaphore(capacity)
+        stats = self.stats = {"calls": 0, "items": 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][-1]["content"]
+                items = len(_ITEM.findall(prompt)) or 1
+                with slots:
+                    time.sleep(latency_seconds + per_item_seconds * items)
+                stats["calls"] += 1
+                stats["items"] += items
+                if items > 1:
+                    content = json.dumps([f"คำแนะนำ {i}" for i in range(items)], ensure_ascii=False)
+                else:
+                    content = "คำแนะนำ"
+                payload = json.dumps({
+                    "id": "chatcmpl-local",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+async def run_mode(base_url: str, batch_size: int, max_wait_ms: float, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """ยิง generate_suggestion requests ครั้ง (พร้อมกันไม่เกิน concurrency) ด้วย LLM client ใหม่ที่ไม่มี cache"""
+    from app.services import llm, suggestions
+    from app.services.cache import AnalysisCache
+
+    backend = llm.OpenAIBackend("sk-local", "fake-model", 200, 60.0, base_url)
+    client = llm._client = llm.LLMClient(backend, AnalysisCache(0, 0), llm.TokenBucket(1e6, 1_000_000), 60.0)
+    batcher = suggestions._batcher = suggestions.MicroBatcher(batch_size, max_wait_ms / 1000)
+
+    rng = random.Random(seed)
+    values = [f"{rng.choice(THAI_WORDS)}{rng.choice(THAI_WORDS)} #{i}" for i in range(requests)]
+    gate = asyncio.Semaphore(concurrency)
+    durations: List[int] = []
+
+    async def one(value: str) -> None:
+        async with gate:
+            started = time.perf_counter_ns()
+            await suggestions.generate_suggestion("ชื่องาน", value)
+            durations.append(time.perf_counter_ns() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(v) for v in values))
+    elapsed = time.perf_counter() - started
+    await llm.close_llm_client()
+    suggestions._batcher = None
+
+    result = summarize(durations, None)
+    result["ops_per_sec"] = round(requests / elapsed, 1)  # throughput จริงของทั้งรอบ (request พร้อมกัน)
+    result["upstream_calls"] = client.upstream_calls
+    result["errors"] = client.errors
+    result["mean_batch_size"] = batcher.stats()["mean_batch_size"] if batch_size > 1 else 1.0
+    return result
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching ของ LLM suggestion")
+    parser.add_argument("-n", "--requests", type=int, default=300, help="จำนวน request ต่อรอบ")
+    parser.add_argument("-c", "--concurrency", type=int, default=64, help="request ที่ค้างพร้อมกันสูงสุด")
+    parser.add_argument("--batch-sizes", default="1,16", help="LLM_BATCH_MAX_SIZE ที่จะเทียบ (1 = ไม่รวม)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="เวลาต่อ call ของ model จำลอง")
+    parser.add_argument("--per-item-ms", type=float, default=5.0, help="เวลาเพิ่มต่อคำถามใน 1 call")
+    parser.add_argument("--capacity", type=int, default=8, help="call ที่ model จำลองรับพร้อมกันได้")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="ไฟล์ JSON ของผลลัพธ์")
+    args = parser.parse_args(argv)
+
+    server = FakeModelServer(args.latency_ms / 1000, args.per_item_ms / 1000, args.capacity)
+    results = {}
+    try:
+        for size in (int(s) for s in args.batch_sizes.split(",")):
+            name = "unbatched" if size <= 1 else f"batched_{size}"
+            results[name] = asyncio.run(
+                run_mode(server.base_url, size, args.max_wait_ms, args.requests, args.concurrency, args.seed)
+            )
+    finally:
+        server.close()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "max_wait_ms": args.max_wait_ms,
+            "model_latency_ms": args.latency_ms,
+            "model_per_item_ms": args.per_item_ms,
+            "model_capacity": args.capacity
+        },
+        "results": results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, r in results.items():
+        print(
+            f"{name:<12}  p50 {r['p50_us'] / 1000:>8.1f}ms  p95 {r['p95_us'] / 1000:>8.1f}ms  "
+            f"{r['ops_per_sec']:>8.1f} req/s  {r['upstream_calls']:>5} calls  batch {r['mean_batch_size']}",
+            file=sys.stderr
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+fixture ที่ใช้ร่วมกัน: corpus + ไฟล์ index ชั่วคราว (ไม่แตะไฟล์จริงใน app/data)
+"""
+from app.config import get_settings
+from app.services import ingest, keywords, price_index
+import dataclasses
+import json
+import os
+import pytest
+
+def write_corpus(path, listings):
+    path.write_text("".join(json.dumps(listing, ensure_ascii=False) + "\n" for listing in listings), encoding="utf-8")
+
+def touch(path):
+    """เลื่อน mtime ไปข้างหน้า ให้ corpus_version เปลี่ยนแน่นอนแม้เขียนไฟล์ภายใน ns เดียวกัน"""
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """settings ที่ชี้ corpus/index ไปยัง tmp_path และ index กลางที่ยังไม่โหลด"""
+    corpus_path = tmp_path / "corpus.jsonl"
+    write_corpus(corpus_path, [
+        {"title": "ออกแบบโลโก้", "category": "Logo", "subcategory": "Minimal", "price": p} for p in (100, 200, 300)
+    ])
+    settings = dataclasses.replace(
+        get_settings(),
+        corpus_path=corpus_path,
+        price_index_path=tmp_path / "price_index.json",
+        keyword_index_path=tmp_path / "keyword_index.json",
+        price_index_max_per_group=4
+    )
+    for module in (price_index, keywords, ingest):
+        monkeypatch.setattr(module, "get_settings", lambda: settings)
+    monkeypatch.setattr(price_index, "_price_index", None)
+    monkeypatch.setattr(keywords, "_keyword_index", None)
+    return settings
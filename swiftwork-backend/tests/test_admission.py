@@ -0,0 +1,35 @@
+"""
+ทดสอบ rate limit ต่อรายการของ batch/NDJSON (ItemQuota)
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.services.admission import ItemQuota, MemoryRateLimitBackend, RateLimited, RateLimiter
+from app.services.batch import analyze_batch
+import asyncio
+
+def _limiter(burst):
+    return RateLimiter(MemoryRateLimitBackend(0.001, burst, 10), MemoryRateLimitBackend(0.001, 100, 10))
+
+def test_quota_charges_every_item_after_the_prepaid_one():
+    limiter = _limiter(burst=2)
+
+    async def charge_all():
+        quota = ItemQuota(limiter, "id:1.2.3.4/a", "net:1.2.3.4")
+        outcomes = []
+        for _ in range(4):
+            try:
+                await quota.charge()
+                outcomes.append("ok")
+            except RateLimited as e:
+                outcomes.append(e.retry_after)
+        return outcomes
+
+    outcomes = asyncio.run(charge_all())
+    assert outcomes[:3] == ["ok", "ok", "ok"]  # รายการแรกจ่ายไปแล้ว + burst 2
+    assert outcomes[3] > 0
+    assert limiter.allowed == 2 and limiter.limited == 1
+
+def test_batch_items_over_quota_get_an_error():
+    quota = ItemQuota(_limiter(burst=1), "id:1.2.3.4/a", "net:1.2.3.4")
+    results = asyncio.run(analyze_batch([{}, {}, {}], concurrency=1, quota=quota))
+    # 2 รายการแรกผ่าน rate limit รายการที่ 3 ถูกจำกัด
+    assert [(r.error or "").startswith("rate limited") for r in results] == [False, False, True]
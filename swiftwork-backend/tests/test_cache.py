@@ -0,0 +1,157 @@
+"""
+ทดสอบ cache ผลวิเคราะห์: hash ของ ProductData, LRU/TTL, invalidate ตอน regenerate, SingleFlight
+stream ที่ใช้ flight เดียวกับ analyze และ peek ที่ไม่กระทบ stats
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.api.schemas import ProductData
+from app.services import analyzer
+from app.services.cache import AnalysisCache, SingleFlight, TTLCache, analysis_cache, compute_product_hash
+import asyncio
+import pytest
+import time
+
+PRODUCT = {"title": "รับออกแบบโลโก้", "description": "ออกแบบโลโก้ มืออาชีพ", "price": 500, "category": "Graphic"}
+
+def test_product_hash_ignores_key_order():
+    reordered = dict(reversed(list(PRODUCT.items())))
+    assert compute_product_hash(ProductData(**PRODUCT)) == compute_product_hash(ProductData(**reordered))
+    assert compute_product_hash(ProductData(**PRODUCT)) != compute_product_hash(ProductData(**{**PRODUCT, "price": 501}))
+
+def test_lru_evicts_least_recently_used():
+    cache = AnalysisCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" กลายเป็นตัวที่เก่าที่สุด
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+def test_invalidate_removes_entry():
+    cache = AnalysisCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    assert cache.get("a") is None
+
+def test_analyze_serves_from_cache_and_regenerate_recomputes():
+    analysis_cache.clear()
+    product = ProductData(**PRODUCT)
+    key = compute_product_hash(product)
+
+    async def scenario():
+        first = await analyzer.analyze_product(product)
+        hits = analysis_cache.hits
+        assert await analyzer.analyze_product(product) is first
+        assert analysis_cache.hits == hits + 1
+
+        refreshed = await analyzer.analyze_product(product, force_refresh=True)
+        assert refreshed is not first
+        assert refreshed == first
+        assert analysis_cache.peek(key) is refreshed
+
+    asyncio.run(scenario())
+
+def test_single_flight_shares_one_computation():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("k", compute) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert [value for value, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False] + [True] * 4
+    assert flights.stats()["dedup_ratio"] == 0.8
+    assert flights.stats()["inflight"] == 0
+
+def test_single_flight_shares_errors_and_survives_cancelled_waiter():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("k", failing))
+        second = asyncio.ensure_future(flights.do("k", failing))
+        await asyncio.sleep(0)
+        first.cancel()  # ผู้เรียกคนแรกตัดการเชื่อมต่อ - งานยังทำต่อให้คนที่รออยู่
+        with pytest.raises(ValueError, match="boom"):
+            await second
+
+    asyncio.run(scenario())
+    assert flights.leaders == 1 and flights.shared == 1
+
+def test_stream_miss_shares_flight_with_analyze(monkeypatch):
+    analysis_cache.clear()
+    product = ProductData(**{**PRODUCT, "price": 777})
+    runs = 0
+    iter_topics = analyzer.iter_topics
+
+    async def counting_iter_topics(topics, product):
+        nonlocal runs
+        runs += 1
+        async for item in iter_topics(topics, product):
+            await asyncio.sleep(0)
+            yield item
+
+    monkeypatch.setattr(analyzer, "iter_topics", counting_iter_topics)
+    monkeypatch.setattr(analyzer, "run_topics", lambda topics, product: pytest.fail("analyze should join the stream's flight"))
+
+    async def stream():
+        return [event async for event in analyzer.stream_analysis(product)]
+
+    async def scenario():
+        streamed = asyncio.ensure_future(stream())
+        await asyncio.sleep(0)  # stream เริ่ม flight ก่อน
+        analyzed, joined = await asyncio.gather(analyzer.analyze_product(product), stream())
+        return await streamed, analyzed, joined
+
+    streamed, analyzed, joined = asyncio.run(scenario())
+    assert runs == 1
+    assert streamed[-1][1][1] is analyzed and joined[-1][1][1] is analyzed
+    assert [topic for kind, topic in joined if kind == "topic"] == analyzed.topics
+    assert len([kind for kind, _ in streamed if kind == "topic"]) == len(analyzed.topics)
+
+def test_get_counts_hits_and_misses():
+    cache = TTLCache(max_entries=4, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+def test_peek_does_not_touch_stats_or_lru_order():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("old", 1)
+    cache.set("new", 2)
+    assert cache.peek("old") == 1
+    assert cache.peek("missing") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    cache.set("third", 3)  # peek ไม่ได้ขยับ "old" -> ยังเป็นตัวที่เก่าที่สุดและถูก evict
+    assert cache.peek("old") is None
+    assert cache.peek("new") == 2
+    assert cache.evictions == 1
+
+def test_expired_entries_are_not_returned():
+    cache = TTLCache(max_entries=4, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.peek("a") is None
+    assert cache.get("a") is None
+    assert (cache.expirations, cache.misses) == (1, 1)
+
+def test_zero_entries_disables_cache():
+    cache = TTLCache(max_entries=0, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.peek("a") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,230 @@
+"""
+ทดสอบ image_inspector กับ HTTP server จำลองในเครื่อง (ไม่ออก network)
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.services.image_inspector import (
+    BROKEN, OK, UNCHECKED, BlockedURLError, ImageInspector, InspectionCache, URLGuard, parse_image_header
+)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import httpx
+import pytest
+import struct
+import threading
+import urllib.parse
+
+def png(width: int, height: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+def jpeg(width: int, height: int, exif_bytes: int = 0) -> bytes:
+    app1 = b"\xff\xe1" + struct.pack(">H", exif_bytes + 2) + b"\x00" * exif_bytes
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app1 + sof0 + b"\xff\xd9"
+
+def gif(width: int, height: int) -> bytes:
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00\x00\x00"
+
+def webp_vp8(width: int, height: int) -> bytes:
+    return b"RIFF\x00\x00\x00\x00WEBPVP8 \x00\x00\x00\x00\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", width, height)
+
+def webp_vp8l(width: int, height: int) -> bytes:
+    bits = (width - 1) | ((height - 1) << 14)
+    return b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + bits.to_bytes(4, "little") + b"\x00" * 8
+
+def webp_vp8x(width: int, height: int) -> bytes:
+    return (
+        b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00\x00\x00\x00\x00"
+        + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    )
+
+@pytest.mark.parametrize("data, expected", [
+    (png(1280, 720), ("png", 1280, 720)),
+    (jpeg(1920, 1080), ("jpeg", 1920, 1080)),
+    (jpeg(800, 600, exif_bytes=30000), ("jpeg", 800, 600)),
+    (gif(320, 180), ("gif", 320, 180)),
+    (webp_vp8(640, 360), ("webp", 640, 360)),
+    (webp_vp8l(1000, 563), ("webp", 1000, 563)),
+    (webp_vp8x(4000, 2250), ("webp", 4000, 2250)),
+])
+def test_parse_image_header(data, expected):
+    info = parse_image_header(data)
+    assert (info.format, info.width, info.height) == expected
+
+def test_parse_image_header_needs_more_bytes():
+    assert parse_image_header(png(10, 10)[:20]) is None
+    assert parse_image_header(jpeg(10, 10, exif_bytes=1000)[:500]) is None
+    assert parse_image_header(b"<html></html>") is None
+
+class StubImageServer:
+    """
+    server จำลองในเครื่อง: path -> bytes ของไฟล์ ตอบ Range (206), ETag/If-None-Match (304)
+    และ redirect (/redirect?to=...) บันทึก header ของทุก request ไว้ใน requests
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                if self.path.startswith("/redirect?to="):
+                    self.send_response(302)
+                    self.send_header("Location", urllib.parse.unquote(self.path.split("=", 1)[1]))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{len(data)}-{hash(data) & 0xffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                byte_range = self.headers.get("Range", "")
+                if byte_range.startswith("bytes=0-"):
+                    end = min(int(byte_range[len("bytes=0-"):]), len(data) - 1)
+                    body = data[:end + 1]
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes 0-{end}/{len(data)}")
+                else:
+                    body = data
+                    self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    stub = StubImageServer({
+        "/cover.png": png(1280, 720) + b"\x00" * 200000,
+        "/cover.jpg": jpeg(1920, 1080, exif_bytes=20000) + b"\x00" * 100000,
+        "/cover.gif": gif(320, 180),
+        "/cover.webp": webp_vp8x(1600, 900),
+        "/page.html": b"<html>" + b" " * 5000 + b"</html>",
+    })
+    yield stub
+    stub.close()
+
+def run(coro_factory, ttl_seconds=3600.0, guard=None, max_header_bytes=65536):
+    """รัน coro_factory(inspector) บน event loop ใหม่ คืน (ผล, inspector)"""
+    async def main():
+        async with httpx.AsyncClient(follow_redirects=False) as client:
+            inspector = ImageInspector(
+                client, InspectionCache(100), ttl_seconds, max_header_bytes,
+                guard or URLGuard(allow_private=True)
+            )
+            return await coro_factory(inspector), inspector
+    return asyncio.run(main())
+
+@pytest.mark.parametrize("path, expected", [
+    ("/cover.png", ("png", 1280, 720)),
+    ("/cover.jpg", ("jpeg", 1920, 1080)),
+    ("/cover.gif", ("gif", 320, 180)),
+    ("/cover.webp", ("webp", 1600, 900)),
+])
+def test_inspect_reads_only_the_header_with_a_range_request(server, path, expected):
+    info, inspector = run(lambda inspector: inspector.inspect(server.base + path), max_header_bytes=32768)
+    assert (info.format, info.width, info.height) == expected
+    assert info.fingerprint
+    assert server.requests[0][1]["Range"] == "bytes=0-32767"
+    assert inspector.fetches == 1
+
+def test_inspect_non_image_and_missing_file(server):
+    async def both(inspector):
+        return await inspector.inspect(server.base + "/page.html"), await inspector.inspect(server.base + "/missing.png")
+    (page, missing), inspector = run(both)
+    assert page is None and missing is None
+    assert len(inspector.cache) == 2  # ลิงก์เสีย/ไม่ใช่ภาพก็ cache ไว้
+
+def test_cache_hit_skips_the_network(server):
+    async def twice(inspector):
+        first = await inspector.inspect(server.base + "/cover.png")
+        second = await inspector.inspect(server.base + "/cover.png")
+        return first, second
+    (first, second), inspector = run(twice)
+    assert first.to_dict() == second.to_dict()
+    assert len(server.requests) == 1
+    assert (inspector.fetches, inspector.hits) == (1, 1)
+
+def test_expired_entry_is_revalidated_with_etag(server):
+    async def twice(inspector):
+        first = await inspector.inspect(server.base + "/cover.jpg")
+        second = await inspector.inspect(server.base + "/cover.jpg")
+        return first, second
+    (first, second), inspector = run(twice, ttl_seconds=0)
+    assert first.to_dict() == second.to_dict()
+    assert "If-None-Match" not in server.requests[0][1]
+    assert server.requests[1][1]["If-None-Match"] == '"%d-%x"' % (
+        len(server.files["/cover.jpg"]), hash(server.files["/cover.jpg"]) & 0xffff
+    )
+    assert (inspector.fetches, inspector.revalidated, inspector.hits) == (2, 1, 0)
+
+def test_inspect_many_keeps_order_and_dedupes(server):
+    urls = [server.base + "/cover.png", server.base + "/missing.png", server.base + "/cover.png", server.base + "/cover.gif"]
+    results, _ = run(lambda inspector: inspector.inspect_many(urls, concurrency=2, timeout=5.0))
+    assert [status for status, _ in results] == [OK, BROKEN, OK, OK]
+    assert results[3][1].format == "gif"
+    assert sorted(path for path, _ in server.requests) == ["/cover.gif", "/cover.png", "/missing.png"]
+
+def test_redirect_is_followed(server):
+    info, _ = run(lambda inspector: inspector.inspect(server.base + "/redirect?to=/cover.webp"))
+    assert info.format == "webp"
+    assert [path for path, _ in server.requests] == ["/redirect?to=%2Fcover.webp", "/cover.webp"]
+
+def test_guard_blocks_internal_addresses(server):
+    with pytest.raises(BlockedURLError):
+        run(lambda inspector: inspector.inspect(server.base + "/cover.png"), guard=URLGuard())
+    assert server.requests == []
+
+def test_guard_blocks_redirect_to_a_disallowed_host(server):
+    # hop แรกผ่าน allowlist แต่ redirect ไป host อื่น -> ต้องหยุดก่อนยิง hop ที่สอง
+    target = server.base + "/redirect?to=http://169.254.169.254/latest/meta-data/"
+    guard = URLGuard(allowed_hosts=("127.0.0.1",), allow_private=True)
+    with pytest.raises(BlockedURLError):
+        run(lambda inspector: inspector.inspect(target), guard=guard)
+    assert len(server.requests) == 1
+
+def test_blocked_album_images_are_unchecked(server):
+    results, inspector = run(
+        lambda inspector: inspector.inspect_many([server.base + "/cover.png"], concurrency=1, timeout=5.0),
+        guard=URLGuard()
+    )
+    assert results == [(UNCHECKED, None)]
+    assert inspector.blocked == 1
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/a.png",
+    "http://10.0.0.5/a.png",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/a.png",
+    "http://[::ffff:192.168.1.1]/a.png",
+    "http://localhost:27017/",
+    "ftp://example.com/a.png",
+])
+def test_guard_rejects(url):
+    with pytest.raises(BlockedURLError):
+        asyncio.run(URLGuard().check(httpx.URL(url)))
+
+def test_guard_allowlist_matches_subdomains():
+    guard = URLGuard(allowed_hosts=("susercontent.com",), allow_private=True)
+    assert guard.host_allowed("down-th.img.susercontent.com")
+    assert guard.host_allowed("susercontent.com")
+    assert not guard.host_allowed("evilsusercontent.com")
+    asyncio.run(guard.check(httpx.URL("https://cf.susercontent.com/file/a.jpg")))
@@ -0,0 +1,52 @@
+"""
+ทดสอบตาราง df ของ keyword index: ตรวจ corpus_version ตอนโหลด และนับเพิ่มจาก admin ingest เท่านั้น
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.api.schemas import ProductData
+from app.services import ingest, keywords
+from app.services.analyzer import analyze_product
+from app.services.keywords import KeywordIndex
+from conftest import touch, write_corpus
+import asyncio
+import json
+
+def test_add_document_counts_each_term_once_per_document():
+    index = KeywordIndex()
+    index.add_document("logo logo design")
+    index.add_document("logo")
+    assert index.doc_count == 2
+    assert index.doc_freq == {"logo": 2, "design": 1}
+    assert index.idf("design") > index.idf("logo")
+
+def test_saved_index_is_rebuilt_when_corpus_changes(corpus):
+    index = keywords.get_keyword_index()
+    keywords.save_keyword_index()
+    assert json.loads(corpus.keyword_index_path.read_text(encoding="utf-8"))["source_version"] == index.source_version
+
+    keywords._keyword_index = None
+    loaded = keywords.get_keyword_index()
+    assert loaded.doc_count == 3 and not loaded.dirty
+
+    write_corpus(corpus.corpus_path, [{"title": "website", "category": "Web", "price": 5000}])
+    touch(corpus.corpus_path)
+    keywords._keyword_index = None
+    rebuilt = keywords.get_keyword_index()
+    assert rebuilt.doc_count == 1 and "website" in rebuilt.doc_freq
+
+def test_ingest_updates_document_frequencies(corpus):
+    before = keywords.get_keyword_index()
+    ingest.ingest_listings([{"title": "website shop", "category": "Web", "price": 5000}])
+    index = keywords.get_keyword_index()
+    assert index is before
+    assert index.doc_count == 4
+    assert index.doc_freq["website"] == 1
+
+    keywords._keyword_index = None  # บันทึกพร้อม version ใหม่แล้ว -> restart โหลดจากไฟล์
+    reloaded = keywords.get_keyword_index()
+    assert not reloaded.dirty and reloaded.doc_count == 4
+
+def test_analysis_does_not_change_document_frequencies(corpus):
+    index = keywords.get_keyword_index()
+    snapshot = (index.doc_count, dict(index.doc_freq))
+    asyncio.run(analyze_product(ProductData(title="คำใหม่ไม่เคยพบ", description="unseenterm unseenterm", category="Logo", price=100)))
+    assert (index.doc_count, index.doc_freq) == snapshot
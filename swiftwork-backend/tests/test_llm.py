@@ -0,0 +1,35 @@
+"""
+ทดสอบ LLMClient: รวม prompt เป็น upstream call เดียว และ backend ที่คืนคำตอบไม่ครบ
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.services.cache import TTLCache
+from app.services.llm import FakeBackend, LLMClient, TokenBucket
+from typing import List, Sequence
+import asyncio
+
+class ShortBackend(FakeBackend):
+    """คืนคำตอบน้อยกว่าจำนวน prompt (เช่น upstream ตัด array ทิ้ง)"""
+
+    async def complete_many(self, prompts: Sequence[str]) -> List[str]:
+        return (await super().complete_many(prompts))[:-1]
+
+def _client(backend):
+    return LLMClient(backend, TTLCache(100, 60), TokenBucket(100, 10), timeout_seconds=1.0)
+
+def test_complete_many_batches_missing_prompts():
+    backend = FakeBackend(latency_seconds=0)
+    client = _client(backend)
+    answers = asyncio.run(client.complete_many(["a", "b", "a"]))
+    assert answers[0] == answers[2] and answers[0] != answers[1]
+    assert backend.calls == 1 and client.stats()["inflight"] == 0
+
+def test_short_answer_list_fails_every_prompt_of_the_call():
+    client = _client(ShortBackend(latency_seconds=0))
+
+    async def scenario():
+        return await asyncio.wait_for(client.complete_many(["a", "b", "c"]), 1.0)
+
+    answers = asyncio.run(scenario())  # ไม่ค้างรอ prompt ที่ไม่ได้คำตอบ
+    assert all(isinstance(answer, ValueError) for answer in answers)
+    assert client.errors == 1 and client.stats()["inflight"] == 0
+    assert client.cached("a") is None
@@ -0,0 +1,18 @@
+"""
+ทดสอบ POST /api/analyze/ndjson: ผลตามลำดับบรรทัด + บรรทัดสรุป throughput ท้าย response
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.main import app
+from fastapi.testclient import TestClient
+import json
+
+def test_ndjson_response_ends_with_summary():
+    body = b'{"title": "a", "price": 100}\n\nnot json\n{"title": "b", "price": 200}\n'
+    response = TestClient(app).post("/api/analyze/ndjson", content=body)
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert "overall_score" in records[0] and records[1]["line"] == 3 and "overall_score" in records[2]
+    summary = records[-1]["summary"]
+    assert (summary["records"], summary["errors"]) == (3, 1)
+    assert summary["elapsed_seconds"] >= 0 and summary["records_per_second"] > 0
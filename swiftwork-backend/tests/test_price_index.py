@@ -0,0 +1,81 @@
+"""
+ทดสอบ price index: cap ต่อกลุ่ม, add แบบ insort, ตรวจ corpus_version ตอนโหลด และ admin ingest
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.services import ingest, price_index
+from app.services.price_index import PriceIndex
+from conftest import touch, write_corpus
+import json
+
+def test_add_keeps_groups_sorted():
+    index = PriceIndex()
+    for price in (300, 100, 200):
+        index.add("Logo", "Minimal", price, max_per_group=10)
+    assert list(index.distribution("Logo", "Minimal").prices) == [100.0, 200.0, 300.0]
+    assert len(index.distribution("Logo")) == 3
+
+def test_add_never_exceeds_cap():
+    index = PriceIndex()
+    for price in range(1, 1001):
+        index.add("Logo", None, price, max_per_group=50)
+    distribution = index.distribution("Logo")
+    assert len(distribution) == 50
+    assert list(distribution.prices) == sorted(distribution.prices)
+    assert distribution.quantile(0.5) > 100  # เป็นตัวแทนของทุกราคา ไม่ใช่แค่ 50 ตัวแรก
+
+def test_add_ignores_invalid_prices():
+    index = PriceIndex()
+    index.add("Logo", None, 0, max_per_group=10)
+    index.add(None, None, 100, max_per_group=10)
+    assert len(index) == 0 and not index.dirty
+
+def test_build_caps_each_group(tmp_path):
+    corpus_path = tmp_path / "corpus.jsonl"
+    write_corpus(corpus_path, [{"category": "Logo", "price": p} for p in range(1, 101)])
+    distribution = PriceIndex.build_from_corpus(corpus_path, max_per_group=5).distribution("Logo")
+    assert list(distribution.prices) == [1.0, 26.0, 51.0, 75.0, 100.0]
+
+def test_saved_index_is_rebuilt_when_corpus_changes(corpus):
+    index = price_index.get_price_index()
+    price_index.save_price_index()
+    assert json.loads(corpus.price_index_path.read_text())["source_version"] == index.source_version
+
+    price_index._price_index = None
+    assert price_index.get_price_index().source_version == index.source_version  # ตรงกัน = โหลดจากไฟล์
+    assert not price_index.get_price_index().dirty
+
+    write_corpus(corpus.corpus_path, [{"category": "Logo", "subcategory": "Minimal", "price": 900}])
+    touch(corpus.corpus_path)
+    price_index._price_index = None
+    rebuilt = price_index.get_price_index()
+    assert list(rebuilt.distribution("Logo", "Minimal").prices) == [900.0]
+
+def test_ingest_appends_to_corpus_and_updates_index(corpus):
+    before = price_index.get_price_index()
+    summary = ingest.ingest_listings([
+        {"category": "Logo", "subcategory": "Minimal", "price": 250, "title": "โลโก้"},
+        {"category": "Logo", "price": -5},
+        "not a listing"
+    ])
+    assert summary["accepted"] == 1
+    assert [error["index"] for error in summary["errors"]] == [1, 2]
+
+    index = price_index.get_price_index()
+    assert index is before
+    assert list(index.distribution("Logo", "Minimal").prices) == [100.0, 200.0, 250.0, 300.0]
+    assert corpus.corpus_path.read_text(encoding="utf-8").count("\n") == 4
+
+    # บันทึกแล้วพร้อม version ของ corpus ใหม่ -> restart โหลดจากไฟล์ได้เลย
+    price_index._price_index = None
+    assert not price_index.get_price_index().dirty
+    assert len(price_index.get_price_index().distribution("Logo", "Minimal")) == 4
+
+def test_ingest_rebuilds_index_that_is_behind_the_corpus(corpus):
+    price_index.get_price_index()
+    with open(corpus.corpus_path, "a", encoding="utf-8") as f:  # worker อื่นเขียน corpus ไปก่อน
+        f.write(json.dumps({"category": "Logo", "subcategory": "Minimal", "price": 150}) + "\n")
+    touch(corpus.corpus_path)
+
+    ingest.ingest_listings([{"category": "Logo", "subcategory": "Minimal", "price": 250}])
+    prices = list(price_index.get_price_index().distribution("Logo", "Minimal").prices)
+    assert len(prices) == 4 and 150.0 in prices and 250.0 in prices
@@ -0,0 +1,51 @@
+"""
+ทดสอบ ModelResponse/model_json: bytes ต้องตรงกับ model_dump_json ทุกตัวอักษร
+รวมกรณีที่ต่อ JSON ของหัวข้อที่ analyzer สร้างไว้ล่วงหน้า (prebuilt_topics)
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.api.responses import ModelResponse, model_json, prebuilt_topics
+from app.api.schemas import BatchItemResult, ProductData
+from app.services import analyzer
+from pydantic import ValidationError
+import asyncio
+import pytest
+
+def analyze(**fields):
+    return asyncio.run(analyzer.build_analysis(ProductData(**fields)))[0]
+
+def test_empty_listing_uses_prebuilt_topics_and_matches_pydantic():
+    result = analyze()
+    assert sum(prebuilt_topics.get(topic) is not None for topic in result.topics) >= 3
+    assert model_json(result) == result.model_dump_json().encode("utf-8")
+    assert ModelResponse(result).body == result.model_dump_json().encode("utf-8")
+
+def test_mixed_listing_matches_pydantic():
+    result = analyze(title="ออกแบบโลโก้มินิมอลสำหรับร้านค้าออนไลน์", price=1500, category="ออกแบบกราฟิก", tags=["โลโก้"])
+    assert model_json(result) == result.model_dump_json().encode("utf-8")
+    for topic in result.topics:
+        assert model_json(topic) == topic.model_dump_json().encode("utf-8")
+
+def test_batch_items_match_pydantic():
+    items = [BatchItemResult(index=0, result=analyze()), BatchItemResult(index=1, error="invalid")]
+    expected = b"[" + b",".join(item.model_dump_json().encode("utf-8") for item in items) + b"]"
+    assert ModelResponse(items).body == expected
+
+def test_prebuilt_topics_are_shared_and_frozen():
+    first, second = analyze().topics[0], analyze().topics[0]
+    assert first is second
+    with pytest.raises(ValidationError):
+        first.score = 100
+    with pytest.raises(ValidationError):
+        first.details.ai_fix = "changed"
+    copy = first.model_copy(update={"score": 1})
+    assert prebuilt_topics.get(copy) is None
+    assert model_json(copy) == copy.model_dump_json().encode("utf-8")
+
+def test_title_pass_band_is_keyed_by_band_position():
+    rules = analyzer.get_rules()
+    position = next(i for i, band in enumerate(rules.title_bands.outcomes) if band["status"] == "pass")
+    length = rules.title_bands.uppers[position]  # ความยาวสูงสุดของ band ที่ผ่าน
+    topic = analyzer.analyze_title("ก" * length)
+    assert topic.status == "pass"
+    assert rules.prebuilt[("title", position)] is topic
+    assert analyzer.analyze_title("ข" * (length - 1)) is topic
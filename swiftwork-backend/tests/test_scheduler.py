@@ -0,0 +1,47 @@
+"""
+ทดสอบ scheduler: timeout ของหัวข้อ inline และ state ที่แชร์เมื่อย้ายหัวข้อไป thread pool
+รัน: python -m pytest -q (จากโฟลเดอร์ swiftwork-backend)
+"""
+from app.config import get_settings
+from app.services import scheduler
+from app.services.scheduler import TopicTask, run_topics
+from app.services.thai_tokenizer import ThaiTokenizer
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import dataclasses
+import time
+
+def _slow(product, deps):
+    time.sleep(0.02)
+    return "slow"
+
+def _topics():
+    return [
+        TopicTask("fast", lambda product, deps: "fast", lambda product: "fallback"),
+        TopicTask("slow", _slow, lambda product: "fallback", timeout=0.005),
+        TopicTask("after", lambda product, deps: deps["slow"] + "!", lambda product: "fallback", depends_on=["slow"])
+    ]
+
+def test_inline_topic_over_timeout_uses_fallback():
+    results, degraded = asyncio.run(run_topics(_topics(), None))
+    assert results == {"fast": "fast", "slow": "fallback", "after": "fallback!"}
+    assert degraded == {"slow"}
+
+def test_offloaded_inline_topic_is_cut_at_timeout(monkeypatch):
+    settings = dataclasses.replace(get_settings(), topic_pool_topics=("slow",))
+    monkeypatch.setattr(scheduler, "get_settings", lambda: settings)
+    results, degraded = asyncio.run(run_topics(_topics(), None))
+    assert results["slow"] == "fallback" and degraded == {"slow"}
+
+def test_tokenizer_cache_is_thread_safe():
+    tokenizer = ThaiTokenizer(["ออกแบบ", "โลโก้", "มินิมอล"], max_cache_entries=8)
+    texts = [f"ออกแบบโลโก้มินิมอล {i}" for i in range(64)]
+
+    def work(offset):
+        return [tokenizer.tokenize(texts[(offset + i) % len(texts)]) for i in range(2000)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for result in pool.map(work, range(8)):
+            assert all(tokens[:3] == ("ออกแบบ", "โลโก้", "มินิมอล") for tokens in result)
+    stats = tokenizer.stats()
+    assert stats["cache_size"] <= 8 and stats["hits"] + stats["misses"] == 16000
@@ -1,6 +1,38 @@
 // API Service สำหรับเรียก Backend
 const API_BASE_URL = 'http://localhost:8000/api';
 
+// id ของ install นี้ - backend ใช้นับ rate limit แยกต่อผู้ใช้ (ผู้ใช้หลัง IP เดียวกันไม่แย่ง bucket กัน)
+const CLIENT_ID_HEADER = 'X-Client-Id';
+const CLIENT_ID_STORAGE_KEY = 'swiftworkClientId';
+let clientIdPromise: Promise<string> | null = null;
+
+const getClientId = (): Promise<string> => {
+  // สุ่มครั้งแรกแล้วเก็บใน chrome.storage.local ให้คงเดิมข้ามแท็บและการเปิดเบราว์เซอร์ใหม่
+  if (!clientIdPromise) {
+    clientIdPromise = chrome.storage.local
+      .get(CLIENT_ID_STORAGE_KEY)
+      .then(async (stored) => {
+        const existing = stored[CLIENT_ID_STORAGE_KEY];
+        if (typeof existing === 'string' && existing) {
+          return existing;
+        }
+        const id = crypto.randomUUID();
+        await chrome.storage.local.set({ [CLIENT_ID_STORAGE_KEY]: id });
+        return id;
+      })
+      .catch((error) => {
+        console.warn('Cannot persist client id, using a per-page id:', error);
+        return crypto.randomUUID();
+      });
+  }
+  return clientIdPromise;
+};
+
+const jsonHeaders = async (): Promise<Record<string, string>> => ({
+  'Content-Type': 'application/json',
+  [CLIENT_ID_HEADER]: await getClientId(),
+});
+
 export interface ProductData {
   title?: string;
   description?: string;
@@ -34,9 +66,7 @@ export const analyzeProduct = async (data: ProductData): Promise<AnalysisRespons
   try {
     const response = await fetch(`${API_BASE_URL}/analyze`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers: await jsonHeaders(),
       body: JSON.stringify(data),
     });
 
@@ -55,9 +85,7 @@ export const regenerateAnalysis = async (data: ProductData): Promise<AnalysisRes
   try {
     const response = await fetch(`${API_BASE_URL}/regenerate`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers: await jsonHeaders(),
       body: JSON.stringify(data),
     });
 
@@ -80,9 +108,7 @@ export const getSuggestion = async (
   try {
     const response = await fetch(`${API_BASE_URL}/suggest`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers: await jsonHeaders(),
       body: JSON.stringify({ topic, current_value: currentValue, context }),
     });
 